@@ -1,8 +1,13 @@
 from strands import Agent
+from strands.agent import AgentResult
 from strands.models import BedrockModel
+from strands.tools.executors import ConcurrentToolExecutor
 
-from tools_orders import cancel_order, create_order, get_order, list_orders, update_order
-from tools_products_catalog import get_product, list_products
+import http_transport
+from tools_orders import (cancel_order, create_order, get_order, list_orders, list_orders_filtered_by_status,
+                          patch_order, update_order)
+from tools_products_catalog import (find_products, get_product, get_products, list_products,
+                                    list_products_by_category, search_products)
 
 model_id = "eu.amazon.nova-micro-v1:0"
 model = BedrockModel(
@@ -13,13 +18,21 @@ agent = Agent(
     model=model,
     tools=[
         list_products,
+        list_products_by_category,
+        search_products,
+        find_products,
         get_product,
+        get_products,
         create_order,
         list_orders,
+        list_orders_filtered_by_status,
         get_order,
         update_order,
+        patch_order,
         cancel_order,
     ],
+    # The tools are async, so the tool calls of one model step run concurrently on the agent's event loop
+    tool_executor=ConcurrentToolExecutor(),
     system_prompt="""You're a helpful shopping assistant. You can help users browse products and manage their orders.
 
 You have access to the following tools:
@@ -27,16 +40,34 @@ You have access to the following tools:
 Product Catalog:
 - list_products: List all products from the catalog
 - list_products_by_category: List products from the catalog filtered by category (Mice, Keyboards, Monitors, Headsets, Cameras, Accessories, Laptops)
+- search_products: Search products by free-text query (e.g. "wireless mouse"), best matches first
+- find_products: Find products by category, price range and stock, sorted by price or stock (e.g. cheapest laptop, monitors under $300)
 - get_product: Get details of a specific product by its ID
+- get_products: Get details of several products by their IDs in one call
 
 Order Management:
-- create_order: Create a new order with items (requires product_id, name, price, quantity for each item)
-- list_orders: List all orders
-- list_orders_filtered_by_status: List orders, filtered by status
+- create_order: Create a new order with items (requires product_id, name, price, quantity for each item). If it fails with an idempotency_key, retry with that same idempotency_key so the order is not created twice
+- list_orders: List all orders, one page at a time, oldest first
+- list_orders_filtered_by_status: List orders, filtered by status, one page at a time, oldest first
 - get_order: Get details of a specific order by its ID
 - update_order: Update an order's items or status
+- patch_order: Add, remove or change the quantity of single items of an order
 - cancel_order: Cancel an existing order
 
+Prefer search_products over listing whole categories when the user describes what they are looking for.
 When helping users place orders, first look up products to get accurate product_id, name, and price information.
+To change some items of an order, use patch_order instead of re-sending all items with update_order, passing the
+version of the order as returned by get_order.
+When you need details of several products, use get_products once instead of calling get_product for each of them.
+List results may come as CSV rows under a summary line that states values shared by all rows; a line starting with
+"more available" means there are more results and tells how to get them.
+If a tool reports service_unavailable, tell the user that the service is temporarily unavailable instead of retrying it
+right away.
 """
 )
+
+
+def invoke_agent(prompt: str) -> AgentResult:
+    # agent(prompt) would run every call on a new event loop; the transport's long-lived loop keeps the tools'
+    # connections open from one call to the next
+    return http_transport.run(agent.invoke_async(prompt))
@@ -1,6 +1,6 @@
 from bedrock_agentcore.runtime import BedrockAgentCoreApp
 
-from agent import agent
+from agent import invoke_agent
 
 app = BedrockAgentCoreApp()
 
@@ -9,7 +9,7 @@ app = BedrockAgentCoreApp()
 def strands_agent_bedrock(payload):
     user_input = payload.get("prompt")
     print("User input:", user_input)
-    response = agent(user_input)
+    response = invoke_agent(user_input)
     return response.message['content'][0]['text']
 
 
@@ -1,6 +1,6 @@
 import logging
 
-from agent import agent
+from agent import invoke_agent
 
 logging.basicConfig(format='%(asctime)s - %(levelname)s - %(message)s', level=logging.INFO)
 
@@ -8,7 +8,7 @@ logger = logging.getLogger(__name__)
 
 
 def strands_agent_bedrock(user_input):
-    response = agent(user_input)
+    response = invoke_agent(user_input)
     return response.message['content'][0]['text']
 
 
@@ -0,0 +1,57 @@
+"""Latency of a model step with several independent tool calls, run one after another and concurrently.
+
+The agent's default ConcurrentToolExecutor runs the tool calls of a step as
+tasks on one event loop, so with the async tools a step takes about as long as
+its slowest call. This benchmark makes the calls of such a step, three
+get_product calls and a list_orders call, against a local stand-in service
+that takes RESPONSE_DELAY seconds per request, awaiting them in turn (as the
+SequentialToolExecutor does) and gathering them. The catalog response cache is
+cleared before every step. Run from the agent directory:
+
+    python -m benchmarks.benchmark_concurrent_tools
+"""
+import asyncio
+import os
+import statistics
+import time
+
+from benchmarks.benchmark_http_transport import StandInServiceHandler, start_server
+
+STEPS = 20
+RESPONSE_DELAY = 0.05
+
+
+async def main() -> None:
+    server = start_server()
+    StandInServiceHandler.response_delay = RESPONSE_DELAY
+    os.environ["PRODUCTS_CATALOG_BASE_URL"] = os.environ["ORDERS_BASE_URL"] = f"http://127.0.0.1:{server.server_port}"
+    # Imported after the base URLs are set, as the tools read them on import
+    import tools_products_catalog
+    from tools_orders import list_orders
+    from tools_products_catalog import get_product
+
+    def step_calls():
+        tools_products_catalog._catalog_cache.clear()
+        return [get_product(1), get_product(2), get_product(3), list_orders()]
+
+    async def sequential() -> None:
+        for call in step_calls():
+            await call
+
+    async def concurrent() -> None:
+        await asyncio.gather(*step_calls())
+
+    print(f"Step of 4 tool calls, {RESPONSE_DELAY * 1000:.0f}ms per request, median of {STEPS} steps")
+    for name, step in (("sequential", sequential), ("concurrent", concurrent)):
+        await step()
+        latencies = []
+        for _ in range(STEPS):
+            started = time.perf_counter()
+            await step()
+            latencies.append(time.perf_counter() - started)
+        print(f"{name:>10}: {statistics.median(latencies) * 1000:7.1f}ms")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
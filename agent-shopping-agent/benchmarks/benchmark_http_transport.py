@@ -0,0 +1,97 @@
+"""Request latency with and without the pooled keep-alive transport.
+
+Starts a local stand-in for the products catalog and orders services and gets
+a product through the shared pooled client of http_transport, and through a
+bare httpx.get per call, which sets up a new client and connection every time.
+The stand-in can delay every new connection to model the TCP (and TLS)
+handshake of a remote service. Run from the agent directory:
+
+    python -m benchmarks.benchmark_http_transport
+"""
+import asyncio
+import json
+import statistics
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+import http_transport
+
+CALLS = 300
+HANDSHAKE_DELAYS = [0.0, 0.005, 0.02]
+PRODUCT = json.dumps({"id": 1, "name": "Logitech MX Master 3S Mouse", "price": 99.99, "category": "Mice",
+                      "stock": 12}).encode()
+ORDERS = json.dumps({"orders": [], "count": 0}).encode()
+
+
+class StandInServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    handshake_delay = 0.0
+    response_delay = 0.0
+    # Headers and body are written separately; with Nagle on, keep-alive responses stall on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def setup(self) -> None:
+        # Runs once per connection, so only new connections pay the simulated handshake
+        time.sleep(self.handshake_delay)
+        super().setup()
+
+    def do_GET(self) -> None:
+        time.sleep(self.response_delay)
+        body = ORDERS if self.path.startswith("/api/v1/orders") else PRODUCT
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+def start_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInServiceHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def measure(call: Callable[[], Awaitable]) -> tuple[float, float]:
+    await call()
+    latencies = []
+    for _ in range(CALLS):
+        started = time.perf_counter()
+        await call()
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return statistics.median(latencies) * 1000, latencies[int(len(latencies) * 0.95)] * 1000
+
+
+async def bare_get(url: str) -> dict:
+    # The sync httpx.get opens and closes its own connection, so it runs in a thread to keep the loop free
+    return (await asyncio.to_thread(httpx.get, url)).json()
+
+
+async def pooled_get(url: str) -> dict:
+    return (await http_transport.get(url)).json()
+
+
+async def main() -> None:
+    server = start_server()
+    url = f"http://127.0.0.1:{server.server_port}/api/v1/products/1"
+
+    print(f"{CALLS} product requests per row, latency in ms")
+    print(f"{'handshake':>10} {'bare p50':>9} {'bare p95':>9} {'pooled p50':>11} {'pooled p95':>11}")
+    for delay in HANDSHAKE_DELAYS:
+        StandInServiceHandler.handshake_delay = delay
+        bare = await measure(lambda: bare_get(url))
+        pooled = await measure(lambda: pooled_get(url))
+        print(f"{delay * 1000:>8.0f}ms {bare[0]:>9.2f} {bare[1]:>9.2f} {pooled[0]:>11.2f} {pooled[1]:>11.2f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+"""Exercises the circuit breaker of the tools against a local flaky stand-in orders service.
+
+The stand-in is healthy at first, then hangs past the tools' read timeout,
+then answers 503, and finally recovers. list_orders is called throughout and
+every call is printed with its latency, its outcome and the state of the
+orders service's circuit: while the circuit is open, calls return a
+structured error at once instead of waiting for timeouts, and once the
+service has recovered a trial call closes the circuit again. The read timeout,
+failure threshold and reset timeout are lowered so that the run takes a few
+seconds. Run from the agent directory:
+
+    python -m benchmarks.flaky_service_circuit_breaker
+"""
+import asyncio
+import os
+import time
+
+import http_transport
+from benchmarks.benchmark_http_transport import StandInServiceHandler, start_server
+
+# (stand-in behaviour, seconds it lasts)
+PHASES = [("healthy", 1.0), ("hanging", 3.0), ("failing", 3.0), ("healthy", 3.0)]
+CALL_INTERVAL = 0.2
+HANG_SECONDS = 1.0
+
+
+class FlakyServiceHandler(StandInServiceHandler):
+    mode = "healthy"
+
+    def do_GET(self) -> None:
+        if self.mode == "failing":
+            self.send_error(503)
+            return
+        if self.mode == "hanging":
+            time.sleep(HANG_SECONDS)
+        try:
+            super().do_GET()
+        except (BrokenPipeError, ConnectionResetError):
+            # The tool stopped waiting for the answer
+            pass
+
+
+async def main() -> None:
+    server = start_server()
+    server.RequestHandlerClass = FlakyServiceHandler
+    os.environ["ORDERS_BASE_URL"] = f"http://127.0.0.1:{server.server_port}"
+    # Read when the client and the circuit breaker are created on the first call
+    http_transport.TOOLS_HTTP_READ_TIMEOUT = 0.3
+    http_transport.TOOLS_CIRCUIT_FAILURE_THRESHOLD = 3
+    http_transport.TOOLS_CIRCUIT_RESET_TIMEOUT = 1.0
+    # Imported after the base URL is set, as the tools read it on import
+    from tools_orders import ORDERS_BASE_URL, list_orders
+
+    breaker = http_transport.get_circuit_breaker(ORDERS_BASE_URL)
+    latencies: dict[tuple[str, bool], list[float]] = {}
+    started = time.perf_counter()
+    print(f"{'time':>6} {'service':>8} {'latency':>9} {'circuit':>9}  result")
+    for mode, duration in PHASES:
+        FlakyServiceHandler.mode = mode
+        phase_end = time.perf_counter() + duration
+        while time.perf_counter() < phase_end:
+            call_started = time.perf_counter()
+            try:
+                result = await list_orders()
+                outcome = result if isinstance(result, dict) else result.splitlines()[0]
+            except Exception as e:
+                outcome = f"{type(e).__name__}: {e}"
+            latency = time.perf_counter() - call_started
+            failed_fast = isinstance(outcome, dict) and outcome.get("service_unavailable", False)
+            latencies.setdefault((mode, failed_fast), []).append(latency)
+            print(f"{call_started - started:>5.1f}s {mode:>8} {latency * 1000:>7.1f}ms {breaker.state.value:>9}  "
+                  f"{str(outcome)[:90]}")
+            await asyncio.sleep(CALL_INTERVAL)
+    server.shutdown()
+
+    print("\nMean latency per service behaviour")
+    for (mode, failed_fast), values in latencies.items():
+        kind = "failed fast" if failed_fast else "called"
+        print(f"{mode:>8} {kind:>12}: {len(values):>3} calls, {sum(values) / len(values) * 1000:7.1f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+"""Size of the tool results the model reads, in JSON and in compact output mode.
+
+Calls the catalog tools against a running products catalog service (the sample
+catalog by default, see PRODUCTS_CATALOG_BASE_URL) and renders a list of
+sample orders built from its products in the orders service's JSON shape.
+Each result is measured as the text the agent passes to the model: JSON
+results as json.dumps, compact results as they are. Tokens are approximated
+as characters / 4; the exact count depends on the model's tokenizer. Run from
+the agent directory:
+
+    python -m benchmarks.measure_tool_output_tokens
+"""
+import asyncio
+import json
+import random
+import uuid
+from datetime import datetime, timedelta
+
+import tool_output
+from tool_output import compact_orders
+from tools_products_catalog import list_products, list_products_by_category, search_products
+
+SAMPLE_ORDERS = 40
+
+
+def sample_orders(products: list[dict]) -> dict:
+    generator = random.Random(42)
+    created_at = datetime(2025, 11, 3, 9, 30)
+    orders = []
+    for _ in range(SAMPLE_ORDERS):
+        items = [
+            {"product_id": str(product["id"]), "name": product["name"], "price": product["price"],
+             "quantity": generator.randint(1, 3)}
+            for product in generator.sample(products, generator.randint(1, 4))
+        ]
+        created_at += timedelta(minutes=generator.randint(1, 180), microseconds=generator.randint(0, 999_999))
+        orders.append({
+            "id": str(uuid.UUID(int=generator.getrandbits(128))),
+            "items": items,
+            "total_value": round(sum(item["price"] * item["quantity"] for item in items), 2),
+            "status": generator.choice(["confirmed", "confirmed", "confirmed", "cancelled"]),
+            "created_at": created_at.isoformat(),
+            "updated_at": created_at.isoformat(),
+            "version": 1,
+        })
+    return {"orders": orders, "count": len(orders)}
+
+
+def as_model_text(result: dict | str) -> str:
+    return result if isinstance(result, str) else json.dumps(result, ensure_ascii=False)
+
+
+def tokens(text: str) -> int:
+    return round(len(text) / 4)
+
+
+async def main() -> None:
+    tool_output.TOOLS_OUTPUT_FORMAT = "json"
+    orders = sample_orders((await list_products())["products"])
+
+    async def list_sample_orders():
+        return compact_orders(orders)
+
+    calls = {
+        "list_products()": lambda: list_products(),
+        "list_products_by_category('Mice')": lambda: list_products_by_category("Mice"),
+        "search_products('wireless')": lambda: search_products("wireless"),
+        f"list_orders() ({SAMPLE_ORDERS} orders)": list_sample_orders,
+    }
+
+    print("Approximate tokens (characters / 4) of each tool result")
+    print(f"{'call':<38} {'json':>7} {'compact':>8} {'saved':>6} {'capped':>7} {'saved':>6}")
+    for name, call in calls.items():
+        tool_output.TOOLS_OUTPUT_FORMAT = "json"
+        json_tokens = tokens(as_model_text(await call()))
+        tool_output.TOOLS_OUTPUT_FORMAT = "compact"
+        tool_output.TOOLS_OUTPUT_MAX_ROWS = 1_000_000
+        compact_tokens = tokens(as_model_text(await call()))
+        tool_output.TOOLS_OUTPUT_MAX_ROWS = 25
+        capped_tokens = tokens(as_model_text(await call()))
+        print(f"{name:<38} {json_tokens:>7} {compact_tokens:>8} {1 - compact_tokens / json_tokens:>6.0%} "
+              f"{capped_tokens:>7} {1 - capped_tokens / json_tokens:>6.0%}")
+    print("compact: all rows; capped: at most 25 rows, the default TOOLS_OUTPUT_MAX_ROWS")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
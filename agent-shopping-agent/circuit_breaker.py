@@ -0,0 +1,88 @@
+"""Circuit breakers that stop the tools from waiting on a service that is down.
+
+Each service gets a breaker that counts consecutive failed calls. Once
+failure_threshold calls in a row have failed, the circuit opens and calls fail
+immediately with CircuitOpenError instead of waiting through timeouts. After
+reset_timeout seconds it turns half-open and lets a single trial call through:
+if it succeeds the circuit closes again, otherwise it stays open for another
+reset_timeout seconds.
+"""
+import threading
+import time
+from collections.abc import Callable
+from enum import Enum
+
+import httpx
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Raised instead of calling a service whose circuit is open; the request was not sent."""
+
+    def __init__(self, service: str, retry_after: float):
+        super().__init__(f"Circuit open for {service}, calls to it are paused for {retry_after:.0f} more seconds")
+        self.service = service
+        self.retry_after = retry_after
+
+    def to_dict(self) -> dict:
+        return {
+            "error": f"Service {self.service} is currently unavailable, calls to it are paused",
+            "service_unavailable": True,
+            "retry_after_seconds": max(1, round(self.retry_after)),
+        }
+
+
+class CircuitBreaker:
+    def __init__(self, service: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.service = service
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> CircuitState:
+        return self._state
+
+    def before_call(self) -> None:
+        """Raises CircuitOpenError if the call must not be made; otherwise the call's outcome must be recorded."""
+        with self._lock:
+            if self._state == CircuitState.OPEN:
+                remaining = self._opened_at + self._reset_timeout - self._clock()
+                if remaining > 0:
+                    raise CircuitOpenError(self.service, remaining)
+                self._state = CircuitState.HALF_OPEN
+            if self._state == CircuitState.HALF_OPEN:
+                if self._trial_in_flight:
+                    # Only the trial call goes through; the others fail fast until it has finished
+                    raise CircuitOpenError(self.service, 0.0)
+                self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = CircuitState.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == CircuitState.HALF_OPEN or self._failures >= self._failure_threshold:
+                self._state = CircuitState.OPEN
+                self._opened_at = self._clock()
+
+    def release(self) -> None:
+        """Ends a call that had no outcome, e.g. because it was cancelled, so that another trial call can be made."""
+        with self._lock:
+            self._trial_in_flight = False
@@ -0,0 +1,198 @@
+"""Shared async HTTP transport for the agent tools calling the microservices.
+
+All tools send their requests through a pooled httpx.AsyncClient, so calls to
+the same service reuse keep-alive connections instead of opening a new TCP
+connection per tool call, and tool calls the model makes in the same step run
+concurrently on the event loop. The agent runs on the transport's long-lived
+event loop (see run), so the connections are also reused from one agent call
+to the next. Every request has connect and read
+timeouts, and requests that are safe to repeat are retried a bounded number of
+times with jittered exponential backoff. Each service has a circuit breaker, so
+while a service is down the tools fail fast instead of waiting for timeouts.
+"""
+import asyncio
+import functools
+import os
+import random
+import threading
+from collections.abc import AsyncIterator, Awaitable, Callable, Coroutine
+from typing import TypeVar
+
+import httpx
+
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+
+# Seconds to wait for a connection to a service, and for its response once connected
+TOOLS_HTTP_CONNECT_TIMEOUT = float(os.environ.get("TOOLS_HTTP_CONNECT_TIMEOUT", "3"))
+TOOLS_HTTP_READ_TIMEOUT = float(os.environ.get("TOOLS_HTTP_READ_TIMEOUT", "10"))
+# Retries of a failed idempotent request, after the first attempt
+TOOLS_HTTP_MAX_RETRIES = int(os.environ.get("TOOLS_HTTP_MAX_RETRIES", "2"))
+# Idle keep-alive connections kept open for reuse
+TOOLS_HTTP_POOL_SIZE = int(os.environ.get("TOOLS_HTTP_POOL_SIZE", "10"))
+# Consecutive failed calls to a service after which calls to it fail fast
+TOOLS_CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get("TOOLS_CIRCUIT_FAILURE_THRESHOLD", "5"))
+# Seconds calls to a failing service fail fast before a trial call checks whether it has recovered
+TOOLS_CIRCUIT_RESET_TIMEOUT = float(os.environ.get("TOOLS_CIRCUIT_RESET_TIMEOUT", "30"))
+
+RETRY_BACKOFF_SECONDS = 0.1
+RETRY_BACKOFF_MAX_SECONDS = 2.0
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRYABLE_STATUS_CODES = frozenset({502, 503, 504})
+RETRYABLE_ERRORS = (httpx.NetworkError, httpx.TimeoutException, httpx.RemoteProtocolError)
+
+T = TypeVar("T")
+
+
+def create_client(pool_size: int = TOOLS_HTTP_POOL_SIZE) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(TOOLS_HTTP_READ_TIMEOUT, connect=TOOLS_HTTP_CONNECT_TIMEOUT),
+        limits=httpx.Limits(max_connections=None, max_keepalive_connections=pool_size),
+    )
+
+
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_lock = threading.Lock()
+
+
+def run(coroutine: Coroutine[object, object, T]) -> T:
+    """Runs a coroutine on the transport's long-lived event loop and returns its result.
+
+    Synchronous callers, like the agent runners, use this instead of
+    asyncio.run, which would start a new event loop, and so a new client with
+    new connections, on every call.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="http-transport", daemon=True).start()
+    future = asyncio.run_coroutine_threadsafe(coroutine, _loop)
+    try:
+        return future.result()
+    except BaseException:
+        future.cancel()
+        raise
+
+
+# An httpx client is bound to the event loop it is used on, so each loop gets its own client, held by an async
+# generator that closes it when the loop shuts down
+_clients: dict[asyncio.AbstractEventLoop, tuple[httpx.AsyncClient, AsyncIterator[httpx.AsyncClient]]] = {}
+_clients_lock = threading.Lock()
+
+
+async def _client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    entry = _clients.get(loop)
+    if entry is None:
+        holder = _close_on_loop_shutdown(create_client())
+        # The generator yields without suspending, so no other task on this loop can create a client meanwhile
+        client = await anext(holder)
+        with _clients_lock:
+            for finished_loop in [other for other in _clients if other.is_closed()]:
+                del _clients[finished_loop]
+            entry = _clients[loop] = (client, holder)
+    return entry[0]
+
+
+async def _close_on_loop_shutdown(client: httpx.AsyncClient) -> AsyncIterator[httpx.AsyncClient]:
+    # A loop finalizes the async generators started on it when it shuts down, as asyncio.run does before closing
+    # it, which closes the client and its connections while the loop can still run the close
+    try:
+        yield client
+    finally:
+        await client.aclose()
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(url: str) -> CircuitBreaker:
+    """Returns the circuit breaker of the service the URL belongs to, identified by its scheme, host and port."""
+    parsed = httpx.URL(url)
+    service = f"{parsed.scheme}://{parsed.host}:{parsed.port or (443 if parsed.scheme == 'https' else 80)}"
+    breaker = _breakers.get(service)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(
+                service, CircuitBreaker(service, TOOLS_CIRCUIT_FAILURE_THRESHOLD, TOOLS_CIRCUIT_RESET_TIMEOUT)
+            )
+    return breaker
+
+
+def fail_fast(tool_function: Callable[..., Awaitable]) -> Callable[..., Awaitable]:
+    """Makes a tool return a structured error right away, instead of raising, while its service's circuit is open."""
+
+    @functools.wraps(tool_function)
+    async def wrapper(*args, **kwargs):
+        try:
+            return await tool_function(*args, **kwargs)
+        except CircuitOpenError as e:
+            return e.to_dict()
+
+    return wrapper
+
+
+async def request(method: str, url: str, *, params: dict | None = None, json=None, headers: dict | None = None,
+                  timeout: httpx.Timeout | None = None, max_retries: int = TOOLS_HTTP_MAX_RETRIES) -> httpx.Response:
+    """Sends a request on the shared client, retrying it if it is safe to repeat.
+
+    GET, HEAD, OPTIONS, PUT and DELETE requests, and POST or PATCH requests
+    carrying an Idempotency-Key header, are retried on network errors,
+    timeouts and 502/503/504 responses. Returns the last response, or raises the
+    last error once the retries are used up. Network errors, timeouts and 5xx
+    responses count as failures of the service; while its circuit is open,
+    CircuitOpenError is raised without sending the request.
+    """
+    method = method.upper()
+    retryable = method in IDEMPOTENT_METHODS or bool(headers and "Idempotency-Key" in headers)
+    extra = {"timeout": timeout} if timeout is not None else {}
+    breaker = get_circuit_breaker(url)
+
+    attempt = 0
+    while True:
+        breaker.before_call()
+        try:
+            client = await _client()
+            response = await client.request(method, url, params=params, json=json, headers=headers, **extra)
+        except RETRYABLE_ERRORS:
+            breaker.record_failure()
+            if not retryable or attempt >= max_retries:
+                raise
+        except BaseException:
+            breaker.release()
+            raise
+        else:
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            if not retryable or attempt >= max_retries or response.status_code not in RETRYABLE_STATUS_CODES:
+                return response
+        await _sleep_before_retry(attempt)
+        attempt += 1
+
+
+async def get(url: str, **kwargs) -> httpx.Response:
+    return await request("GET", url, **kwargs)
+
+
+async def post(url: str, **kwargs) -> httpx.Response:
+    return await request("POST", url, **kwargs)
+
+
+async def put(url: str, **kwargs) -> httpx.Response:
+    return await request("PUT", url, **kwargs)
+
+
+async def patch(url: str, **kwargs) -> httpx.Response:
+    return await request("PATCH", url, **kwargs)
+
+
+async def delete(url: str, **kwargs) -> httpx.Response:
+    return await request("DELETE", url, **kwargs)
+
+
+async def _sleep_before_retry(attempt: int) -> None:
+    # Full jitter: a random delay up to the exponential backoff spreads the retries of concurrent calls apart
+    await asyncio.sleep(random.uniform(0, min(RETRY_BACKOFF_MAX_SECONDS, RETRY_BACKOFF_SECONDS * 2 ** attempt)))
@@ -0,0 +1,113 @@
+import asyncio
+
+import httpx
+import pytest
+
+import http_transport
+from tools_products_catalog import CatalogResponseCache
+
+URL = "http://catalog/api/v1/products"
+
+
+class StubCatalogService:
+    """Stands in for http_transport.get, answering with an ETag and 304 to a matching If-None-Match."""
+
+    def __init__(self):
+        self.bodies: dict[str, bytes] = {}
+        self.status_code = 200
+        self.requests: list[tuple[str, dict | None, dict | None]] = []
+
+    async def get(self, url: str, params: dict | None = None, headers: dict | None = None) -> httpx.Response:
+        self.requests.append((url, params, headers))
+        if self.status_code != 200:
+            return httpx.Response(self.status_code, json={"error": "unavailable"})
+        body = self.bodies.get(url, b'{"products":[],"count":0}')
+        etag = f'"{hash(body) & 0xffffffff:x}"'
+        if headers and headers.get("If-None-Match") == etag:
+            return httpx.Response(304, headers={"ETag": etag})
+        return httpx.Response(200, content=body, headers={"ETag": etag, "Content-Type": "application/json"})
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = StubCatalogService()
+    monkeypatch.setattr(http_transport, "get", service.get)
+    return service
+
+
+def get(cache: CatalogResponseCache, url: str = URL, params: dict | None = None) -> httpx.Response:
+    return asyncio.run(cache.get(url, params))
+
+
+def test_cache_serves_fresh_responses_without_calling_the_service(service):
+    now = [0.0]
+    cache = CatalogResponseCache(max_entries=10, ttl=30.0, clock=lambda: now[0])
+
+    first = get(cache, params={"category": "Mice", "limit": 5})
+    now[0] = 29.0
+    second = get(cache, params={"limit": 5, "category": "Mice"})
+
+    assert second is first
+    assert len(service.requests) == 1
+    assert cache.stats() == {"hits": 1, "misses": 1, "revalidations": 0, "entries": 1}
+
+
+def test_cache_revalidates_expired_responses_with_their_etag(service):
+    now = [0.0]
+    cache = CatalogResponseCache(max_entries=10, ttl=30.0, clock=lambda: now[0])
+    first = get(cache)
+
+    now[0] = 30.0
+    revalidated = get(cache)
+    now[0] = 59.0
+    renewed = get(cache)
+
+    assert revalidated is first
+    assert renewed is first
+    assert service.requests[1][2] == {"If-None-Match": first.headers["ETag"]}
+    assert len(service.requests) == 2
+    assert cache.stats() == {"hits": 1, "misses": 1, "revalidations": 1, "entries": 1}
+
+
+def test_cache_replaces_expired_responses_that_changed(service):
+    now = [0.0]
+    cache = CatalogResponseCache(max_entries=10, ttl=30.0, clock=lambda: now[0])
+    get(cache)
+
+    service.bodies[URL] = b'{"products":[{"id":1}],"count":1}'
+    now[0] = 30.0
+    changed = get(cache)
+    now[0] = 31.0
+
+    assert changed.json()["count"] == 1
+    assert get(cache) is changed
+    assert cache.stats() == {"hits": 1, "misses": 2, "revalidations": 0, "entries": 1}
+
+
+def test_cache_evicts_least_recently_used_responses(service):
+    cache = CatalogResponseCache(max_entries=2, ttl=30.0, clock=lambda: 0.0)
+    for url in (f"{URL}/1", f"{URL}/2", f"{URL}/1", f"{URL}/3"):
+        get(cache, url)
+
+    assert cache.stats()["entries"] == 2
+    get(cache, f"{URL}/1")
+    assert len(service.requests) == 3
+    get(cache, f"{URL}/2")
+    assert len(service.requests) == 4
+
+
+def test_cache_does_not_keep_failed_responses(service):
+    now = [0.0]
+    cache = CatalogResponseCache(max_entries=10, ttl=30.0, clock=lambda: now[0])
+    get(cache)
+
+    service.status_code = 503
+    now[0] = 30.0
+    failed = get(cache)
+    service.status_code = 200
+    recovered = get(cache)
+
+    assert failed.status_code == 503
+    assert recovered.status_code == 200
+    assert service.requests[2][2] is None
+    assert cache.stats() == {"hits": 0, "misses": 3, "revalidations": 0, "entries": 1}
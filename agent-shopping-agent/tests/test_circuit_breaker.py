@@ -0,0 +1,166 @@
+import asyncio
+
+import httpx
+import pytest
+
+import http_transport
+import tools_orders
+from circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitState
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def open_breaker(clock, failure_threshold=3, reset_timeout=10.0):
+    breaker = CircuitBreaker("http://orders:80", failure_threshold, reset_timeout, clock)
+    for _ in range(failure_threshold):
+        breaker.before_call()
+        breaker.record_failure()
+    return breaker
+
+
+def test_circuit_opens_after_consecutive_failures_and_closes_after_successful_trial(clock):
+    breaker = CircuitBreaker("http://orders:80", failure_threshold=3, reset_timeout=10.0, clock=clock)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == CircuitState.CLOSED
+
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+
+    clock.now = 4.0
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.before_call()
+    assert error.value.retry_after == 6.0
+    assert error.value.to_dict()["service_unavailable"] is True
+    assert error.value.to_dict()["retry_after_seconds"] == 6
+
+    clock.now = 10.0
+    breaker.before_call()
+    assert breaker.state == CircuitState.HALF_OPEN
+
+    breaker.record_success()
+    assert breaker.state == CircuitState.CLOSED
+    breaker.before_call()
+
+
+def test_success_resets_the_count_of_consecutive_failures(clock):
+    breaker = CircuitBreaker("http://orders:80", failure_threshold=2, reset_timeout=10.0, clock=clock)
+    for record in (breaker.record_failure, breaker.record_success, breaker.record_failure):
+        breaker.before_call()
+        record()
+
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_failed_trial_keeps_the_circuit_open_for_another_reset_timeout(clock):
+    breaker = open_breaker(clock)
+    clock.now = 10.0
+    breaker.before_call()
+
+    breaker.record_failure()
+
+    assert breaker.state == CircuitState.OPEN
+    clock.now = 19.0
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    clock.now = 20.0
+    breaker.before_call()
+    assert breaker.state == CircuitState.HALF_OPEN
+
+
+def test_half_open_circuit_lets_a_single_trial_call_through(clock):
+    breaker = open_breaker(clock)
+    clock.now = 10.0
+    breaker.before_call()
+
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    breaker.before_call()
+    breaker.before_call()
+
+
+def test_release_lets_another_trial_call_through(clock):
+    breaker = open_breaker(clock)
+    clock.now = 10.0
+    breaker.before_call()
+
+    breaker.release()
+
+    assert breaker.state == CircuitState.HALF_OPEN
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_cancelled_trial_request_releases_the_half_open_circuit(clock, monkeypatch):
+    breaker = open_breaker(clock)
+    clock.now = 10.0
+    monkeypatch.setattr(http_transport, "get_circuit_breaker", lambda url: breaker)
+
+    class HangingClient:
+        async def request(self, *args, **kwargs):
+            await asyncio.Event().wait()
+
+    async def hanging_client():
+        return HangingClient()
+
+    monkeypatch.setattr(http_transport, "_client", hanging_client)
+
+    async def cancel_trial():
+        trial = asyncio.create_task(http_transport.get("http://orders/api/v1/orders"))
+        await asyncio.sleep(0)
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+
+    asyncio.run(cancel_trial())
+
+    assert breaker.state == CircuitState.HALF_OPEN
+    breaker.before_call()
+
+
+def test_create_order_returns_service_unavailable_with_its_idempotency_key(monkeypatch):
+    async def open_circuit(url, **kwargs):
+        raise CircuitOpenError("http://orders:80", 12.0)
+
+    monkeypatch.setattr(http_transport, "post", open_circuit)
+
+    result = asyncio.run(tools_orders.create_order(
+        [{"product_id": "1", "name": "Mouse", "price": 9.99, "quantity": 1}], idempotency_key="checkout-1"
+    ))
+
+    assert result == {"error": "Service http://orders:80 is currently unavailable, calls to it are paused",
+                      "service_unavailable": True, "retry_after_seconds": 12, "idempotency_key": "checkout-1"}
+
+
+def test_create_order_returns_server_error_with_its_idempotency_key(monkeypatch):
+    async def failing_service(url, **kwargs):
+        return httpx.Response(503, json={"error": "Orders journal cannot be written"})
+
+    monkeypatch.setattr(http_transport, "post", failing_service)
+
+    result = asyncio.run(tools_orders.create_order(
+        [{"product_id": "1", "name": "Mouse", "price": 9.99, "quantity": 1}], idempotency_key="checkout-1"
+    ))
+
+    assert result == {"error": "Order service failed with status 503, retry with this idempotency_key",
+                      "idempotency_key": "checkout-1"}
@@ -0,0 +1,96 @@
+import pytest
+
+import tool_output
+from tool_output import ORDER_COLUMNS, PRODUCT_COLUMNS, compact_orders, compact_products, page_limit, render_rows
+
+
+@pytest.fixture(autouse=True)
+def compact_mode(monkeypatch):
+    monkeypatch.setattr(tool_output, "TOOLS_OUTPUT_FORMAT", "compact")
+    monkeypatch.setattr(tool_output, "TOOLS_OUTPUT_MAX_ROWS", 25)
+
+
+def product(product_id, name="Mouse", price=19.99, category="Mice", stock=5):
+    return {"id": product_id, "name": name, "price": price, "category": category, "stock": stock}
+
+
+def test_render_rows_states_values_shared_by_all_rows_once():
+    rows = [product(1, "Mouse, wireless"), product(2, "Trackball", price=49.5)]
+
+    output = render_rows("products", rows, PRODUCT_COLUMNS)
+
+    assert output == ('2 products, all with category=Mice, stock=5\n'
+                      'id,name,price\n'
+                      '1,"Mouse, wireless",19.99\n'
+                      '2,Trackball,49.5\n')
+
+
+def test_render_rows_keeps_all_columns_of_a_single_row():
+    output = render_rows("products", [product(1, stock=None)], PRODUCT_COLUMNS)
+
+    assert output == "1 products\nid,name,price,category,stock\n1,Mouse,19.99,Mice,\n"
+
+
+def test_render_rows_caps_rows_and_says_how_to_get_the_rest():
+    rows = [product(product_id, stock=product_id) for product_id in range(1, 6)]
+
+    output = render_rows("products", rows, PRODUCT_COLUMNS, next_cursor="abc", max_rows=2,
+                         more_hint="page through them with limit and cursor")
+
+    assert output.splitlines() == [
+        "5 products, all with name=Mouse, price=19.99, category=Mice, showing the first 2",
+        "id,stock",
+        "1,1",
+        "2,2",
+        "more available: 3 more products not shown; page through them with limit and cursor",
+    ]
+
+
+def test_render_rows_passes_on_the_cursor_of_a_page_shown_in_full():
+    output = render_rows("products", [product(1), product(2)], PRODUCT_COLUMNS, next_cursor="abc")
+
+    assert output.splitlines()[-1] == "more available: pass cursor=abc for the next page"
+
+
+def test_page_limit_caps_pages_at_the_rows_shown_in_compact_mode(monkeypatch):
+    assert page_limit(100) == 25
+    assert page_limit(10) == 10
+    assert page_limit(None) is None
+
+    monkeypatch.setattr(tool_output, "TOOLS_OUTPUT_FORMAT", "json")
+    assert page_limit(100) == 100
+
+
+def test_render_rows_caps_rows_at_the_configured_maximum(monkeypatch):
+    monkeypatch.setattr(tool_output, "TOOLS_OUTPUT_MAX_ROWS", 3)
+
+    output = render_rows("products", [product(product_id) for product_id in range(1, 11)], PRODUCT_COLUMNS)
+
+    assert output.splitlines()[0].endswith("showing the first 3")
+    assert len(output.splitlines()) == 6
+
+
+def test_render_rows_of_no_rows_is_a_summary_line():
+    assert render_rows("orders", [], ORDER_COLUMNS) == "0 orders\n"
+
+
+def test_compact_orders_joins_items_and_keeps_extra_fields():
+    order = {
+        "id": "o-1", "status": "confirmed", "total_value": 59.97, "version": 2,
+        "created_at": "2025-11-03T09:30:12.123456", "updated_at": "2025-11-03T10:00:00.000000",
+        "items": [{"product_id": "1", "name": "Mouse", "price": 19.99, "quantity": 3}],
+    }
+
+    output = compact_orders({"orders": [order], "count": 1, "next_cursor": None, "not_found": ["o-2"]})
+
+    assert output == ('1 orders\n'
+                      'id,status,total_value,version,created_at,items\n'
+                      'o-1,confirmed,59.97,2,2025-11-03 09:30,"3x Mouse (#1, 19.99)"\n'
+                      'not_found: ["o-2"]\n')
+
+
+def test_compact_products_returns_payload_unchanged_in_json_mode(monkeypatch):
+    monkeypatch.setattr(tool_output, "TOOLS_OUTPUT_FORMAT", "json")
+    payload = {"products": [product(1)], "count": 1}
+
+    assert compact_products(payload) is payload
@@ -0,0 +1,115 @@
+"""Compact rendering of the tools' list results for the model.
+
+The services answer with JSON objects that repeat every key on every row and
+nest order items with full timestamps. All of it is added to the model's
+context, so in compact mode list results are rendered as CSV rows instead:
+fields that are the same on every row are stated once above the table, fields
+the model does not need are dropped, and at most TOOLS_OUTPUT_MAX_ROWS rows are
+included, followed by a "more available" line that says how to get the rest.
+Requested pages are capped at that many rows (see page_limit), so a page's
+next_cursor never skips rows that were left out of the result.
+"""
+import csv
+import io
+import json
+import os
+from collections.abc import Callable, Sequence
+
+# "compact" renders list results as CSV rows; "json" returns the services' JSON unchanged
+TOOLS_OUTPUT_FORMAT = os.environ.get("TOOLS_OUTPUT_FORMAT", "compact")
+# Rows included in a compact list result; the rest are summarized in a "more available" line
+TOOLS_OUTPUT_MAX_ROWS = int(os.environ.get("TOOLS_OUTPUT_MAX_ROWS", "25"))
+
+PRODUCT_COLUMNS = ("id", "name", "price", "category", "stock")
+ORDER_COLUMNS = ("id", "status", "total_value", "version", "created_at", "items")
+
+
+def compact_products(payload: dict, more_hint: str = "page through them with limit and cursor") -> dict | str:
+    """Renders a products list result as CSV rows, or returns it unchanged in json mode."""
+    return _compact(payload, "products", PRODUCT_COLUMNS, _product_row, more_hint)
+
+
+def compact_orders(payload: dict, more_hint: str = "page through them with a smaller limit") -> dict | str:
+    """Renders an orders list result as CSV rows, one order per row, or returns it unchanged in json mode.
+
+    The items of an order are joined into one column and timestamps are cut to
+    the minute; updated_at is dropped.
+    """
+    return _compact(payload, "orders", ORDER_COLUMNS, _order_row, more_hint)
+
+
+def page_limit(limit: int | None) -> int | None:
+    """Caps the page size requested from a service at the rows a compact list result shows."""
+    if TOOLS_OUTPUT_FORMAT != "compact" or limit is None:
+        return limit
+    return min(limit, TOOLS_OUTPUT_MAX_ROWS)
+
+
+def render_rows(kind: str, rows: list[dict], columns: Sequence[str], next_cursor: str | None = None,
+                max_rows: int | None = None, more_hint: str = "") -> str:
+    """Renders rows as a CSV table headed by a summary line, with at most max_rows (TOOLS_OUTPUT_MAX_ROWS) rows."""
+    shown = rows[:max_rows or TOOLS_OUTPUT_MAX_ROWS]
+    # A column with the same value on every row is stated once in the summary line
+    constant = {
+        column: rows[0][column] for column in columns
+        if len(rows) > 1 and all(row[column] == rows[0][column] for row in rows)
+    }
+    columns = [column for column in columns if column not in constant]
+
+    summary = f"{len(rows)} {kind}"
+    if constant:
+        summary += ", all with " + ", ".join(f"{column}={_cell(value)}" for column, value in constant.items())
+    if len(shown) < len(rows):
+        summary += f", showing the first {len(shown)}"
+
+    output = io.StringIO()
+    output.write(summary + "\n")
+    if shown:
+        writer = csv.writer(output, lineterminator="\n")
+        writer.writerow(columns)
+        writer.writerows([_cell(row[column]) for column in columns] for row in shown)
+    if len(shown) < len(rows):
+        # The cursor continues after the last row of the page, so it is not offered when rows were left out of it
+        output.write(f"more available: {len(rows) - len(shown)} more {kind} not shown; {more_hint}\n")
+    elif next_cursor:
+        output.write(f"more available: pass cursor={next_cursor} for the next page\n")
+    return output.getvalue()
+
+
+def _compact(payload: dict, kind: str, columns: Sequence[str], to_row: Callable[[dict], dict],
+             more_hint: str) -> dict | str:
+    if TOOLS_OUTPUT_FORMAT != "compact":
+        return payload
+    rows = [to_row(entry) for entry in payload[kind]]
+    output = render_rows(kind, rows, columns, payload.get("next_cursor"), more_hint=more_hint)
+    # Any other non-empty field of the result, such as not_found of a batch get, is kept as a line of its own
+    for key, value in payload.items():
+        if key not in (kind, "count", "next_cursor") and value:
+            output += f"{key}: {json.dumps(value, ensure_ascii=False)}\n"
+    return output
+
+
+def _product_row(product: dict) -> dict:
+    return {column: product.get(column) for column in PRODUCT_COLUMNS}
+
+
+def _order_row(order: dict) -> dict:
+    return {
+        "id": order["id"],
+        "status": order["status"],
+        "total_value": order["total_value"],
+        "version": order.get("version"),
+        "created_at": order["created_at"][:16].replace("T", " "),
+        "items": "; ".join(
+            f"{item['quantity']}x {item['name']} (#{item['product_id']}, {_cell(item['price'])})"
+            for item in order["items"]
+        ),
+    }
+
+
+def _cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return str(round(value, 2))
+    return str(value)
@@ -1,13 +1,20 @@
 import os
+import uuid
 
-import requests
+import httpx
 from strands import tool
 
+import http_transport
+import tool_output
+from circuit_breaker import CircuitOpenError
+from tool_output import compact_orders
+
 ORDERS_BASE_URL = os.environ.get("ORDERS_BASE_URL", "http://localhost:5002")
 
 
 @tool(description="Create a new order with the specified items")
-def create_order(items: list[dict]) -> dict:
+@http_transport.fail_fast
+async def create_order(items: list[dict], idempotency_key: str = None) -> dict:
     """
     Tool description - Create a new order with the specified items.
 
@@ -17,59 +24,93 @@ def create_order(items: list[dict]) -> dict:
                - name: Product name (string)
                - price: Product price (float)
                - quantity: Number of items to order (int)
+        idempotency_key: Optional key returned by a failed earlier call. Pass it when retrying that call,
+               so the order is created at most once.
 
     #Returns:
         The created order with id, items, total_value, status, created_at, and updated_at.
+        If the order service could not be reached or failed, an error with the idempotency_key to retry with.
     """
     url = f"{ORDERS_BASE_URL}/api/v1/orders"
-
-    response = requests.post(url, json={"items": items})
-    if response.status_code == 400:
+    idempotency_key = idempotency_key or str(uuid.uuid4())
+
+    try:
+        response = await http_transport.post(url, json={"items": items}, headers={"Idempotency-Key": idempotency_key})
+    except CircuitOpenError as e:
+        # The order was not sent; a later retry with the same key still creates it at most once
+        return {**e.to_dict(), "idempotency_key": idempotency_key}
+    except httpx.TransportError as e:
+        return {"error": f"Order service request failed: {str(e)}", "idempotency_key": idempotency_key}
+    if response.status_code == 409:
+        return {"error": response.json().get("error", "Order creation in progress"), "idempotency_key": idempotency_key}
+    if response.status_code in (400, 422):
         return {"error": response.json().get("error", "Invalid order data")}
+    if response.status_code >= 500:
+        # The order may or may not have been created; retrying with the same key creates it at most once
+        return {"error": f"Order service failed with status {response.status_code}, retry with this idempotency_key",
+                "idempotency_key": idempotency_key}
     response.raise_for_status()
     return response.json()
 
 
-@tool(description="List all orders")
-def list_orders() -> dict:
+@tool(description="List all orders, one page at a time, oldest first")
+@http_transport.fail_fast
+async def list_orders(limit: int = None, cursor: str = None) -> dict | str:
     """
-    Tool description - List all orders
+    Tool description - List all orders, one page at a time, oldest first
+
+    #Args:
+        limit: Optional maximum number of orders to return in one page (defaults to 25)
+        cursor: Optional 'next_cursor' value from a previous page to continue listing from
 
     #Returns:
-        A dictionary containing 'orders' list and 'count' of orders found.
+        A dictionary containing 'orders' list, 'count' of orders found and 'next_cursor',
+        which is set if more orders are available.
+        In compact output mode, the orders as CSV rows (id,status,total_value,version,created_at,items) under a
+        summary line, with each order's items as "quantity x name (#product_id, price)" joined by "; ";
+        a 'more available' line tells how to get the orders not shown.
     """
     url = f"{ORDERS_BASE_URL}/api/v1/orders"
+    params = order_page_params(limit, cursor)
 
-    response = requests.get(url)
+    response = await http_transport.get(url, params=params)
     if response.status_code == 400:
         return {"error": response.json().get("error", "Invalid status")}
     response.raise_for_status()
-    return response.json()
+    return compact_orders(response.json())
 
 
-@tool(description="List orders, filtered by status")
-def list_orders_filtered_by_status(status: str) -> dict:
+@tool(description="List orders, filtered by status, one page at a time, oldest first")
+@http_transport.fail_fast
+async def list_orders_filtered_by_status(status: str, limit: int = None, cursor: str = None) -> dict | str:
     """
-    Tool description - List orders, filtered by status.
+    Tool description - List orders, filtered by status, one page at a time, oldest first.
 
     #Args:
         status: Optional status filter ("confirmed" or "cancelled")
+        limit: Optional maximum number of orders to return in one page (defaults to 25)
+        cursor: Optional 'next_cursor' value from a previous page to continue listing from
 
     #Returns:
-        A dictionary containing 'orders' list and 'count' of orders found.
+        A dictionary containing 'orders' list, 'count' of orders found and 'next_cursor',
+        which is set if more orders are available.
+        In compact output mode, the orders as CSV rows (id,status,total_value,version,created_at,items) under a
+        summary line, with each order's items as "quantity x name (#product_id, price)" joined by "; ";
+        a 'more available' line tells how to get the orders not shown.
     """
     url = f"{ORDERS_BASE_URL}/api/v1/orders"
-    params = {"status": status}
+    params = {"status": status, **order_page_params(limit, cursor)}
 
-    response = requests.get(url, params=params)
+    response = await http_transport.get(url, params=params)
     if response.status_code == 400:
         return {"error": response.json().get("error", "Invalid status")}
     response.raise_for_status()
-    return response.json()
+    return compact_orders(response.json())
 
 
 @tool(description="Get a single order by its ID")
-def get_order(order_id: str) -> dict:
+@http_transport.fail_fast
+async def get_order(order_id: str) -> dict:
     """
     Tool description - Get a single order by its ID.
 
@@ -82,7 +123,7 @@ def get_order(order_id: str) -> dict:
     """
     url = f"{ORDERS_BASE_URL}/api/v1/orders/{order_id}"
 
-    response = requests.get(url)
+    response = await http_transport.get(url)
     if response.status_code == 404:
         return {"error": f"Order with ID {order_id} not found"}
     response.raise_for_status()
@@ -90,7 +131,8 @@ def get_order(order_id: str) -> dict:
 
 
 @tool(description="Update an existing order's items or status")
-def update_order(order_id: str, items: list[dict] = None, status: str = None) -> dict:
+@http_transport.fail_fast
+async def update_order(order_id: str, items: list[dict] = None, status: str = None) -> dict:
     """
     Tool description - Update an existing order's items or status.
 
@@ -117,7 +159,7 @@ def update_order(order_id: str, items: list[dict] = None, status: str = None) ->
     if not data:
         return {"error": "No update data provided. Specify items or status."}
 
-    response = requests.put(url, json=data)
+    response = await http_transport.put(url, json=data)
     if response.status_code == 404:
         return {"error": f"Order with ID {order_id} not found"}
     if response.status_code == 400:
@@ -126,8 +168,43 @@ def update_order(order_id: str, items: list[dict] = None, status: str = None) ->
     return response.json()
 
 
+@tool(description="Change single items of an existing order: add an item, remove an item or set an item's quantity")
+@http_transport.fail_fast
+async def patch_order(order_id: str, operations: list[dict], expected_version: int) -> dict:
+    """
+    Tool description - Change single items of an existing order without re-sending all of its items.
+
+    #Args:
+        order_id: The unique identifier of the order to change.
+        operations: List of operations applied in order. Each operation is one of:
+               - {"op": "add", "product_id": ..., "name": ..., "price": ..., "quantity": ...}
+                 (adds to the quantity if the product is already in the order)
+               - {"op": "remove", "product_id": ...}
+               - {"op": "set_quantity", "product_id": ..., "quantity": ...}
+        expected_version: Version of the order the changes are based on, as returned by get_order.
+               The change is rejected if the order has been changed since.
+
+    #Returns:
+        The updated order including its new version, or an error message if the order is not found,
+        cannot be changed, or was changed since expected_version.
+    """
+    url = f"{ORDERS_BASE_URL}/api/v1/orders/{order_id}"
+
+    response = await http_transport.patch(url, json={"operations": operations},
+                                          headers={"If-Match": f'"{expected_version}"'})
+    if response.status_code == 404:
+        return {"error": f"Order with ID {order_id} not found"}
+    if response.status_code == 412:
+        return {"error": "Order was changed in the meantime. Get the order again and retry with its current version."}
+    if response.status_code == 400:
+        return {"error": response.json().get("error", "Invalid operations")}
+    response.raise_for_status()
+    return response.json()
+
+
 @tool(description="Cancel an existing order")
-def cancel_order(order_id: str) -> dict:
+@http_transport.fail_fast
+async def cancel_order(order_id: str) -> dict:
     """
     Tool description - Cancel an existing order.
 
@@ -139,10 +216,19 @@ def cancel_order(order_id: str) -> dict:
     """
     url = f"{ORDERS_BASE_URL}/api/v1/orders/{order_id}"
 
-    response = requests.delete(url)
+    response = await http_transport.delete(url)
     if response.status_code == 404:
         return {"error": f"Order with ID {order_id} not found"}
     if response.status_code == 400:
         return {"error": response.json().get("error", "Order is already cancelled")}
     response.raise_for_status()
     return response.json()
+
+
+def order_page_params(limit: int | None, cursor: str | None) -> dict:
+    # Orders are always listed in pages, by default as many as a compact list result shows, so that the service
+    # returns a next_cursor for the orders after them instead of sending all orders
+    params = {"limit": tool_output.page_limit(limit or tool_output.TOOLS_OUTPUT_MAX_ROWS)}
+    if cursor is not None:
+        params["cursor"] = cursor
+    return params
@@ -1,48 +1,216 @@
 import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 
-import requests
+import httpx
 from strands import tool
 
+import http_transport
+from tool_output import compact_products, page_limit
+
 PRODUCTS_CATALOG_BASE_URL = os.environ.get("PRODUCTS_CATALOG_BASE_URL", "http://localhost:5001")
+# Seconds a catalog response is reused before it is revalidated with the catalog service
+PRODUCTS_CATALOG_CACHE_TTL = float(os.environ.get("PRODUCTS_CATALOG_CACHE_TTL", "30"))
+# Catalog responses kept by the tools; the least recently used ones are dropped first
+PRODUCTS_CATALOG_CACHE_MAX_ENTRIES = int(os.environ.get("PRODUCTS_CATALOG_CACHE_MAX_ENTRIES", "256"))
+
+
+@dataclass
+class _CacheEntry:
+    response: httpx.Response
+    expires_at: float
+
+
+class CatalogResponseCache:
+    """Bounded TTL/LRU cache of successful catalog GET responses, keyed by URL and query parameters.
+
+    Fresh entries are served without calling the catalog service. Expired
+    entries are revalidated with If-None-Match; a 304 answer renews the entry
+    without transferring the body again.
+    """
+
+    def __init__(self, max_entries: int = PRODUCTS_CATALOG_CACHE_MAX_ENTRIES, ttl: float = PRODUCTS_CATALOG_CACHE_TTL,
+                 clock=time.monotonic):
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[tuple, _CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+    async def get(self, url: str, params: dict | None = None) -> httpx.Response:
+        key = (url, tuple(sorted((params or {}).items())))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if entry.expires_at > self._clock():
+                    self.hits += 1
+                    return entry.response
+
+        etag = entry.response.headers.get("ETag") if entry is not None else None
+        response = await http_transport.get(url, params=params, headers={"If-None-Match": etag} if etag else None)
+
+        with self._lock:
+            if response.status_code == 304 and entry is not None:
+                self.revalidations += 1
+                response = entry.response
+            else:
+                self.misses += 1
+                if response.status_code != 200:
+                    self._entries.pop(key, None)
+                    return response
+            self._entries[key] = _CacheEntry(response, self._clock() + self._ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return response
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "revalidations": self.revalidations,
+                    "entries": len(self._entries)}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_catalog_cache = CatalogResponseCache()
+
+
+def get_catalog_cache_stats() -> dict:
+    """Returns the hit, miss and revalidation counters and the size of the catalog response cache."""
+    return _catalog_cache.stats()
 
 
 @tool(description="List all products from the catalog")
-def list_products() -> dict:
+@http_transport.fail_fast
+async def list_products(limit: int = None, cursor: str = None) -> dict | str:
     """
     Tool description - List all products from the catalog
 
+    #Args:
+        limit: Optional maximum number of products to return in one page
+        cursor: Optional 'next_cursor' value from a previous page to continue listing from
+
     #Returns:
         A dictionary containing 'products' list and 'count' of products found.
+        When paginating, 'next_cursor' is set if more products are available.
+        In compact output mode, the products as CSV rows (id,name,price,category,stock) under a summary line
+        stating any value shared by all rows; a 'more available' line tells how to get the products not shown.
     """
     url = f"{PRODUCTS_CATALOG_BASE_URL}/api/v1/products"
+    params = page_params(limit, cursor)
 
-    response = requests.get(url)
+    response = await _catalog_cache.get(url, params=params)
     response.raise_for_status()
-    return response.json()
+    return compact_products(response.json())
 
 
 @tool(description="List products from the catalog filtered by category")
-def list_products_by_category(category: str) -> dict:
+@http_transport.fail_fast
+async def list_products_by_category(category: str, limit: int = None, cursor: str = None) -> dict | str:
     """
     Tool description - List products from the catalog filtered by category.
 
     #Args:
         category: category to filter products (e.g., "Mice", "Keyboards", "Monitors",
                   "Headsets", "Cameras", "Accessories", "Laptops")
+        limit: Optional maximum number of products to return in one page
+        cursor: Optional 'next_cursor' value from a previous page to continue listing from
 
     #Returns:
         A dictionary containing 'products' list and 'count' of products found.
+        When paginating, 'next_cursor' is set if more products are available.
+        In compact output mode, the products as CSV rows (id,name,price,category,stock) under a summary line
+        stating any value shared by all rows; a 'more available' line tells how to get the products not shown.
     """
     url = f"{PRODUCTS_CATALOG_BASE_URL}/api/v1/products"
-    params = {"category": category}
+    params = {"category": category, **page_params(limit, cursor)}
 
-    response = requests.get(url, params=params)
+    response = await _catalog_cache.get(url, params=params)
     response.raise_for_status()
-    return response.json()
+    return compact_products(response.json())
+
+
+@tool(description="Find products by price range and stock, sorted by price or stock")
+@http_transport.fail_fast
+async def find_products(category: str = None, min_price: float = None, max_price: float = None, sort: str = None,
+                        in_stock: bool = None, limit: int = 10, cursor: str = None) -> dict | str:
+    """
+    Tool description - Find products by price range and stock, sorted by price or stock.
+
+    #Args:
+        category: Optional category to search in (e.g., "Mice", "Keyboards", "Monitors",
+                  "Headsets", "Cameras", "Accessories", "Laptops")
+        min_price: Optional minimum price
+        max_price: Optional maximum price
+        sort: Optional sort order: "price" (cheapest first), "-price" (most expensive first),
+              "stock" or "-stock". Defaults to "price" when a price range is given.
+        in_stock: Optional, when true only products that are in stock are returned
+        limit: Maximum number of products to return
+        cursor: Optional 'next_cursor' value from a previous call with the same filters and sort to continue from
+
+    #Returns:
+        A dictionary containing 'products' list, 'count' of products returned and 'next_cursor'
+        which is set when more matching products are available.
+        In compact output mode, the products as CSV rows (id,name,price,category,stock) under a summary line
+        stating any value shared by all rows; a 'more available' line tells how to get the products not shown.
+    """
+    url = f"{PRODUCTS_CATALOG_BASE_URL}/api/v1/products"
+    params = page_params(limit, cursor)
+    if category is not None:
+        params["category"] = category
+    if min_price is not None:
+        params["min_price"] = min_price
+    if max_price is not None:
+        params["max_price"] = max_price
+    if sort is not None:
+        params["sort"] = sort
+    if in_stock:
+        params["in_stock"] = "true"
+
+    response = await _catalog_cache.get(url, params=params)
+    if response.status_code == 400:
+        return {"error": response.json().get("error", "Invalid product filters")}
+    response.raise_for_status()
+    return compact_products(response.json(), "narrow the filters or lower the limit")
+
+
+@tool(description="Search the catalog for products matching a free-text query")
+@http_transport.fail_fast
+async def search_products(query: str, limit: int = 10) -> dict | str:
+    """
+    Tool description - Search the catalog for products matching a free-text query.
+
+    #Args:
+        query: Free-text search terms matched against product names and categories
+               (e.g., "wireless mouse", "gaming laptop")
+        limit: Maximum number of best matching products to return
+
+    #Returns:
+        A dictionary containing 'products' list, ranked by relevance, and 'count' of products found.
+        In compact output mode, the products as CSV rows (id,name,price,category,stock) under a summary line
+        stating any value shared by all rows; a 'more available' line tells how to get the products not shown.
+    """
+    url = f"{PRODUCTS_CATALOG_BASE_URL}/api/v1/products/search"
+    params = {"q": query, "limit": limit}
+
+    response = await _catalog_cache.get(url, params=params)
+    if response.status_code == 400:
+        return {"error": response.json().get("error", "Invalid search query")}
+    response.raise_for_status()
+    return compact_products(response.json(), "refine the query or lower the limit")
 
 
 @tool(description="Get a single product by its ID")
-def get_product(product_id: int) -> dict:
+@http_transport.fail_fast
+async def get_product(product_id: int) -> dict:
     """
     Tool description - Get a single product by its ID.
 
@@ -55,8 +223,41 @@ def get_product(product_id: int) -> dict:
     """
     url = f"{PRODUCTS_CATALOG_BASE_URL}/api/v1/products/{product_id}"
 
-    response = requests.get(url)
+    response = await _catalog_cache.get(url)
     if response.status_code == 404:
         return {"error": f"Product with ID {product_id} not found"}
     response.raise_for_status()
     return response.json()
+
+
+@tool(description="Get several products by their IDs in a single request")
+@http_transport.fail_fast
+async def get_products(product_ids: list[int]) -> dict | str:
+    """
+    Tool description - Get several products by their IDs in a single request.
+
+    #Args:
+        product_ids: The unique identifiers of the products (at most 100).
+
+    #Returns:
+        A dictionary containing 'products' list with details of the products found,
+        'count' of products found and 'not_found' list of IDs that do not exist.
+        In compact output mode, the products as CSV rows (id,name,price,category,stock) under a summary line
+        stating any value shared by all rows; a 'more available' line tells how to get the products not shown.
+    """
+    url = f"{PRODUCTS_CATALOG_BASE_URL}/api/v1/products:batchGet"
+
+    response = await http_transport.post(url, json={"ids": product_ids})
+    if response.status_code == 400:
+        return {"error": response.json().get("error", "Invalid product IDs")}
+    response.raise_for_status()
+    return compact_products(response.json(), "get them in smaller batches")
+
+
+def page_params(limit: int | None, cursor: str | None) -> dict:
+    params = {}
+    if limit is not None:
+        params["limit"] = page_limit(limit)
+    if cursor is not None:
+        params["cursor"] = cursor
+    return params
@@ -0,0 +1,119 @@
+"""Memory and throughput benchmark of the slotted order models against plain dataclasses.
+
+Builds the same orders with both representations and measures the memory they
+take, how fast they are created, how fast total_value is read and how fast all
+orders are serialized with to_dict(), as list_orders does. Run from the service
+directory, optionally passing the number of orders:
+
+    python -m benchmarks.benchmark_order_models [1000000]
+"""
+import gc
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from orders.models import Order, OrderItem, OrderStatus
+
+ORDER_COUNT = 1_000_000
+ITEMS_PER_ORDER = 3
+
+
+@dataclass
+class DataclassOrderItem:
+    product_id: str
+    name: str
+    price: float
+    quantity: int
+
+    @property
+    def total(self) -> float:
+        return self.price * self.quantity
+
+    def to_dict(self) -> dict:
+        return {
+            "product_id": self.product_id,
+            "name": self.name,
+            "price": self.price,
+            "quantity": self.quantity,
+            "total": self.total,
+        }
+
+
+@dataclass
+class DataclassOrder:
+    """The order model before items and their total were kept together."""
+
+    id: str
+    items: list[DataclassOrderItem]
+    status: OrderStatus
+    created_at: datetime
+    updated_at: datetime
+
+    @property
+    def total_value(self) -> float:
+        return sum(item.total for item in self.items)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "items": [item.to_dict() for item in self.items],
+            "total_value": self.total_value,
+            "status": self.status.value,
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat(),
+        }
+
+
+def build_orders(order_type, item_type, count: int) -> list:
+    start = datetime(2025, 1, 1)
+    # Strings are shared between both runs, so only the model objects themselves are measured
+    product_ids = [f"prod-{number}" for number in range(100)]
+    names = [f"Product {number}" for number in range(100)]
+    orders = []
+    for number in range(count):
+        created_at = start + timedelta(seconds=number)
+        items = [item_type(product_ids[(number + offset) % 100], names[(number + offset) % 100],
+                           9.99 + offset, offset + 1) for offset in range(ITEMS_PER_ORDER)]
+        orders.append(order_type(str(number), items, OrderStatus.CONFIRMED, created_at, created_at))
+    return orders
+
+
+def measure(label: str, order_type, item_type, count: int) -> None:
+    gc.collect()
+    started = time.perf_counter()
+    orders = build_orders(order_type, item_type, count)
+    build_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    revenue = sum(order.total_value for order in orders)
+    total_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for order in orders:
+        order.to_dict()
+    to_dict_seconds = time.perf_counter() - started
+    del orders
+
+    gc.collect()
+    tracemalloc.start()
+    orders = build_orders(order_type, item_type, count)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del orders
+
+    print(f"{label:<10} {memory / 2 ** 20:>7.0f} MiB {memory / count:>6.0f} B/order "
+          f"{count / build_seconds:>11,.0f} builds/s {count / total_seconds:>13,.0f} totals/s "
+          f"{count / to_dict_seconds:>11,.0f} to_dict/s  revenue {revenue:,.2f}")
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else ORDER_COUNT
+    print(f"{count:,} orders with {ITEMS_PER_ORDER} items each")
+    measure("dataclass", DataclassOrder, DataclassOrderItem, count)
+    measure("slots", Order, OrderItem, count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Concurrency stress benchmark of the sharded orders repository.
+
+Worker threads run a mix of order creations, reads and atomic read-modify-write
+updates against a store with a single lock (one shard) and against the lock-striped
+store. Run from the service directory:
+
+    python -m benchmarks.benchmark_orders_concurrency
+
+On a standard CPython build the GIL serializes the Python work itself, so throughput
+stays flat for both stores no matter how many threads run. Only a free-threaded
+build (python3.13t and later) can show the striped store scaling with threads while
+the single-lock store does not.
+"""
+import random
+import sys
+import sysconfig
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from orders.models import Order, OrderItem, OrderStatus
+from orders.repository import ShardedOrderStore
+
+THREAD_COUNTS = [1, 2, 4, 8]
+SHARD_COUNTS = [1, 16]
+OPERATIONS_PER_THREAD = 20_000
+PRELOADED_ORDERS = 10_000
+
+
+def new_order() -> Order:
+    now = datetime.utcnow()
+    return Order(id=str(uuid.uuid4()), items=[OrderItem("prod-1", "Widget", 9.99, 1)],
+                 status=OrderStatus.CONFIRMED, created_at=now, updated_at=now)
+
+
+def bump_quantity(order: Order) -> None:
+    item = order.items[0]
+    order.items = [OrderItem(item.product_id, item.name, item.price, item.quantity + 1)]
+
+
+def worker(store: ShardedOrderStore, order_ids: list[str], seed: int, barrier: threading.Barrier) -> None:
+    rng = random.Random(seed)
+    barrier.wait()
+    for _ in range(OPERATIONS_PER_THREAD):
+        operation = rng.random()
+        if operation < 0.2:
+            store.add(new_order())
+        elif operation < 0.8:
+            store.get(rng.choice(order_ids))
+        else:
+            store.modify(rng.choice(order_ids), bump_quantity)
+
+
+def run(shard_count: int, thread_count: int) -> float:
+    store = ShardedOrderStore(shard_count)
+    order_ids = []
+    for _ in range(PRELOADED_ORDERS):
+        order = new_order()
+        store.add(order)
+        order_ids.append(order.id)
+
+    barrier = threading.Barrier(thread_count + 1)
+    threads = [threading.Thread(target=worker, args=(store, order_ids, seed, barrier)) for seed in range(thread_count)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return thread_count * OPERATIONS_PER_THREAD / (time.perf_counter() - started)
+
+
+def main():
+    gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+    free_threaded = bool(sysconfig.get_config_var("Py_GIL_DISABLED"))
+    print(f"Python {sys.version.split()[0]}, free-threaded build: {free_threaded}, GIL enabled: {gil_enabled}")
+    print(f"{'threads':>7} | " + " | ".join(f"{f'{count} shard(s) ops/s':>20}" for count in SHARD_COUNTS))
+    for thread_count in THREAD_COUNTS:
+        results = [run(shard_count, thread_count) for shard_count in SHARD_COUNTS]
+        print(f"{thread_count:>7} | " + " | ".join(f"{result:>20,.0f}" for result in results))
+
+
+if __name__ == "__main__":
+    main()
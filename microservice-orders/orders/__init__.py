@@ -1,10 +1,15 @@
-from flask import Flask
+from flask import Flask, jsonify
 
+from orders.batch_orders import register as register_batch_orders
 from orders.cancel_order import register as register_cancel_order
 from orders.create_order import register as register_create_order
 from orders.get_order import register as register_get_order
 from orders.health_check import register as register_health_check
 from orders.list_orders import register as register_list_orders
+from orders.order_events import register as register_order_events
+from orders.order_stats import register as register_order_stats
+from orders.patch_order import register as register_patch_order
+from orders.persistence import JournalWriteError
 from orders.update_order import register as register_update_order
 
 
@@ -15,5 +20,11 @@ def create_app() -> Flask:
     register_list_orders(app)
     register_get_order(app)
     register_update_order(app)
+    register_patch_order(app)
     register_cancel_order(app)
+    register_batch_orders(app)
+    register_order_stats(app)
+    register_order_events(app)
+    # The change is not known to be durable, so the client must not treat it as done
+    app.register_error_handler(JournalWriteError, lambda e: (jsonify({"error": str(e)}), 503))
     return app
@@ -0,0 +1,64 @@
+from flask import Flask, jsonify, request
+
+from orders.cancel_order import cancel
+from orders.models import OrderItem
+from orders.repository import InvalidOrderUpdate, create_orders, modify_orders, parse_order_items
+
+MAX_BATCH_SIZE = 100
+
+
+def register(app: Flask) -> None:
+    @app.route("/api/v1/orders:batch", methods=["POST"])
+    def batch_create_orders():
+        data = request.get_json(silent=True)
+
+        if not data or not isinstance(data.get("orders"), list) or not data["orders"]:
+            return jsonify({"error": "Request must contain a non-empty 'orders' list"}), 400
+        if len(data["orders"]) > MAX_BATCH_SIZE:
+            return jsonify({"error": f"At most {MAX_BATCH_SIZE} orders can be created at once"}), 400
+
+        # Validate every entry first, then create all valid orders in one repository call
+        results: list[dict] = []
+        valid_items: list[list[OrderItem]] = []
+        valid_positions: list[int] = []
+        for order_data in data["orders"]:
+            if not isinstance(order_data, dict) or not order_data.get("items"):
+                results.append({"status": 400, "error": "Order must contain at least one item"})
+                continue
+            try:
+                items = parse_order_items(order_data["items"])
+            except (KeyError, TypeError, ValueError) as e:
+                results.append({"status": 400, "error": f"Invalid item data: {str(e)}"})
+                continue
+            valid_positions.append(len(results))
+            valid_items.append(items)
+            results.append({})
+
+        for position, order in zip(valid_positions, create_orders(valid_items)):
+            results[position] = {"status": 201, "order": order.to_dict()}
+
+        return jsonify({"results": results, "created": len(valid_positions)})
+
+    @app.route("/api/v1/orders:batchCancel", methods=["POST"])
+    def batch_cancel_orders():
+        data = request.get_json(silent=True)
+
+        if not data or not isinstance(data.get("ids"), list) or not data["ids"]:
+            return jsonify({"error": "Request must contain a non-empty 'ids' list"}), 400
+        order_ids = data["ids"]
+        if len(order_ids) > MAX_BATCH_SIZE:
+            return jsonify({"error": f"At most {MAX_BATCH_SIZE} orders can be cancelled at once"}), 400
+        if not all(isinstance(order_id, str) for order_id in order_ids):
+            return jsonify({"error": "Order ids must be strings"}), 400
+
+        results = []
+        for order in modify_orders(order_ids, cancel):
+            if order is None:
+                results.append({"status": 404, "error": "Order not found"})
+            elif isinstance(order, InvalidOrderUpdate):
+                results.append({"status": 400, "error": str(order)})
+            else:
+                results.append({"status": 200, "order": order.to_dict()})
+
+        cancelled = sum(1 for result in results if result["status"] == 200)
+        return jsonify({"results": results, "cancelled": cancelled})
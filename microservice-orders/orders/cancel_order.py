@@ -1,20 +1,24 @@
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify
 
-from orders.models import OrderStatus
-from orders.repository import get_order, update_order
+from orders.models import Order, OrderStatus
+from orders.repository import InvalidOrderUpdate, modify_order
+
+
+def cancel(order: Order) -> None:
+    if order.status == OrderStatus.CANCELLED:
+        raise InvalidOrderUpdate("Order is already cancelled")
+    order.status = OrderStatus.CANCELLED
 
 
 def register(app: Flask) -> None:
     @app.route("/api/v1/orders/<order_id>", methods=["DELETE"])
     def cancel_order(order_id: str):
-        order = get_order(order_id)
+        try:
+            order = modify_order(order_id, cancel)
+        except InvalidOrderUpdate as e:
+            return jsonify({"error": str(e)}), 400
 
         if not order:
             return jsonify({"error": "Order not found"}), 404
 
-        if order.status == OrderStatus.CANCELLED:
-            return jsonify({"error": "Order is already cancelled"}), 400
-
-        order.status = OrderStatus.CANCELLED
-        update_order(order)
-        return jsonify(order.to_dict())
+        return Response(order.to_json(), mimetype="application/json")
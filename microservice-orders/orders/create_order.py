@@ -1,20 +1,87 @@
-from flask import Flask, jsonify, request
+import os
 
-from orders.repository import create_order, parse_order_items
+from flask import Flask, Response, jsonify, make_response, request
+
+from orders.idempotency import (IdempotencyKeyConflict, IdempotencyKeyInProgress, IdempotencyStore,
+                                StoredResponse, fingerprint)
+from orders.repository import (create_order, create_order_once, find_idempotent_order, parse_order_items,
+                               shares_idempotency_keys)
+
+# Seconds for which a repeated Idempotency-Key returns the order created by its first request
+ORDERS_IDEMPOTENCY_TTL = float(os.environ.get("ORDERS_IDEMPOTENCY_TTL", "86400"))
+# Number of idempotency keys remembered in memory; the least recently used keys are forgotten first. Keys kept in
+# the ORDERS_DATABASE are only forgotten once they expire.
+ORDERS_IDEMPOTENCY_MAX_KEYS = int(os.environ.get("ORDERS_IDEMPOTENCY_MAX_KEYS", "10000"))
+
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+
+_idempotency_keys = IdempotencyStore(ORDERS_IDEMPOTENCY_MAX_KEYS, ORDERS_IDEMPOTENCY_TTL)
 
 
 def register(app: Flask) -> None:
     @app.route("/api/v1/orders", methods=["POST"])
     def create_order_route():
-        data = request.get_json()
+        idempotency_key = request.headers.get("Idempotency-Key")
+        if idempotency_key is None:
+            return create()
 
-        if not data or "items" not in data or not data["items"]:
-            return jsonify({"error": "Order must contain at least one item"}), 400
+        if not 0 < len(idempotency_key) <= MAX_IDEMPOTENCY_KEY_LENGTH:
+            return jsonify({"error": f"Idempotency-Key must be 1 to {MAX_IDEMPOTENCY_KEY_LENGTH} characters"}), 400
+        if shares_idempotency_keys():
+            return create_with_shared_key(idempotency_key)
 
         try:
-            items = parse_order_items(data["items"])
-        except (KeyError, ValueError) as e:
-            return jsonify({"error": f"Invalid item data: {str(e)}"}), 400
+            stored = _idempotency_keys.begin(idempotency_key, request.get_data())
+        except IdempotencyKeyConflict as e:
+            return jsonify({"error": str(e)}), 409 if isinstance(e, IdempotencyKeyInProgress) else 422
+
+        if stored is not None:
+            return replayed(stored.body, stored.status)
+
+        response = None
+        try:
+            response = make_response(create())
+        finally:
+            # Only created orders are replayed; a failed request leaves the key free for a corrected retry
+            created = response is not None and response.status_code == 201
+            _idempotency_keys.finish(idempotency_key,
+                                     StoredResponse(response.status_code, response.get_data()) if created else None)
+        return response
+
+
+def create_with_shared_key(idempotency_key: str):
+    # With a shared database the key is recorded in the transaction that inserts the order, so a retry reaching
+    # another worker process is replayed as well, and concurrent requests with the key create one order
+    body_fingerprint = fingerprint(request.get_data())
+    try:
+        stored = find_idempotent_order(idempotency_key, body_fingerprint)
+        if stored is not None:
+            return replayed(stored)
+        return create(idempotency_key, body_fingerprint)
+    except IdempotencyKeyConflict as e:
+        return jsonify({"error": str(e)}), 422
+
+
+def create(idempotency_key: str | None = None, body_fingerprint: bytes = b""):
+    data = request.get_json()
+
+    if not data or "items" not in data or not data["items"]:
+        return jsonify({"error": "Order must contain at least one item"}), 400
+
+    try:
+        items = parse_order_items(data["items"])
+    except (KeyError, ValueError) as e:
+        return jsonify({"error": f"Invalid item data: {str(e)}"}), 400
+
+    if idempotency_key is not None:
+        body, created = create_order_once(items, idempotency_key, body_fingerprint, ORDERS_IDEMPOTENCY_TTL)
+        return Response(body, status=201, mimetype="application/json") if created else replayed(body)
+
+    order = create_order(items)
+    return Response(order.to_json(), status=201, mimetype="application/json")
+
 
-        order = create_order(items)
-        return jsonify(order.to_dict()), 201
+def replayed(body: bytes, status: int = 201) -> Response:
+    response = Response(body, status=status, mimetype="application/json")
+    response.headers["Idempotent-Replayed"] = "true"
+    return response
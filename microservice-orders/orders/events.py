@@ -0,0 +1,79 @@
+import json
+import secrets
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from itertools import islice
+
+from orders.models import Order
+
+
+class EventsExpired(Exception):
+    """Raised when events after the requested sequence number have already left the buffer."""
+
+
+@dataclass(frozen=True, slots=True)
+class OrderEvent:
+    seq: int
+    type: str
+    # The whole event ({"seq", "cursor", "type", "order"}) encoded as JSON
+    data: bytes
+
+
+class OrderEventLog:
+    """Ring buffer of the latest order change events, numbered with increasing sequence numbers.
+
+    Consumers pass the sequence number of the last event they have seen and get
+    only the events after it, waiting for new ones if there are none yet. Each
+    event embeds the order's cached JSON encoding, so publishing costs no extra
+    serialization.
+
+    Sequence numbers start at 1 in every process, so consumers are given
+    cursors that also name the stream: a random id of this log.
+    """
+
+    def __init__(self, capacity: int = 10_000):
+        self.stream_id = secrets.token_hex(4)
+        self._events: deque[OrderEvent] = deque(maxlen=capacity)
+        self._last_seq = 0
+        self._changed = threading.Condition()
+
+    @property
+    def last_seq(self) -> int:
+        return self._last_seq
+
+    def cursor(self, seq: int) -> str:
+        return f"{self.stream_id}:{seq}"
+
+    def publish(self, event_type: str, order: Order) -> int:
+        with self._changed:
+            self._last_seq += 1
+            data = b"".join((
+                f'{{"seq":{self._last_seq},"cursor":"{self.cursor(self._last_seq)}","type":{json.dumps(event_type)},'
+                f'"order":'.encode(),
+                order.to_json(),
+                b"}",
+            ))
+            self._events.append(OrderEvent(self._last_seq, event_type, data))
+            self._changed.notify_all()
+            return self._last_seq
+
+    def read(self, since: int, limit: int, timeout: float = 0.0) -> list[OrderEvent]:
+        """Returns up to limit events published after since, waiting up to timeout seconds for the first one."""
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            if since > self._last_seq:
+                # The sequence numbers restarted, e.g. the service was restarted since the consumer's last read
+                raise EventsExpired(f"Event {since} is unknown, the latest event is {self._last_seq}")
+            while self._last_seq <= since:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return []
+                self._changed.wait(remaining)
+
+            first_seq = self._events[0].seq if self._events else self._last_seq + 1
+            if since < first_seq - 1:
+                raise EventsExpired(f"Events after {since} are no longer available, the oldest event is {first_seq}")
+            start = since - first_seq + 1
+            return list(islice(self._events, start, start + limit))
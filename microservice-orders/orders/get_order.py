@@ -1,4 +1,4 @@
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify
 
 from orders.repository import get_order
 
@@ -11,4 +11,6 @@ def register(app: Flask) -> None:
         if not order:
             return jsonify({"error": "Order not found"}), 404
 
-        return jsonify(order.to_dict())
+        response = Response(order.to_json(), mimetype="application/json")
+        response.set_etag(str(order.version))
+        return response
@@ -0,0 +1,92 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+
+
+class IdempotencyKeyConflict(Exception):
+    """Raised when an idempotency key cannot be used for the request."""
+
+
+class IdempotencyKeyInProgress(IdempotencyKeyConflict):
+    """Raised when the first request with the key has not finished yet."""
+
+
+class IdempotencyKeyReused(IdempotencyKeyConflict):
+    """Raised when the key was first used with a different request body."""
+
+
+@dataclass
+class StoredResponse:
+    status: int
+    body: bytes
+
+
+@dataclass
+class _Entry:
+    fingerprint: bytes
+    expires_at: float
+    # None while the first request with the key is still being handled
+    response: StoredResponse | None = None
+
+
+def fingerprint(body: bytes) -> bytes:
+    """Returns the hash by which requests made with the same idempotency key are matched."""
+    return hashlib.sha256(body).digest()
+
+
+class IdempotencyStore:
+    """Bounded LRU map of idempotency key to the response of the first request made with it.
+
+    Keys expire ttl seconds after they were first used; once more than max_keys
+    keys are held, the least recently used ones are dropped. Requests are
+    matched by a hash of their raw body, so a replay is answered without
+    parsing it.
+    """
+
+    def __init__(self, max_keys: int = 10_000, ttl: float = 86_400.0, clock: Callable[[], float] = time.monotonic):
+        self._max_keys = max_keys
+        self._ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def begin(self, key: str, body: bytes) -> StoredResponse | None:
+        """Returns the stored response for the key, or None after reserving the key for this request.
+
+        A reserved key must be released with finish().
+        """
+        body_fingerprint = fingerprint(body)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > now:
+                if entry.fingerprint != body_fingerprint:
+                    raise IdempotencyKeyReused("Idempotency-Key was already used with a different request")
+                if entry.response is None:
+                    raise IdempotencyKeyInProgress("A request with this Idempotency-Key is still in progress")
+                self._entries.move_to_end(key)
+                return entry.response
+
+            self._entries[key] = _Entry(body_fingerprint, now + self._ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_keys:
+                self._entries.popitem(last=False)
+            return None
+
+    def finish(self, key: str, response: StoredResponse | None) -> None:
+        """Stores the response of a reserved key, or releases the key for a new attempt if response is None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            if response is None:
+                del self._entries[key]
+            else:
+                entry.response = response
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -1,7 +1,13 @@
-from flask import Flask, jsonify, request
+import json
+from datetime import datetime, timezone
+
+from flask import Flask, Response, jsonify, request
 
 from orders.models import OrderStatus
-from orders.repository import get_all_orders
+from orders.pagination import decode_cursor, encode_cursor
+from orders.repository import get_orders_page
+
+MAX_PAGE_SIZE = 1000
 
 
 def register(app: Flask) -> None:
@@ -9,13 +15,63 @@ def register(app: Flask) -> None:
     def list_orders():
         status_filter = request.args.get("status")
 
-        if status_filter:
-            try:
-                status = OrderStatus(status_filter)
-                orders = get_all_orders(status)
-            except ValueError:
-                return jsonify({"error": f"Invalid status: {status_filter}"}), 400
-        else:
-            orders = get_all_orders()
+        try:
+            status = OrderStatus(status_filter) if status_filter else None
+        except ValueError:
+            return jsonify({"error": f"Invalid status: {status_filter}"}), 400
+
+        try:
+            limit = parse_limit(request.args.get("limit"))
+            after = parse_cursor(request.args.get("cursor"))
+            created_after = parse_timestamp("created_after", request.args.get("created_after"))
+            created_before = parse_timestamp("created_before", request.args.get("created_before"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        orders, has_more = get_orders_page(status, created_after, created_before, after, limit)
+
+        fields = {"count": len(orders)}
+        if limit is not None or after is not None:
+            fields["next_cursor"] = encode_cursor(orders[-1].created_at, orders[-1].id) if has_more else None
+        # Orders are embedded as their cached JSON encodings, without converting them to dicts
+        body = b"".join((
+            b'{"orders":[',
+            b",".join(order.to_json() for order in orders),
+            b"],",
+            json.dumps(fields)[1:].encode(),
+        ))
+        return Response(body, mimetype="application/json")
+
+
+def parse_limit(value: str | None) -> int | None:
+    if value is None:
+        return None
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError(f"Invalid limit: {value}") from None
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"Limit must be between 1 and {MAX_PAGE_SIZE}")
+    return limit
+
+
+def parse_cursor(value: str | None) -> tuple[datetime, str] | None:
+    if value is None:
+        return None
+    created_at, order_id = decode_cursor(value)
+    if created_at.tzinfo is not None:
+        raise ValueError(f"Invalid cursor: {value}")
+    return created_at, order_id
+
 
-        return jsonify({"orders": [order.to_dict() for order in orders], "count": len(orders)})
+def parse_timestamp(name: str, value: str | None) -> datetime | None:
+    """Parses an ISO 8601 timestamp into naive UTC, the form in which orders store their timestamps."""
+    if value is None:
+        return None
+    try:
+        timestamp = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid {name}: {value}") from None
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
@@ -1,4 +1,6 @@
-from dataclasses import dataclass
+import json
+from collections.abc import Iterable
+from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 
@@ -8,7 +10,7 @@ class OrderStatus(str, Enum):
     CANCELLED = "cancelled"
 
 
-@dataclass
+@dataclass(slots=True)
 class OrderItem:
     product_id: str
     name: str
@@ -28,18 +30,42 @@ class OrderItem:
             "total": self.total,
         }
 
+    @classmethod
+    def from_dict(cls, data: dict) -> "OrderItem":
+        return cls(
+            product_id=data["product_id"],
+            name=data["name"],
+            price=data["price"],
+            quantity=data["quantity"],
+        )
 
-@dataclass
+
+@dataclass(slots=True)
 class Order:
+    """An order; items are stored as an immutable tuple and their total value is kept with them.
+
+    Assigning items (any iterable of OrderItem) recomputes total_value, so
+    reading the total never re-sums the items. The JSON encoding of the order
+    is cached on first use and dropped whenever any attribute is assigned.
+    version is increased by the repository on every stored change.
+    """
+
     id: str
-    items: list[OrderItem]
+    items: tuple[OrderItem, ...]
     status: OrderStatus
     created_at: datetime
     updated_at: datetime
+    version: int = 1
+    total_value: float = field(init=False, repr=False, compare=False)
+    _json: bytes | None = field(default=None, init=False, repr=False, compare=False)
 
-    @property
-    def total_value(self) -> float:
-        return sum(item.total for item in self.items)
+    def __setattr__(self, name: str, value) -> None:
+        if name == "items":
+            value = tuple(value)
+            object.__setattr__(self, "total_value", _items_total(value))
+        object.__setattr__(self, name, value)
+        if name != "_json":
+            object.__setattr__(self, "_json", None)
 
     def to_dict(self) -> dict:
         return {
@@ -49,4 +75,34 @@ class Order:
             "status": self.status.value,
             "created_at": self.created_at.isoformat(),
             "updated_at": self.updated_at.isoformat(),
+            "version": self.version,
         }
+
+    def to_json(self) -> bytes:
+        """Returns to_dict() encoded as compact JSON, encoding it only once until the order changes."""
+        if self._json is None:
+            self._json = json.dumps(self.to_dict(), separators=(",", ":")).encode()
+        return self._json
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Order":
+        return cls(
+            id=data["id"],
+            items=[OrderItem.from_dict(item) for item in data["items"]],
+            status=OrderStatus(data["status"]),
+            created_at=datetime.fromisoformat(data["created_at"]),
+            updated_at=datetime.fromisoformat(data["updated_at"]),
+            version=data.get("version", 1),
+        )
+
+
+def _items_total(items: Iterable[OrderItem]) -> float:
+    return sum(item.price * item.quantity for item in items)
+
+
+class InvalidOrderUpdate(Exception):
+    """Raised by an order change to reject it; the stored order is left untouched."""
+
+
+class OrderVersionMismatch(InvalidOrderUpdate):
+    """Raised by an order change made against a version of the order that is no longer current."""
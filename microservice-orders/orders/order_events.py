@@ -0,0 +1,106 @@
+from collections.abc import Iterator
+
+from flask import Flask, Response, jsonify, request, stream_with_context
+
+from orders.events import EventsExpired
+from orders.repository import (get_last_order_event_seq, get_order_event_cursor, get_order_event_stream_id,
+                               get_order_events)
+
+MAX_EVENTS = 1000
+DEFAULT_EVENTS = 100
+MAX_WAIT_SECONDS = 60.0
+# Seconds between keep-alive comments on an idle event stream
+HEARTBEAT_SECONDS = 15.0
+
+
+def register(app: Flask) -> None:
+    @app.route("/api/v1/orders/events", methods=["GET"])
+    def list_order_events():
+        # Long-poll: returns the events after since, waiting up to wait seconds for the first new one
+        try:
+            since = parse_since(request.args.get("since"))
+            limit = parse_number("limit", request.args.get("limit"), DEFAULT_EVENTS, 1, MAX_EVENTS)
+            wait = parse_number("wait", request.args.get("wait"), 0.0, 0.0, MAX_WAIT_SECONDS, float)
+            events = get_order_events(since, limit, wait)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        except EventsExpired as e:
+            return jsonify({"error": f"{e}; list the orders again and follow the events from 'since' "
+                                     f"{get_order_event_cursor(get_last_order_event_seq())}"}), 410
+
+        next_since = events[-1].seq if events else since
+        body = b"".join((
+            b'{"events":[',
+            b",".join(event.data for event in events),
+            f'],"count":{len(events)},"next_since":"{get_order_event_cursor(next_since)}"}}'.encode(),
+        ))
+        return Response(body, mimetype="application/json")
+
+    @app.route("/api/v1/orders/events/stream", methods=["GET"])
+    def stream_order_events():
+        # Server-sent events: streams the events after Last-Event-ID or since, then new events as they happen
+        try:
+            # A reconnecting EventSource sends the original URL again, so Last-Event-ID must win over since
+            since = parse_since(request.headers.get("Last-Event-ID") or request.args.get("since"))
+            # Fails fast with 410 if the consumer cannot resume from since anymore
+            get_order_events(since, 1)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        except EventsExpired as e:
+            return jsonify({"error": str(e)}), 410
+
+        def stream() -> Iterator[bytes]:
+            position = since
+            yield b"retry: 1000\n\n"
+            while True:
+                try:
+                    events = get_order_events(position, MAX_EVENTS, HEARTBEAT_SECONDS)
+                except EventsExpired:
+                    # The consumer fell too far behind; it reconnects and resynchronizes
+                    return
+                if not events:
+                    yield b": keep-alive\n\n"
+                    continue
+                for event in events:
+                    yield b"id: %s\nevent: %s\ndata: %s\n\n" % (
+                        get_order_event_cursor(event.seq).encode(), event.type.encode(), event.data
+                    )
+                position = events[-1].seq
+
+        return Response(stream_with_context(stream()), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def parse_since(value: str | None) -> int:
+    """Returns the sequence number to read events after from an event cursor ("<stream id>:<seq>").
+
+    Without a cursor only events from now on are read, and "0" reads from the
+    oldest event held. A cursor of another event stream, issued before a
+    restart or by another worker process, raises EventsExpired.
+    """
+    if value is None:
+        return get_last_order_event_seq()
+    if value == "0":
+        return 0
+    stream_id, separator, seq = value.partition(":")
+    try:
+        since = int(seq) if separator else -1
+    except ValueError:
+        raise ValueError(f"Invalid since: {value}") from None
+    if since < 0:
+        raise ValueError(f"Invalid since: {value}")
+    if stream_id != get_order_event_stream_id():
+        raise EventsExpired(f"Cursor {value} belongs to the event stream of another process")
+    return since
+
+
+def parse_number(name: str, value: str | None, default, minimum, maximum, number_type=int):
+    if value is None:
+        return default
+    try:
+        number = number_type(value)
+    except ValueError:
+        raise ValueError(f"Invalid {name}: {value}") from None
+    if not minimum <= number <= maximum:
+        raise ValueError(f"{name.capitalize()} must be between {minimum} and {maximum}")
+    return number
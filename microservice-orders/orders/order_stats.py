@@ -0,0 +1,14 @@
+from flask import Flask, jsonify, request
+
+from orders.repository import get_order_stats
+from orders.stats import BUCKETS
+
+
+def register(app: Flask) -> None:
+    @app.route("/api/v1/orders/stats", methods=["GET"])
+    def order_stats():
+        bucket = request.args.get("bucket", "day")
+        if bucket not in BUCKETS:
+            return jsonify({"error": f"Invalid bucket: {bucket}. Allowed buckets: {', '.join(BUCKETS)}"}), 400
+
+        return jsonify(get_order_stats().to_dict(bucket))
@@ -0,0 +1,18 @@
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(created_at: datetime, order_id: str) -> str:
+    """Encodes the (created_at, id) key of the last returned order into an opaque cursor."""
+    raw = json.dumps([created_at.isoformat(), order_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, order_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), str(order_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
@@ -0,0 +1,109 @@
+from flask import Flask, Response, jsonify, request
+
+from orders.models import Order, OrderItem, OrderStatus, OrderVersionMismatch
+from orders.repository import InvalidOrderUpdate, modify_order
+
+PATCH_OPERATIONS = ("add", "remove", "set_quantity")
+
+
+def register(app: Flask) -> None:
+    @app.route("/api/v1/orders/<order_id>", methods=["PATCH"])
+    def patch_order_route(order_id: str):
+        data = request.get_json(silent=True)
+
+        if not data or not isinstance(data.get("operations"), list) or not data["operations"]:
+            return jsonify({"error": "Request must contain a non-empty 'operations' list"}), 400
+
+        try:
+            operations = parse_patch_operations(data["operations"])
+        except (KeyError, TypeError, ValueError) as e:
+            return jsonify({"error": f"Invalid operation: {str(e)}"}), 400
+
+        if not request.if_match:
+            return jsonify({"error": "If-Match header with the version of the order the changes are based on "
+                                     "is required"}), 428
+
+        def patch(current: Order) -> None:
+            # Checked under the repository's critical section, so no other change can slip in between
+            if not request.if_match.contains(str(current.version)):
+                raise OrderVersionMismatch(f"Order is at version {current.version}")
+            if current.status == OrderStatus.CANCELLED:
+                raise InvalidOrderUpdate("Cannot update a cancelled order")
+            current.items = apply_patch_operations(current.items, operations)
+
+        try:
+            order = modify_order(order_id, patch)
+        except OrderVersionMismatch as e:
+            return jsonify({"error": str(e)}), 412
+        except InvalidOrderUpdate as e:
+            return jsonify({"error": str(e)}), 400
+
+        if not order:
+            return jsonify({"error": "Order not found"}), 404
+
+        response = Response(order.to_json(), mimetype="application/json")
+        response.set_etag(str(order.version))
+        return response
+
+
+def parse_patch_operations(operations_data: list[dict]) -> list[tuple[str, str, OrderItem | int | None]]:
+    """Validates operations into (op, product id, argument) tuples before any of them is applied.
+
+    The argument is the item to add for "add", the new quantity for "set_quantity" and None for "remove".
+    """
+    operations = []
+    for operation in operations_data:
+        op = operation["op"]
+        product_id = str(operation["product_id"])
+        if op == "add":
+            argument = OrderItem(
+                product_id=product_id,
+                name=str(operation["name"]),
+                price=float(operation["price"]),
+                quantity=_positive_quantity(operation["quantity"]),
+            )
+        elif op == "set_quantity":
+            argument = _positive_quantity(operation["quantity"])
+        elif op == "remove":
+            argument = None
+        else:
+            raise ValueError(f"unknown op {op!r}, allowed ops: {', '.join(PATCH_OPERATIONS)}")
+        operations.append((op, product_id, argument))
+    return operations
+
+
+def apply_patch_operations(items: tuple[OrderItem, ...],
+                           operations: list[tuple[str, str, OrderItem | int | None]]) -> list[OrderItem]:
+    """Returns the items with the operations applied in order.
+
+    Adding a product that is already ordered adds to the quantity of its item;
+    the other operations apply to the item of the product, which must exist.
+    """
+    items = list(items)
+    for op, product_id, argument in operations:
+        position = next((position for position, item in enumerate(items) if item.product_id == product_id), None)
+        if op == "add":
+            if position is None:
+                items.append(argument)
+            else:
+                current = items[position]
+                items[position] = OrderItem(current.product_id, current.name, current.price,
+                                            current.quantity + argument.quantity)
+        elif position is None:
+            raise InvalidOrderUpdate(f"Order has no item with product_id {product_id}")
+        elif op == "remove":
+            items = [item for item in items if item.product_id != product_id]
+        else:
+            current = items[position]
+            items[position] = OrderItem(current.product_id, current.name, current.price, argument)
+
+    if not items:
+        raise InvalidOrderUpdate("Order must contain at least one item")
+    return items
+
+
+def _positive_quantity(value) -> int:
+    quantity = int(value)
+    if quantity < 1:
+        raise ValueError(f"quantity must be at least 1, got {quantity}")
+    return quantity
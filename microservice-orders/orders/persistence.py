@@ -0,0 +1,334 @@
+"""Append-only write-ahead log and snapshots persisting the in-memory order store.
+
+Every order change is appended to the current log segment as one NDJSON event
+holding the full order. A background thread writes the appended events and
+fsyncs them once per interval (group commit); writers wait for the fsync of the
+batch holding their event, so an acknowledged change is durable while the cost
+of each fsync is shared by all changes made in the same interval. If a group
+commit fails, its events and all events appended after them are dropped and
+their writers fail; the journal rejects new events until the store has been
+restored to the durable state, so a failed change is never written later.
+
+After a configured number of events the store state is written to a snapshot
+and a new log segment is started; segments and snapshots made obsolete by the
+snapshot are deleted. Recovery loads the latest snapshot and replays the events
+of later segments, ignoring an event cut short by a crash.
+
+The data directory belongs to one process, which holds an exclusive lock on
+it while the journal is open. Files in the data directory:
+
+    lock                    locked by the process owning the directory
+    snapshot-<seq>.ndjson   {"seq": <seq>} line, then one order per line
+    log-<first seq>.ndjson  {"seq": ..., "event": ..., "order": ...} lines
+"""
+import fcntl
+import json
+import logging
+import os
+import threading
+from collections.abc import Callable, Iterable
+from pathlib import Path
+
+from orders.models import Order
+
+logger = logging.getLogger(__name__)
+
+_SNAPSHOT_PREFIX = "snapshot-"
+_LOG_PREFIX = "log-"
+_SUFFIX = ".ndjson"
+_LOCK_FILE = "lock"
+
+
+class JournalWriteError(Exception):
+    """Raised to writers whose events could not be made durable; their changes were not made."""
+
+
+class JournalInUseError(Exception):
+    """Raised when the data directory is already used by the journal of another process."""
+
+
+class OrderJournal:
+    """Write-ahead log of order events with group commit and periodic compacted snapshots."""
+
+    def __init__(self, directory: str | Path, fsync_interval: float = 0.01, snapshot_every: int = 10_000):
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._lock_file = self._lock_directory()
+        self._fsync_interval = fsync_interval
+        self._snapshot_every = snapshot_every
+
+        # Guards the pending events and sequence numbers; _io_lock guards the segment file and is taken first
+        self._lock = threading.Lock()
+        self._durable = threading.Condition(self._lock)
+        self._io_lock = threading.Lock()
+        self._pending: list[str] = []
+        self._last_seq = 0
+        self._durable_seq = 0
+        # The error of a failed group commit, until the store has been restored to the durable state
+        self._failure: OSError | None = None
+        # (first, last) sequence numbers of the events dropped by failed group commits
+        self._lost: list[tuple[int, int]] = []
+        self._commits_failing = False
+        self._events_since_snapshot = 0
+        self._segment = None
+        self._capture_state: Callable[[], tuple[int, list[Order]]] | None = None
+        self._restore_state: Callable[[list[Order]], None] | None = None
+        self._snapshot_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._flusher: threading.Thread | None = None
+
+    def _lock_directory(self):
+        # Two processes appending to the same segment and deleting each other's snapshots would lose orders
+        lock_file = open(self._directory / _LOCK_FILE, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            raise JournalInUseError(
+                f"{self._directory} is used by another process; run a single worker with ORDERS_DATA_DIR, "
+                f"or share orders between workers with ORDERS_DATABASE"
+            ) from None
+        return lock_file
+
+    def recover(self) -> list[Order]:
+        """Returns the orders stored in the latest snapshot with all later logged events applied."""
+        orders, last_seq, events = self._read_state()
+        self._last_seq = self._durable_seq = last_seq
+        self._events_since_snapshot += events
+        return orders
+
+    def _read_state(self) -> tuple[list[Order], int, int]:
+        """Returns the durable orders, the last logged sequence number and the number of events after the snapshot."""
+        orders: dict[str, Order] = {}
+        snapshot_seq = 0
+        snapshots = self._files(_SNAPSHOT_PREFIX)
+        if snapshots:
+            snapshot_seq, path = snapshots[-1]
+            with open(path, encoding="utf-8") as file:
+                next(file)
+                for line in file:
+                    order = Order.from_dict(json.loads(line))
+                    orders[order.id] = order
+
+        last_seq = snapshot_seq
+        events = 0
+        for _, path in self._files(_LOG_PREFIX):
+            for record in _read_log(path):
+                if record["seq"] <= snapshot_seq:
+                    continue
+                last_seq = record["seq"]
+                if record["event"] == "clear":
+                    orders.clear()
+                else:
+                    order = Order.from_dict(record["order"])
+                    orders[order.id] = order
+                events += 1
+        return list(orders.values()), last_seq, events
+
+    def start(self, capture_state: Callable[[], tuple[int, list[Order]]],
+              restore_state: Callable[[list[Order]], None]) -> None:
+        """Opens a new log segment and starts the group commit thread.
+
+        capture_state must return the sequence number of the last event and the
+        orders it leaves in the store, with no events appended in between; it
+        is expected to call rotate() while writers are held off. restore_state
+        must replace the orders in the store with the given durable orders; it
+        is called after a group commit failed.
+        """
+        self._capture_state = capture_state
+        self._restore_state = restore_state
+        self._segment = self._open_segment(self._last_seq + 1)
+        self._flusher = threading.Thread(target=self._run, name="orders-journal", daemon=True)
+        self._flusher.start()
+
+    def append(self, event: str, order: Order | None = None) -> int:
+        """Queues an event for the next group commit and returns its sequence number.
+
+        Call it while holding the lock that orders changes of the same order,
+        before applying the change, and wait_durable() after releasing it.
+        Raises JournalWriteError while the journal recovers from a failed
+        group commit; the change must not be made then.
+        """
+        return self.append_many([(event, order)])
+
+    def append_many(self, events: list[tuple[str, Order | None]]) -> int:
+        """Queues events for the same group commit and returns the sequence number of the last one; see append."""
+        with self._lock:
+            self._check_failure()
+            for event, order in events:
+                self._last_seq += 1
+                record = {"seq": self._last_seq, "event": event}
+                if order is not None:
+                    record["order"] = order.to_dict()
+                self._pending.append(json.dumps(record, separators=(",", ":")) + "\n")
+                self._events_since_snapshot += 1
+            return self._last_seq
+
+    def wait_durable(self, seq: int) -> None:
+        """Waits until the event is written and fsynced; raises JournalWriteError if it was dropped."""
+        with self._durable:
+            # Checked first: later commits move the durable sequence number past dropped events
+            while not any(first <= seq <= last for first, last in self._lost):
+                if self._durable_seq >= seq or self._stopped.is_set():
+                    return
+                self._durable.wait()
+            raise JournalWriteError("Orders journal cannot be written, the change was not made")
+
+    def _check_failure(self) -> None:
+        if self._failure is not None:
+            raise JournalWriteError(f"Orders journal cannot be written: {self._failure}") from self._failure
+
+    def rotate(self) -> int:
+        """Commits pending events, starts a new log segment and returns the last committed sequence number."""
+        with self._io_lock:
+            self._write_pending()
+            self._segment.close()
+            self._segment = self._open_segment(self._last_seq + 1)
+            return self._durable_seq
+
+    def snapshot(self) -> None:
+        """Writes the current store state to a snapshot and deletes the files it makes obsolete."""
+        with self._snapshot_lock:
+            self._write_snapshot()
+
+    def _write_snapshot(self) -> None:
+        seq, orders = self._capture_state()
+        path = self._directory / f"{_SNAPSHOT_PREFIX}{seq:020d}{_SUFFIX}"
+        temporary = path.with_suffix(".tmp")
+        with open(temporary, "w", encoding="utf-8") as file:
+            file.write(json.dumps({"seq": seq}) + "\n")
+            for order in orders:
+                file.write(json.dumps(order.to_dict(), separators=(",", ":")) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+        self._fsync_directory()
+
+        for snapshot_seq, obsolete in self._files(_SNAPSHOT_PREFIX):
+            if snapshot_seq < seq:
+                obsolete.unlink()
+        for first_seq, obsolete in self._files(_LOG_PREFIX):
+            if first_seq <= seq:
+                obsolete.unlink()
+
+    def close(self) -> None:
+        """Commits pending events, stops the group commit thread and releases the data directory."""
+        try:
+            if self._flusher is not None:
+                self._stopped.set()
+                self._flusher.join()
+                with self._io_lock:
+                    self._write_pending()
+                    self._segment.close()
+                self._flusher = None
+        finally:
+            # Closing the file releases the lock
+            self._lock_file.close()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self._fsync_interval):
+            with self._io_lock:
+                try:
+                    self._write_pending()
+                except OSError:
+                    # The failed events were dropped; the store is restored below
+                    pass
+            if self._failure is not None:
+                self._restore_durable_state()
+            if self._events_since_snapshot >= self._snapshot_every and not self._snapshot_lock.locked():
+                self._events_since_snapshot = 0
+                threading.Thread(target=self._snapshot_in_background, name="orders-snapshot", daemon=True).start()
+
+    def _snapshot_in_background(self) -> None:
+        try:
+            self.snapshot()
+        except Exception:
+            logger.exception("Orders snapshot failed")
+
+    def _restore_durable_state(self) -> None:
+        """Replaces the orders in the store with the durable ones and accepts new events again."""
+        try:
+            # No events are appended while the failure is set, and no snapshot deletes files meanwhile
+            with self._snapshot_lock:
+                orders, _, _ = self._read_state()
+                self._restore_state(orders)
+        except Exception:
+            logger.exception("Restoring the orders store from its journal failed, retrying")
+            return
+        with self._lock:
+            self._failure = None
+
+    def _write_pending(self) -> None:
+        """Writes and fsyncs all pending events as one batch; the caller holds _io_lock.
+
+        If writing fails, the part of the batch already written is cut off the
+        segment, the batch and all events appended since are dropped, and their
+        writers are woken up to fail with JournalWriteError. The journal then
+        rejects new events until the flusher has restored the store.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+            seq = self._last_seq
+        if pending:
+            descriptor = self._segment.fileno()
+            size = os.fstat(descriptor).st_size
+            try:
+                batch = memoryview("".join(pending).encode())
+                while batch:
+                    batch = batch[self._segment.write(batch):]
+                os.fsync(descriptor)
+            except OSError as e:
+                self._discard_partial_write(size)
+                with self._durable:
+                    self._pending = []
+                    self._lost.append((self._durable_seq + 1, self._last_seq))
+                    if not self._commits_failing:
+                        logger.exception("Writing the orders journal failed, dropping the changes not written")
+                    self._commits_failing = True
+                    self._failure = e
+                    self._durable.notify_all()
+                raise
+        with self._durable:
+            self._durable_seq = seq
+            self._commits_failing = self._commits_failing and not pending
+            self._durable.notify_all()
+
+    def _discard_partial_write(self, size: int) -> None:
+        try:
+            os.ftruncate(self._segment.fileno(), size)
+        except OSError:
+            # Nothing more can be done; recovery drops an event cut short at the end of the segment
+            logger.exception("Could not truncate the orders journal after a failed write")
+
+    def _open_segment(self, first_seq: int):
+        # Unbuffered, so that a failed batch can be cut off the segment exactly
+        segment = open(self._directory / f"{_LOG_PREFIX}{first_seq:020d}{_SUFFIX}", "ab", buffering=0)
+        self._fsync_directory()
+        return segment
+
+    def _files(self, prefix: str) -> list[tuple[int, Path]]:
+        """Returns (sequence number, path) of the files with the given prefix, oldest first."""
+        return sorted(
+            (int(path.name[len(prefix):-len(_SUFFIX)]), path)
+            for path in self._directory.glob(f"{prefix}*{_SUFFIX}")
+        )
+
+    def _fsync_directory(self) -> None:
+        descriptor = os.open(self._directory, os.O_RDONLY)
+        try:
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
+
+
+def _read_log(path: Path) -> Iterable[dict]:
+    """Yields the events of a log segment, truncating an event cut short by a crash."""
+    with open(path, "rb+") as file:
+        complete = 0
+        for line in file:
+            if not line.endswith(b"\n"):
+                logger.warning("Truncating incomplete event at the end of %s", path)
+                file.truncate(complete)
+                return
+            complete += len(line)
+            yield json.loads(line)
@@ -1,10 +1,292 @@
+import atexit
+import dataclasses
+import heapq
+import os
+import threading
 import uuid
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
 from datetime import datetime
 
-from orders.models import Order, OrderItem, OrderStatus
+from orders.events import OrderEvent, OrderEventLog
+from orders.models import InvalidOrderUpdate, Order, OrderItem, OrderStatus
+from orders.persistence import OrderJournal
+from orders.sqlite_store import SqliteOrderStore
+from orders.stats import OrderStats
 
-# In-memory storage
-_orders_db: dict[str, Order] = {}
+# Set ORDERS_DATABASE to a SQLite file to share orders between all worker processes on the host
+ORDERS_DATABASE = os.environ.get("ORDERS_DATABASE")
+# Set ORDERS_DATA_DIR to persist orders in a write-ahead log with periodic snapshots in that directory
+ORDERS_DATA_DIR = os.environ.get("ORDERS_DATA_DIR")
+# Seconds between group commits of the write-ahead log; a change is acknowledged once its commit is fsynced
+ORDERS_WAL_FSYNC_INTERVAL = float(os.environ.get("ORDERS_WAL_FSYNC_INTERVAL", "0.01"))
+# Number of logged events after which the store is compacted into a new snapshot
+ORDERS_SNAPSHOT_EVERY = int(os.environ.get("ORDERS_SNAPSHOT_EVERY", "10000"))
+# Number of the latest order change events kept for the change feed
+ORDERS_EVENTS_CAPACITY = int(os.environ.get("ORDERS_EVENTS_CAPACITY", "10000"))
+
+
+class OrderStore:
+    """In-memory order storage with a status index and a creation-time index.
+
+    Both indexes hold (created_at, order id) keys kept sorted with bisect, so a
+    page of orders is located with a binary search instead of a scan of all orders.
+    Aggregates of the stored orders are kept up to date in stats.
+    Stored orders are never mutated; update() replaces an order with its changed copy.
+    Not thread-safe on its own; ShardedOrderStore guards every shard with a lock.
+    """
+
+    def __init__(self):
+        self._orders: dict[str, Order] = {}
+        self._by_created: list[tuple[datetime, str]] = []
+        self._by_status: dict[OrderStatus, list[tuple[datetime, str]]] = {}
+        self.stats = OrderStats()
+
+    def add(self, order: Order) -> None:
+        self._orders[order.id] = order
+        key = (order.created_at, order.id)
+        insort(self._by_created, key)
+        insort(self._by_status.setdefault(order.status, []), key)
+        self.stats.add(order.status, order.created_at, order.items, order.total_value)
+
+    def get(self, order_id: str) -> Order | None:
+        return self._orders.get(order_id)
+
+    def update(self, order: Order) -> None:
+        previous = self._orders[order.id]
+        self._orders[order.id] = order
+        if previous.status != order.status:
+            key = (order.created_at, order.id)
+            _remove_sorted(self._by_status[previous.status], key)
+            insort(self._by_status.setdefault(order.status, []), key)
+        self.stats.remove(previous.status, previous.created_at, previous.items, previous.total_value)
+        self.stats.add(order.status, order.created_at, order.items, order.total_value)
+
+    def page(self, status: OrderStatus | None = None, created_after: datetime | None = None,
+             created_before: datetime | None = None, after: tuple[datetime, str] | None = None,
+             limit: int | None = None) -> tuple[list[Order], bool]:
+        """Returns orders in creation order after the given (created_at, id) key and whether more follow."""
+        index = self._by_status.get(status, []) if status else self._by_created
+        lo, hi = 0, len(index)
+        if created_after is not None:
+            lo = bisect_right(index, created_after, key=lambda key: key[0])
+        if created_before is not None:
+            hi = bisect_left(index, created_before, key=lambda key: key[0])
+        if after is not None:
+            lo = max(lo, bisect_right(index, after))
+        end = hi if limit is None else min(lo + limit, hi)
+        return [self._orders[order_id] for _, order_id in index[lo:end]], end < hi
+
+    def clear(self) -> None:
+        self._orders.clear()
+        self._by_created.clear()
+        self._by_status.clear()
+        self.stats = OrderStats()
+
+
+def _remove_sorted(index: list[tuple[datetime, str]], key: tuple[datetime, str]) -> None:
+    del index[bisect_left(index, key)]
+
+
+class ShardedOrderStore:
+    """Thread-safe order storage partitioned by order id hash, with one lock per shard.
+
+    Stored Order objects are never mutated: changes are applied to a copy under
+    the shard lock and the copy replaces the original, so readers always see a
+    consistent order and requests on different shards never wait for each other.
+
+    With a journal attached every change is logged under the shard lock before
+    it is applied, so the log holds the changes of each order in the order they
+    were applied, and is acknowledged only once the journal has made it durable.
+    If the journal cannot write it, the change is rolled back with all other
+    changes not yet durable and the writer gets JournalWriteError.
+    """
+
+    def __init__(self, shard_count: int = 16):
+        self._shards = [OrderStore() for _ in range(shard_count)]
+        self._locks = [threading.Lock() for _ in range(shard_count)]
+        self._journal: OrderJournal | None = None
+
+    def _shard_index(self, order_id: str) -> int:
+        return hash(order_id) % len(self._shards)
+
+    def attach_journal(self, journal: OrderJournal) -> None:
+        """Loads the orders recovered from the journal and logs every following change to it."""
+        for order in journal.recover():
+            self._shards[self._shard_index(order.id)].add(order)
+        self._journal = journal
+        journal.start(self._capture_state, self._restore_state)
+
+    @contextmanager
+    def _locked_shards(self, indexes: Iterable[int]) -> Iterator[None]:
+        """Holds the locks of the given shards, always acquired in index order so batches cannot deadlock."""
+        locks = [self._locks[index] for index in sorted(set(indexes))]
+        for lock in locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    def _capture_state(self) -> tuple[int, list[Order]]:
+        """Returns the last logged sequence number and all orders, holding off writers on every shard."""
+        with self._locked_shards(range(len(self._shards))):
+            orders = [order for shard in self._shards for order in shard._orders.values()]
+            return self._journal.rotate(), orders
+
+    def _restore_state(self, orders: list[Order]) -> None:
+        """Replaces all orders with the durable ones, dropping the changes the journal could not write."""
+        with self._locked_shards(range(len(self._shards))):
+            for shard in self._shards:
+                shard.clear()
+            for order in orders:
+                self._shards[self._shard_index(order.id)].add(order)
+
+    def _log(self, event: str, order: Order | None = None) -> int | None:
+        return self._journal.append(event, order) if self._journal else None
+
+    def _log_many(self, events: list[tuple[str, Order]]) -> int | None:
+        return self._journal.append_many(events) if self._journal and events else None
+
+    def _wait_durable(self, seq: int | None) -> None:
+        if seq is not None:
+            self._journal.wait_durable(seq)
+
+    def add(self, order: Order) -> None:
+        index = self._shard_index(order.id)
+        with self._locks[index]:
+            seq = self._log("create", order)
+            self._shards[index].add(order)
+        self._wait_durable(seq)
+
+    def add_many(self, orders: list[Order]) -> None:
+        """Adds all orders in one critical section over the shards they belong to."""
+        with self._locked_shards(self._shard_index(order.id) for order in orders):
+            # Logged together, so the orders become durable in the same group commit or are dropped together
+            seq = self._log_many([("create", order) for order in orders])
+            for order in orders:
+                self._shards[self._shard_index(order.id)].add(order)
+        self._wait_durable(seq)
+
+    def get(self, order_id: str) -> Order | None:
+        index = self._shard_index(order_id)
+        with self._locks[index]:
+            return self._shards[index].get(order_id)
+
+    def modify(self, order_id: str, change: Callable[[Order], None]) -> Order | None:
+        """Atomically applies change to a copy of the order and stores the copy.
+
+        Returns the updated order, or None if the order does not exist. Exceptions
+        raised by change abort the update.
+        """
+        index = self._shard_index(order_id)
+        with self._locks[index]:
+            updated = self._changed_copy(self._shards[index].get(order_id), change)
+            if updated is None:
+                return None
+            seq = self._log("update", updated)
+            self._shards[index].update(updated)
+        self._wait_durable(seq)
+        return updated
+
+    def modify_many(self, order_ids: list[str],
+                    change: Callable[[Order], None]) -> list[Order | InvalidOrderUpdate | None]:
+        """Applies change to every order in one critical section over the shards they belong to.
+
+        Returns, for each order id, the updated order, None if the order does not
+        exist, or the InvalidOrderUpdate that rejected the change of that order
+        alone.
+        """
+        results: list[Order | InvalidOrderUpdate | None] = []
+        with self._locked_shards(map(self._shard_index, order_ids)):
+            # The latest copy of each order, so that an order listed twice is changed twice
+            changed: dict[str, Order] = {}
+            for order_id in order_ids:
+                current = changed.get(order_id) or self._shards[self._shard_index(order_id)].get(order_id)
+                try:
+                    updated = self._changed_copy(current, change)
+                except InvalidOrderUpdate as e:
+                    results.append(e)
+                    continue
+                results.append(updated)
+                if updated is not None:
+                    changed[order_id] = updated
+            seq = self._log_many([("update", updated) for updated in changed.values()])
+            for updated in changed.values():
+                self._shards[self._shard_index(updated.id)].update(updated)
+        self._wait_durable(seq)
+        return results
+
+    @staticmethod
+    def _changed_copy(current: Order | None, change: Callable[[Order], None]) -> Order | None:
+        """Returns a copy of the order with change applied and its version bumped; the caller holds its shard lock."""
+        if current is None:
+            return None
+        updated = dataclasses.replace(current)
+        change(updated)
+        updated.updated_at = datetime.utcnow()
+        updated.version = current.version + 1
+        return updated
+
+    def compare_and_update(self, expected: Order, updated: Order) -> bool:
+        """Stores updated only if expected is still the stored version of the order."""
+        index = self._shard_index(expected.id)
+        with self._locks[index]:
+            shard = self._shards[index]
+            if shard.get(expected.id) is not expected:
+                return False
+            seq = self._log("update", updated)
+            shard.update(updated)
+        self._wait_durable(seq)
+        return True
+
+    def page(self, status: OrderStatus | None = None, created_after: datetime | None = None,
+             created_before: datetime | None = None, after: tuple[datetime, str] | None = None,
+             limit: int | None = None) -> tuple[list[Order], bool]:
+        """Merges the pages of all shards, each read under its own lock, into one page in creation order."""
+        pages = []
+        has_more = False
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                orders, shard_has_more = shard.page(status, created_after, created_before, after, limit)
+            pages.append(orders)
+            has_more = has_more or shard_has_more
+        merged = list(heapq.merge(*pages, key=lambda order: (order.created_at, order.id)))
+        if limit is not None and len(merged) > limit:
+            return merged[:limit], True
+        return merged, has_more
+
+    def stats(self) -> OrderStats:
+        """Merges the aggregates of all shards, each read under its own lock."""
+        stats = OrderStats()
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                stats.merge(shard.stats)
+        return stats
+
+    def clear(self) -> None:
+        with self._locked_shards(range(len(self._shards))):
+            seq = self._log("clear")
+            for shard in self._shards:
+                shard.clear()
+        self._wait_durable(seq)
+
+
+# SQLite storage when ORDERS_DATABASE is set, otherwise in-memory storage, optionally persisted to ORDERS_DATA_DIR
+_store: ShardedOrderStore | SqliteOrderStore
+if ORDERS_DATABASE:
+    _store = SqliteOrderStore(ORDERS_DATABASE)
+else:
+    _store = ShardedOrderStore()
+    if ORDERS_DATA_DIR:
+        _journal = OrderJournal(ORDERS_DATA_DIR, ORDERS_WAL_FSYNC_INTERVAL, ORDERS_SNAPSHOT_EVERY)
+        _store.attach_journal(_journal)
+        atexit.register(_journal.close)
+
+# Change feed of the orders created and changed by this process
+_events = OrderEventLog(ORDERS_EVENTS_CAPACITY)
 
 
 def parse_order_items(items_data: list[dict]) -> list[OrderItem]:
@@ -22,34 +304,125 @@ def parse_order_items(items_data: list[dict]) -> list[OrderItem]:
 
 
 def create_order(items: list[OrderItem]) -> Order:
+    order = _new_order(items)
+    _store.add(order)
+    _events.publish("created", order)
+    return order
+
+
+def create_order_once(items: list[OrderItem], idempotency_key: str, fingerprint: bytes,
+                      ttl: float) -> tuple[bytes, bool]:
+    """Creates an order unless the idempotency key was used before, recording the key in the shared database.
+
+    Returns the JSON of the created order and True, or the JSON of the order
+    created by the first request with the key and False. Requires ORDERS_DATABASE;
+    see shares_idempotency_keys.
+    """
+    order = _new_order(items)
+    stored = _store.add_once(order, idempotency_key, fingerprint, ttl)
+    if stored is not None:
+        return stored, False
+    _events.publish("created", order)
+    return order.to_json(), True
+
+
+def find_idempotent_order(idempotency_key: str, fingerprint: bytes) -> bytes | None:
+    """Returns the JSON of the order created with the idempotency key in the shared database, or None."""
+    return _store.replay(idempotency_key, fingerprint)
+
+
+def shares_idempotency_keys() -> bool:
+    """Whether idempotency keys are kept in the database shared by all worker processes."""
+    return isinstance(_store, SqliteOrderStore)
+
+
+def create_orders(items_per_order: list[list[OrderItem]]) -> list[Order]:
+    """Creates one order per list of items in a single repository critical section."""
+    orders = [_new_order(items) for items in items_per_order]
+    _store.add_many(orders)
+    for order in orders:
+        _events.publish("created", order)
+    return orders
+
+
+def _new_order(items: list[OrderItem]) -> Order:
     now = datetime.utcnow()
-    order = Order(
+    return Order(
         id=str(uuid.uuid4()),
         items=items,
         status=OrderStatus.CONFIRMED,
         created_at=now,
         updated_at=now,
     )
-    _orders_db[order.id] = order
-    return order
 
 
 def get_order(order_id: str) -> Order | None:
-    return _orders_db.get(order_id)
+    return _store.get(order_id)
 
 
 def get_all_orders(status_filter: OrderStatus | None = None) -> list[Order]:
-    orders = list(_orders_db.values())
-    if status_filter:
-        orders = [o for o in orders if o.status == status_filter]
+    orders, _ = _store.page(status_filter)
     return orders
 
 
-def update_order(order: Order) -> Order:
-    order.updated_at = datetime.utcnow()
-    _orders_db[order.id] = order
+def get_orders_page(status_filter: OrderStatus | None = None, created_after: datetime | None = None,
+                    created_before: datetime | None = None, after: tuple[datetime, str] | None = None,
+                    limit: int | None = None) -> tuple[list[Order], bool]:
+    return _store.page(status_filter, created_after, created_before, after, limit)
+
+
+def modify_order(order_id: str, change: Callable[[Order], None]) -> Order | None:
+    """Atomically reads, changes and stores an order; change may raise InvalidOrderUpdate to reject it."""
+    order = _store.modify(order_id, change)
+    if order:
+        _publish_change(order)
     return order
 
 
+def modify_orders(order_ids: list[str], change: Callable[[Order], None]) -> list[Order | InvalidOrderUpdate | None]:
+    """Atomically changes each order in a single repository critical section; see ShardedOrderStore.modify_many."""
+    results = _store.modify_many(order_ids, change)
+    for result in results:
+        if isinstance(result, Order):
+            _publish_change(result)
+    return results
+
+
+def compare_and_update_order(expected: Order, updated: Order) -> bool:
+    updated.updated_at = datetime.utcnow()
+    updated.version = expected.version + 1
+    if not _store.compare_and_update(expected, updated):
+        return False
+    _publish_change(updated)
+    return True
+
+
+def get_order_stats() -> OrderStats:
+    return _store.stats()
+
+
+def get_order_events(since: int, limit: int, timeout: float = 0.0) -> list[OrderEvent]:
+    """Returns order change events after the since sequence number; see OrderEventLog.read."""
+    return _events.read(since, limit, timeout)
+
+
+def get_last_order_event_seq() -> int:
+    return _events.last_seq
+
+
+def get_order_event_stream_id() -> str:
+    """Returns the id of this process's event stream, which the event cursors handed to consumers start with."""
+    return _events.stream_id
+
+
+def get_order_event_cursor(seq: int) -> str:
+    return _events.cursor(seq)
+
+
+def _publish_change(order: Order) -> None:
+    # Events are published after the change is stored; consumers order the events of one order by its version
+    _events.publish("cancelled" if order.status == OrderStatus.CANCELLED else "updated", order)
+
+
 def clear_orders() -> None:
-    _orders_db.clear()
+    _store.clear()
@@ -0,0 +1,317 @@
+"""Order storage in a SQLite database shared by all worker processes on a host.
+
+The database runs in WAL mode, so readers in every process proceed while one
+writer commits. Each thread keeps its own connection, and statements are fixed
+SQL strings, so sqlite3 prepares each of them once per connection and reuses it.
+Pages are read from the (status, created_at, id) and (created_at, id) indexes.
+Order aggregates are kept in tables updated in the same transaction as each change,
+and so are the idempotency keys of created orders.
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from datetime import datetime
+
+from orders.idempotency import IdempotencyKeyReused
+from orders.models import InvalidOrderUpdate, Order, OrderItem, OrderStatus
+from orders.stats import OrderStats
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    items TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS orders_by_created ON orders (created_at, id);
+CREATE INDEX IF NOT EXISTS orders_by_status ON orders (status, created_at, id);
+CREATE TABLE IF NOT EXISTS order_stats_status (
+    status TEXT PRIMARY KEY,
+    orders INTEGER NOT NULL,
+    revenue REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS order_stats_product (
+    product_id TEXT PRIMARY KEY,
+    orders INTEGER NOT NULL,
+    quantity INTEGER NOT NULL,
+    revenue REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS order_stats_hour (
+    hour TEXT PRIMARY KEY,
+    orders INTEGER NOT NULL,
+    revenue REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key TEXT PRIMARY KEY,
+    fingerprint BLOB NOT NULL,
+    response BLOB NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idempotency_keys_by_expiry ON idempotency_keys (expires_at);
+"""
+
+_COLUMNS = "id, status, created_at, updated_at, items, version"
+_INSERT = f"INSERT INTO orders ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)"
+_SELECT = f"SELECT {_COLUMNS} FROM orders WHERE id = ?"
+_UPDATE = "UPDATE orders SET status = ?, updated_at = ?, items = ?, version = ? WHERE id = ?"
+_COMPARE_AND_UPDATE = ("UPDATE orders SET status = ?, updated_at = ?, items = ?, version = ? "
+                       "WHERE id = ? AND version = ?")
+
+# Aggregate upserts adding one order's contribution, and deletes of aggregates no order is counted under anymore
+_COUNT_STATUS = ("INSERT INTO order_stats_status (status, orders, revenue) VALUES (?, ?, ?) "
+                 "ON CONFLICT (status) DO UPDATE SET orders = orders + excluded.orders, "
+                 "revenue = revenue + excluded.revenue")
+_COUNT_PRODUCT = ("INSERT INTO order_stats_product (product_id, orders, quantity, revenue) VALUES (?, ?, ?, ?) "
+                  "ON CONFLICT (product_id) DO UPDATE SET orders = orders + excluded.orders, "
+                  "quantity = quantity + excluded.quantity, revenue = revenue + excluded.revenue")
+_COUNT_HOUR = ("INSERT INTO order_stats_hour (hour, orders, revenue) VALUES (?, ?, ?) "
+               "ON CONFLICT (hour) DO UPDATE SET orders = orders + excluded.orders, "
+               "revenue = revenue + excluded.revenue")
+_PRUNE_STATUS = "DELETE FROM order_stats_status WHERE status = ? AND orders = 0"
+_PRUNE_PRODUCT = "DELETE FROM order_stats_product WHERE product_id = ? AND orders = 0"
+_PRUNE_HOUR = "DELETE FROM order_stats_hour WHERE hour = ? AND orders = 0"
+
+# Idempotency keys expire at a wall-clock time, which all processes agree on
+_SELECT_IDEMPOTENCY_KEY = "SELECT fingerprint, response FROM idempotency_keys WHERE key = ? AND expires_at > ?"
+_INSERT_IDEMPOTENCY_KEY = ("INSERT OR REPLACE INTO idempotency_keys (key, fingerprint, response, expires_at) "
+                           "VALUES (?, ?, ?, ?)")
+_EXPIRE_IDEMPOTENCY_KEYS = "DELETE FROM idempotency_keys WHERE expires_at <= ?"
+
+# Fixed-width timestamps, so text order in the indexes is chronological order
+_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+
+
+class SqliteOrderStore:
+    """Order storage backed by a SQLite database in WAL mode, with one connection per thread.
+
+    Offers the same methods as ShardedOrderStore. Every change runs in its own
+    transaction, so several processes can share one database file.
+    """
+
+    def __init__(self, path: str, busy_timeout: float = 5.0):
+        self._path = path
+        self._busy_timeout = busy_timeout
+        self._local = threading.local()
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.executescript(_SCHEMA)
+        # Databases created before orders were versioned
+        if "version" not in {column[1] for column in connection.execute("PRAGMA table_info (orders)")}:
+            connection.execute("ALTER TABLE orders ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # Autocommit mode; multi-statement changes open their transactions explicitly
+            connection = sqlite3.connect(self._path, timeout=self._busy_timeout, isolation_level=None)
+            connection.execute("PRAGMA synchronous = NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def add(self, order: Order) -> None:
+        with self._transaction() as connection:
+            connection.execute(_INSERT, _row(order))
+            _count(connection, order.status, order.created_at, order.items, order.total_value)
+
+    def add_many(self, orders: list[Order]) -> None:
+        """Adds all orders in a single transaction."""
+        with self._transaction() as connection:
+            connection.executemany(_INSERT, [_row(order) for order in orders])
+            for order in orders:
+                _count(connection, order.status, order.created_at, order.items, order.total_value)
+
+    def add_once(self, order: Order, key: str, fingerprint: bytes, ttl: float) -> bytes | None:
+        """Adds the order and records the idempotency key with the order's JSON in the same transaction.
+
+        If the key was recorded less than ttl seconds ago, by any process, nothing
+        is added and the JSON of the order created with it is returned instead.
+        Raises IdempotencyKeyReused if the key was recorded for another request.
+        """
+        now = time.time()
+        with self._transaction() as connection:
+            stored = _replay(connection, key, fingerprint, now)
+            if stored is not None:
+                return stored
+            connection.execute(_EXPIRE_IDEMPOTENCY_KEYS, (now,))
+            connection.execute(_INSERT, _row(order))
+            _count(connection, order.status, order.created_at, order.items, order.total_value)
+            connection.execute(_INSERT_IDEMPOTENCY_KEY, (key, fingerprint, order.to_json(), now + ttl))
+        return None
+
+    def replay(self, key: str, fingerprint: bytes) -> bytes | None:
+        """Returns the JSON of the order created with an unexpired idempotency key, or None; see add_once."""
+        return _replay(self._connection(), key, fingerprint, time.time())
+
+    def get(self, order_id: str) -> Order | None:
+        row = self._connection().execute(_SELECT, (order_id,)).fetchone()
+        return _order(row) if row else None
+
+    def modify(self, order_id: str, change: Callable[[Order], None]) -> Order | None:
+        """Atomically applies change to the stored order inside a write transaction.
+
+        Returns the updated order, or None if the order does not exist. Exceptions
+        raised by change roll the transaction back.
+        """
+        with self._transaction() as connection:
+            return _modify(connection, order_id, change)
+
+    def modify_many(self, order_ids: list[str],
+                    change: Callable[[Order], None]) -> list[Order | InvalidOrderUpdate | None]:
+        """Applies change to every order in a single transaction.
+
+        Returns, for each order id, the updated order, None if the order does not
+        exist, or the InvalidOrderUpdate that rejected the change of that order
+        alone.
+        """
+        results: list[Order | InvalidOrderUpdate | None] = []
+        with self._transaction() as connection:
+            for order_id in order_ids:
+                try:
+                    results.append(_modify(connection, order_id, change))
+                except InvalidOrderUpdate as e:
+                    results.append(e)
+        return results
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Runs the block in a write transaction, committed on success and rolled back on any exception."""
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def compare_and_update(self, expected: Order, updated: Order) -> bool:
+        """Stores updated only if expected is still the stored version of the order."""
+        _, status, _, updated_at, items, version = _row(updated)
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                _COMPARE_AND_UPDATE, (status, updated_at, items, version, expected.id, expected.version)
+            )
+            if cursor.rowcount != 1:
+                return False
+            _count(connection, expected.status, expected.created_at, expected.items, expected.total_value, -1)
+            _count(connection, updated.status, updated.created_at, updated.items, updated.total_value)
+            return True
+
+    def page(self, status: OrderStatus | None = None, created_after: datetime | None = None,
+             created_before: datetime | None = None, after: tuple[datetime, str] | None = None,
+             limit: int | None = None) -> tuple[list[Order], bool]:
+        """Returns orders in creation order after the given (created_at, id) key and whether more follow."""
+        conditions, parameters = [], []
+        if status:
+            conditions.append("status = ?")
+            parameters.append(OrderStatus(status).value)
+        if created_after is not None:
+            conditions.append("created_at > ?")
+            parameters.append(_timestamp(created_after))
+        if created_before is not None:
+            conditions.append("created_at < ?")
+            parameters.append(_timestamp(created_before))
+        if after is not None:
+            conditions.append("(created_at, id) > (?, ?)")
+            parameters.extend((_timestamp(after[0]), after[1]))
+        sql = f"SELECT {_COLUMNS} FROM orders"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY created_at, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters.append(limit + 1)
+
+        rows = self._connection().execute(sql, parameters).fetchall()
+        has_more = limit is not None and len(rows) > limit
+        return [_order(row) for row in rows[:limit]], has_more
+
+    def stats(self) -> OrderStats:
+        """Reads the aggregates kept up to date by every change."""
+        connection = self._connection()
+        stats = OrderStats()
+        for status, orders, revenue in connection.execute("SELECT status, orders, revenue FROM order_stats_status"):
+            stats.by_status[OrderStatus(status)] = [orders, revenue]
+        for product_id, orders, quantity, revenue in connection.execute(
+                "SELECT product_id, orders, quantity, revenue FROM order_stats_product"):
+            stats.by_product[product_id] = [orders, quantity, revenue]
+        for hour, orders, revenue in connection.execute("SELECT hour, orders, revenue FROM order_stats_hour"):
+            stats.by_hour[datetime.strptime(hour, _TIMESTAMP_FORMAT)] = [orders, revenue]
+        return stats
+
+    def clear(self) -> None:
+        with self._transaction() as connection:
+            for table in ("orders", "order_stats_status", "order_stats_product", "order_stats_hour",
+                          "idempotency_keys"):
+                connection.execute(f"DELETE FROM {table}")
+
+
+def _modify(connection: sqlite3.Connection, order_id: str, change: Callable[[Order], None]) -> Order | None:
+    row = connection.execute(_SELECT, (order_id,)).fetchone()
+    if row is None:
+        return None
+    order = _order(row)
+    previous_status, previous_items, previous_total = order.status, order.items, order.total_value
+    change(order)
+    order.updated_at = datetime.utcnow()
+    order.version += 1
+    _, status, _, updated_at, items, version = _row(order)
+    connection.execute(_UPDATE, (status, updated_at, items, version, order_id))
+    _count(connection, previous_status, order.created_at, previous_items, previous_total, -1)
+    _count(connection, order.status, order.created_at, order.items, order.total_value)
+    return order
+
+
+def _replay(connection: sqlite3.Connection, key: str, fingerprint: bytes, now: float) -> bytes | None:
+    row = connection.execute(_SELECT_IDEMPOTENCY_KEY, (key, now)).fetchone()
+    if row is None:
+        return None
+    if row[0] != fingerprint:
+        raise IdempotencyKeyReused("Idempotency-Key was already used with a different request")
+    return row[1]
+
+
+def _count(connection: sqlite3.Connection, status: OrderStatus, created_at: datetime,
+           items: Iterable[OrderItem], total_value: float, sign: int = 1) -> None:
+    """Adds the contribution of one order version to the aggregate tables; sign=-1 removes it."""
+    contribution = OrderStats()
+    contribution.add(status, created_at, items, total_value, sign)
+    for status_key, (orders, revenue) in contribution.by_status.items():
+        connection.execute(_COUNT_STATUS, (status_key.value, orders, revenue))
+        connection.execute(_PRUNE_STATUS, (status_key.value,))
+    for product_id, (orders, quantity, revenue) in contribution.by_product.items():
+        connection.execute(_COUNT_PRODUCT, (product_id, orders, quantity, revenue))
+        connection.execute(_PRUNE_PRODUCT, (product_id,))
+    for hour, (orders, revenue) in contribution.by_hour.items():
+        connection.execute(_COUNT_HOUR, (_timestamp(hour), orders, revenue))
+        connection.execute(_PRUNE_HOUR, (_timestamp(hour),))
+
+
+def _timestamp(value: datetime) -> str:
+    return value.strftime(_TIMESTAMP_FORMAT)
+
+
+def _row(order: Order) -> tuple[str, str, str, str, str, int]:
+    items = json.dumps([
+        {"product_id": item.product_id, "name": item.name, "price": item.price, "quantity": item.quantity}
+        for item in order.items
+    ], separators=(",", ":"))
+    return (order.id, OrderStatus(order.status).value, _timestamp(order.created_at),
+            _timestamp(order.updated_at), items, order.version)
+
+
+def _order(row: tuple[str, str, str, str, str, int]) -> Order:
+    order_id, status, created_at, updated_at, items, version = row
+    return Order(
+        id=order_id,
+        items=[OrderItem.from_dict(item) for item in json.loads(items)],
+        status=OrderStatus(status),
+        created_at=datetime.strptime(created_at, _TIMESTAMP_FORMAT),
+        updated_at=datetime.strptime(updated_at, _TIMESTAMP_FORMAT),
+        version=version,
+    )
@@ -0,0 +1,85 @@
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+
+from orders.models import OrderItem, OrderStatus
+
+BUCKETS = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+
+
+class OrderStats:
+    """Order counts and revenue by status, by product and by hour of creation.
+
+    Kept up to date by adding the contribution of every stored order version and
+    removing it again when the version is replaced, so reading the aggregates
+    never rescans orders. Products and hours only count confirmed orders, whose
+    revenue is actually earned.
+    """
+
+    def __init__(self):
+        # status -> [orders, revenue]
+        self.by_status: dict[OrderStatus, list] = {}
+        # product id -> [orders, quantity, revenue]
+        self.by_product: dict[str, list] = {}
+        # start of the hour -> [orders, revenue]
+        self.by_hour: dict[datetime, list] = {}
+
+    def add(self, status: OrderStatus, created_at: datetime, items: Iterable[OrderItem], total_value: float,
+            sign: int = 1) -> None:
+        """Counts one order version; sign=-1 removes a version counted before."""
+        _accumulate(self.by_status, OrderStatus(status), (sign, sign * total_value))
+        if status != OrderStatus.CONFIRMED:
+            return
+        products: dict[str, tuple[int, float]] = {}
+        for item in items:
+            quantity, revenue = products.get(item.product_id, (0, 0.0))
+            products[item.product_id] = (quantity + item.quantity, revenue + item.price * item.quantity)
+        for product_id, (quantity, revenue) in products.items():
+            _accumulate(self.by_product, product_id, (sign, sign * quantity, sign * revenue))
+        _accumulate(self.by_hour, created_at.replace(minute=0, second=0, microsecond=0), (sign, sign * total_value))
+
+    def remove(self, status: OrderStatus, created_at: datetime, items: Iterable[OrderItem],
+               total_value: float) -> None:
+        self.add(status, created_at, items, total_value, sign=-1)
+
+    def merge(self, other: "OrderStats") -> None:
+        for aggregates, other_aggregates in ((self.by_status, other.by_status), (self.by_product, other.by_product),
+                                             (self.by_hour, other.by_hour)):
+            for key, values in other_aggregates.items():
+                _accumulate(aggregates, key, values)
+
+    def to_dict(self, bucket: str = "day") -> dict:
+        """Returns the aggregates with hours rolled up into buckets of the given size, in creation order."""
+        by_time: dict[datetime, list] = {}
+        for hour, values in self.by_hour.items():
+            if bucket == "day":
+                hour = hour.replace(hour=0)
+            _accumulate(by_time, hour, values)
+
+        return {
+            "by_status": {
+                status.value: {"orders": orders, "revenue": round(revenue, 2)}
+                for status, (orders, revenue) in sorted(self.by_status.items())
+            },
+            "by_product": {
+                product_id: {"orders": orders, "quantity": quantity, "revenue": round(revenue, 2)}
+                for product_id, (orders, quantity, revenue) in sorted(self.by_product.items())
+            },
+            "by_time": [
+                {"start": start.isoformat(), "end": (start + BUCKETS[bucket]).isoformat(), "orders": orders,
+                 "revenue": round(revenue, 2)}
+                for start, (orders, revenue) in sorted(by_time.items())
+            ],
+            "bucket": bucket,
+        }
+
+
+def _accumulate(aggregates: dict, key, values: Iterable) -> None:
+    """Adds values to the aggregates of key, dropping the key once no order is counted under it."""
+    current = aggregates.get(key)
+    if current is None:
+        aggregates[key] = list(values)
+        return
+    for position, value in enumerate(values):
+        current[position] += value
+    if current[0] == 0:
+        del aggregates[key]
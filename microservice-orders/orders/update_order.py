@@ -1,7 +1,7 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 
-from orders.models import OrderStatus
-from orders.repository import get_order, parse_order_items, update_order
+from orders.models import Order, OrderStatus
+from orders.repository import InvalidOrderUpdate, get_order, modify_order, parse_order_items
 
 
 def register(app: Flask) -> None:
@@ -20,22 +20,37 @@ def register(app: Flask) -> None:
         if not data:
             return jsonify({"error": "No data provided"}), 400
 
+        items = None
         if "items" in data:
             if not data["items"]:
                 return jsonify({"error": "Order must contain at least one item"}), 400
             try:
-                order.items = parse_order_items(data["items"])
+                items = parse_order_items(data["items"])
             except (KeyError, ValueError) as e:
                 return jsonify({"error": f"Invalid item data: {str(e)}"}), 400
 
+        new_status = None
         if "status" in data:
             try:
                 new_status = OrderStatus(data["status"])
-                if order.status == OrderStatus.CANCELLED:
-                    return jsonify({"error": "Cannot change status of cancelled order"}), 400
-                order.status = new_status
             except ValueError:
                 return jsonify({"error": f"Invalid status: {data['status']}"}), 400
 
-        update_order(order)
-        return jsonify(order.to_dict())
+        def update(current: Order) -> None:
+            # The order may have been cancelled since it was read above
+            if current.status == OrderStatus.CANCELLED:
+                raise InvalidOrderUpdate("Cannot update a cancelled order")
+            if items is not None:
+                current.items = items
+            if new_status is not None:
+                current.status = new_status
+
+        try:
+            order = modify_order(order_id, update)
+        except InvalidOrderUpdate as e:
+            return jsonify({"error": str(e)}), 400
+
+        if not order:
+            return jsonify({"error": "Order not found"}), 404
+
+        return Response(order.to_json(), mimetype="application/json")
@@ -1,7 +1,20 @@
+import dataclasses
+import errno
+import json
+import os
+import threading
+import time
+
 import pytest
 
 from orders import create_app
-from orders.repository import clear_orders
+from orders.events import EventsExpired, OrderEventLog
+from orders.idempotency import IdempotencyKeyReused, IdempotencyStore, StoredResponse, fingerprint
+from orders.models import OrderItem, OrderStatus
+from orders.persistence import JournalInUseError, JournalWriteError, OrderJournal
+from orders.repository import (InvalidOrderUpdate, ShardedOrderStore, clear_orders, compare_and_update_order,
+                               create_order, get_order)
+from orders.sqlite_store import SqliteOrderStore
 
 
 @pytest.fixture
@@ -144,3 +157,608 @@ def test_cancel_order_updates_status_to_cancelled(client):
 
     get_response = client.get(f"/api/v1/orders/{order['id']}")
     assert get_response.get_json()["status"] == "cancelled"
+
+
+def test_list_orders_paginates_with_limit_and_cursor(client):
+    created = [create_sample_order(client, product_id=f"prod-{i}") for i in range(5)]
+
+    first_page = client.get("/api/v1/orders?limit=2").get_json()
+    second_page = client.get(f"/api/v1/orders?limit=2&cursor={first_page['next_cursor']}").get_json()
+    last_page = client.get(f"/api/v1/orders?limit=2&cursor={second_page['next_cursor']}").get_json()
+
+    listed = first_page["orders"] + second_page["orders"] + last_page["orders"]
+    assert [order["id"] for order in listed] == [order["id"] for order in created]
+    assert first_page["count"] == 2
+    assert last_page["count"] == 1
+    assert last_page["next_cursor"] is None
+
+
+def test_list_orders_filters_by_status_after_cancellation(client):
+    order1 = create_sample_order(client, product_id="prod-1")
+    order2 = create_sample_order(client, product_id="prod-2")
+    client.delete(f"/api/v1/orders/{order1['id']}")
+
+    confirmed = client.get("/api/v1/orders?status=confirmed").get_json()
+    cancelled = client.get("/api/v1/orders?status=cancelled").get_json()
+
+    assert [order["id"] for order in confirmed["orders"]] == [order2["id"]]
+    assert [order["id"] for order in cancelled["orders"]] == [order1["id"]]
+
+
+def test_list_orders_filters_by_creation_time_range(client):
+    orders = [create_sample_order(client, product_id=f"prod-{i}") for i in range(4)]
+
+    response = client.get("/api/v1/orders", query_string={
+        "created_after": orders[0]["created_at"],
+        "created_before": orders[3]["created_at"],
+    })
+
+    assert response.status_code == 200
+    assert [order["id"] for order in response.get_json()["orders"]] == [orders[1]["id"], orders[2]["id"]]
+
+
+@pytest.mark.parametrize("query", ["limit=0", "limit=x", "cursor=bogus", "created_after=yesterday", "status=shipped"])
+def test_list_orders_rejects_invalid_query_parameters(client, query):
+    response = client.get(f"/api/v1/orders?{query}")
+
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_batch_create_orders_returns_result_per_entry(client):
+    response = client.post("/api/v1/orders:batch", json={"orders": [
+        {"items": [{"product_id": "prod-1", "name": "Widget", "price": 29.99, "quantity": 2}]},
+        {"items": [{"product_id": "prod-2", "name": "Gadget", "price": "not-a-price", "quantity": 1}]},
+        {"items": []},
+        {"items": [{"product_id": "prod-3", "name": "Gizmo", "price": 9.99, "quantity": 1}]},
+    ]})
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["created"] == 2
+    assert [result["status"] for result in data["results"]] == [201, 400, 400, 201]
+    assert data["results"][0]["order"]["items"][0]["product_id"] == "prod-1"
+    assert "error" in data["results"][1]
+    assert client.get("/api/v1/orders").get_json()["count"] == 2
+
+
+def test_batch_cancel_orders_returns_result_per_entry(client):
+    first = create_sample_order(client)
+    second = create_sample_order(client)
+    client.delete(f"/api/v1/orders/{second['id']}")
+
+    response = client.post("/api/v1/orders:batchCancel", json={"ids": [first["id"], second["id"], "missing"]})
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["cancelled"] == 1
+    assert [result["status"] for result in data["results"]] == [200, 400, 404]
+    assert data["results"][0]["order"]["status"] == "cancelled"
+    assert client.get(f"/api/v1/orders/{first['id']}").get_json()["status"] == "cancelled"
+
+
+@pytest.mark.parametrize("path,body", [
+    ("/api/v1/orders:batch", {}),
+    ("/api/v1/orders:batch", {"orders": [{"items": [{"product_id": "p", "name": "n", "price": 1, "quantity": 1}]}]
+                              * 101}),
+    ("/api/v1/orders:batchCancel", {"ids": []}),
+    ("/api/v1/orders:batchCancel", {"ids": [1, 2]}),
+])
+def test_batch_endpoints_reject_invalid_requests(client, path, body):
+    response = client.post(path, json=body)
+
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_order_json_is_cached_until_order_changes():
+    order = create_order([OrderItem(product_id="prod-1", name="Widget", price=1.0, quantity=1)])
+    encoded = order.to_json()
+
+    assert order.to_json() is encoded
+    assert json.loads(encoded) == order.to_dict()
+
+    order.status = OrderStatus.CANCELLED
+
+    assert json.loads(order.to_json())["status"] == "cancelled"
+
+
+def test_get_order_returns_current_json_after_update(client):
+    created = create_sample_order(client)
+    client.get(f"/api/v1/orders/{created['id']}")
+    client.put(f"/api/v1/orders/{created['id']}",
+               json={"items": [{"product_id": "prod-9", "name": "Gizmo", "price": 5.0, "quantity": 3}]})
+
+    response = client.get(f"/api/v1/orders/{created['id']}")
+
+    assert response.content_type == "application/json"
+    assert response.get_json()["items"][0]["product_id"] == "prod-9"
+    assert response.get_json()["total_value"] == 15.0
+
+
+def test_order_stats_follow_creation_update_and_cancellation(client):
+    create_sample_order(client, product_id="prod-1", price=10.0, quantity=2)
+    second = create_sample_order(client, product_id="prod-2", price=5.0, quantity=1)
+    third = create_sample_order(client, product_id="prod-1", price=10.0, quantity=1)
+    client.put(f"/api/v1/orders/{second['id']}",
+               json={"items": [{"product_id": "prod-2", "name": "Gadget", "price": 5.0, "quantity": 4}]})
+    client.delete(f"/api/v1/orders/{third['id']}")
+
+    response = client.get("/api/v1/orders/stats?bucket=hour")
+
+    assert response.status_code == 200
+    stats = response.get_json()
+    assert stats["by_status"] == {"cancelled": {"orders": 1, "revenue": 10.0},
+                                  "confirmed": {"orders": 2, "revenue": 40.0}}
+    assert stats["by_product"] == {"prod-1": {"orders": 1, "quantity": 2, "revenue": 20.0},
+                                   "prod-2": {"orders": 1, "quantity": 4, "revenue": 20.0}}
+    assert sum(bucket["orders"] for bucket in stats["by_time"]) == 2
+    assert sum(bucket["revenue"] for bucket in stats["by_time"]) == 40.0
+
+
+def test_order_stats_rejects_invalid_bucket(client):
+    response = client.get("/api/v1/orders/stats?bucket=week")
+
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_create_order_with_idempotency_key_replays_first_response(client):
+    order_data = {"items": [{"product_id": "prod-1", "name": "Widget", "price": 29.99, "quantity": 2}]}
+    headers = {"Idempotency-Key": "checkout-42"}
+
+    first = client.post("/api/v1/orders", json=order_data, headers=headers)
+    retry = client.post("/api/v1/orders", json=order_data, headers=headers)
+
+    assert first.status_code == 201
+    assert retry.status_code == 201
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.get_json() == first.get_json()
+    assert client.get("/api/v1/orders").get_json()["count"] == 1
+
+
+def test_create_order_rejects_idempotency_key_reused_for_different_order(client):
+    headers = {"Idempotency-Key": "checkout-43"}
+    client.post("/api/v1/orders", headers=headers,
+                json={"items": [{"product_id": "prod-1", "name": "Widget", "price": 29.99, "quantity": 2}]})
+
+    response = client.post("/api/v1/orders", headers=headers,
+                           json={"items": [{"product_id": "prod-2", "name": "Gadget", "price": 9.99, "quantity": 1}]})
+
+    assert response.status_code == 422
+    assert "error" in response.get_json()
+
+
+def test_create_order_releases_idempotency_key_of_failed_request(client):
+    headers = {"Idempotency-Key": "checkout-44"}
+    invalid = client.post("/api/v1/orders", headers=headers, json={"items": []})
+    retry = client.post("/api/v1/orders", headers=headers, json={"items": []})
+
+    assert invalid.status_code == 400
+    assert retry.status_code == 400
+    assert "Idempotent-Replayed" not in retry.headers
+
+
+def test_idempotency_store_expires_and_evicts_keys():
+    now = [0.0]
+    store = IdempotencyStore(max_keys=2, ttl=10.0, clock=lambda: now[0])
+    for key in ("a", "b"):
+        store.begin(key, b"body")
+        store.finish(key, StoredResponse(201, key.encode()))
+
+    assert store.begin("a", b"body").body == b"a"
+    store.begin("c", b"body")
+    assert store.begin("b", b"body") is None
+
+    now[0] = 11.0
+    assert store.begin("a", b"other body") is None
+
+
+def test_patch_order_applies_item_operations_and_bumps_version(client):
+    created = client.post("/api/v1/orders", json={"items": [
+        {"product_id": "prod-1", "name": "Widget", "price": 10.0, "quantity": 2},
+        {"product_id": "prod-2", "name": "Gadget", "price": 5.0, "quantity": 1},
+    ]}).get_json()
+    etag = client.get(f"/api/v1/orders/{created['id']}").headers["ETag"]
+
+    response = client.patch(f"/api/v1/orders/{created['id']}", headers={"If-Match": etag}, json={"operations": [
+        {"op": "set_quantity", "product_id": "prod-1", "quantity": 5},
+        {"op": "remove", "product_id": "prod-2"},
+        {"op": "add", "product_id": "prod-3", "name": "Gizmo", "price": 1.5, "quantity": 2},
+    ]})
+
+    assert response.status_code == 200
+    order = response.get_json()
+    assert [(item["product_id"], item["quantity"]) for item in order["items"]] == [("prod-1", 5), ("prod-3", 2)]
+    assert order["total_value"] == 53.0
+    assert order["version"] == created["version"] + 1
+    assert response.headers["ETag"] == f'"{order["version"]}"'
+
+
+def test_patch_order_rejects_stale_version(client):
+    created = create_sample_order(client)
+    operations = {"operations": [{"op": "set_quantity", "product_id": "prod-1", "quantity": 3}]}
+    stale_etag = f'"{created["version"]}"'
+    client.patch(f"/api/v1/orders/{created['id']}", headers={"If-Match": stale_etag}, json=operations)
+
+    response = client.patch(f"/api/v1/orders/{created['id']}", headers={"If-Match": stale_etag}, json=operations)
+
+    assert response.status_code == 412
+    assert "error" in response.get_json()
+
+
+def test_patch_order_requires_the_version_it_is_based_on(client):
+    created = create_sample_order(client)
+
+    response = client.patch(f"/api/v1/orders/{created['id']}",
+                            json={"operations": [{"op": "set_quantity", "product_id": "prod-1", "quantity": 3}]})
+
+    assert response.status_code == 428
+    assert "error" in response.get_json()
+    assert client.get(f"/api/v1/orders/{created['id']}").get_json()["version"] == created["version"]
+
+
+@pytest.mark.parametrize("operations", [
+    [],
+    [{"op": "rename", "product_id": "prod-1"}],
+    [{"op": "set_quantity", "product_id": "prod-1", "quantity": 0}],
+    [{"op": "remove", "product_id": "prod-9"}],
+    [{"op": "remove", "product_id": "prod-1"}],
+])
+def test_patch_order_rejects_invalid_operations(client, operations):
+    created = create_sample_order(client)
+
+    response = client.patch(f"/api/v1/orders/{created['id']}", headers={"If-Match": f'"{created["version"]}"'},
+                            json={"operations": operations})
+
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+    assert client.get(f"/api/v1/orders/{created['id']}").get_json()["version"] == created["version"]
+
+
+def test_order_events_return_changes_after_since(client):
+    since = client.get("/api/v1/orders/events").get_json()["next_since"]
+    created = create_sample_order(client)
+    client.patch(f"/api/v1/orders/{created['id']}", headers={"If-Match": f'"{created["version"]}"'},
+                 json={"operations": [{"op": "set_quantity", "product_id": "prod-1", "quantity": 3}]})
+    client.delete(f"/api/v1/orders/{created['id']}")
+
+    response = client.get(f"/api/v1/orders/events?since={since}")
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [event["type"] for event in data["events"]] == ["created", "updated", "cancelled"]
+    assert [event["order"]["version"] for event in data["events"]] == [1, 2, 3]
+    stream_id, seq = since.split(":")
+    assert data["next_since"] == f"{stream_id}:{int(seq) + 3}"
+    assert data["events"][-1]["cursor"] == data["next_since"]
+    assert client.get(f"/api/v1/orders/events?since={data['next_since']}").get_json()["events"] == []
+
+
+def test_order_events_wait_for_next_change(client):
+    since = client.get("/api/v1/orders/events").get_json()["next_since"]
+    timer = threading.Timer(0.05, create_order,
+                            [[OrderItem(product_id="prod-1", name="Widget", price=1.0, quantity=1)]])
+    timer.start()
+
+    response = client.get(f"/api/v1/orders/events?since={since}&wait=5")
+    timer.join()
+
+    assert [event["type"] for event in response.get_json()["events"]] == ["created"]
+
+
+def test_order_event_stream_sends_server_sent_events(client):
+    since = client.get("/api/v1/orders/events").get_json()["next_since"]
+    created = create_sample_order(client)
+
+    response = client.get(f"/api/v1/orders/events/stream?since={since}")
+    chunks = response.response
+    next(chunks)
+    event = next(chunks).decode()
+    response.close()
+
+    assert response.mimetype == "text/event-stream"
+    stream_id, seq = since.split(":")
+    assert event.startswith(f"id: {stream_id}:{int(seq) + 1}\nevent: created\ndata: ")
+    assert json.loads(event.split("data: ", 1)[1])["order"]["id"] == created["id"]
+
+
+@pytest.mark.parametrize("query", ["since=-1", "since=abc", "since=5", "limit=0", "wait=61"])
+def test_order_events_reject_invalid_or_unknown_positions(client, query):
+    response = client.get(f"/api/v1/orders/events?{query}")
+
+    assert response.status_code in (400, 410)
+    assert "error" in response.get_json()
+
+
+def test_order_event_stream_resumes_from_last_event_id_over_since(client):
+    first = create_sample_order(client)
+    second = create_sample_order(client)
+    first_event = client.get("/api/v1/orders/events?since=0").get_json()["events"][-2]
+    assert first_event["order"]["id"] == first["id"]
+
+    response = client.get("/api/v1/orders/events/stream?since=0", headers={"Last-Event-ID": first_event["cursor"]})
+    chunks = response.response
+    next(chunks)
+    event = next(chunks).decode()
+    response.close()
+
+    assert json.loads(event.split("data: ", 1)[1])["order"]["id"] == second["id"]
+
+
+def test_order_events_reject_cursor_of_another_process(client):
+    since = client.get("/api/v1/orders/events").get_json()["next_since"]
+    seq = int(since.split(":")[1])
+    create_sample_order(client)
+
+    # The same sequence number issued by an earlier process or another worker, e.g. before a restart
+    response = client.get(f"/api/v1/orders/events?since=00000000:{seq}")
+    ahead = client.get(f"/api/v1/orders/events?since={since.split(':')[0]}:{seq + 100}")
+
+    assert response.status_code == 410
+    assert since.split(":")[0] in response.get_json()["error"]
+    assert ahead.status_code == 410
+
+
+def test_order_event_log_expires_events_that_left_the_buffer():
+    events = OrderEventLog(capacity=2)
+    order = create_order([OrderItem(product_id="prod-1", name="Widget", price=1.0, quantity=1)])
+    for _ in range(3):
+        events.publish("updated", order)
+
+    assert [event.seq for event in events.read(1, 10)] == [2, 3]
+    with pytest.raises(EventsExpired):
+        events.read(0, 10)
+
+
+def test_concurrent_modifications_of_one_order_are_not_lost():
+    store = ShardedOrderStore(shard_count=4)
+    order = create_order([OrderItem(product_id="prod-1", name="Widget", price=1.0, quantity=0)])
+    store.add(order)
+
+    def increment_quantity(current):
+        current.items = [OrderItem(product_id="prod-1", name="Widget", price=1.0,
+                                   quantity=current.items[0].quantity + 1)]
+
+    def worker():
+        for _ in range(200):
+            store.modify(order.id, increment_quantity)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert store.get(order.id).items[0].quantity == 1600
+    assert order.items[0].quantity == 0
+
+
+def test_compare_and_update_rejects_stale_order(client):
+    created = create_sample_order(client)
+    stale = get_order(created["id"])
+    client.delete(f"/api/v1/orders/{created['id']}")
+
+    updated = OrderItem(product_id="prod-1", name="Widget", price=1.0, quantity=5)
+    replaced = compare_and_update_order(stale, dataclasses.replace(stale, items=[updated]))
+
+    assert replaced is False
+    assert get_order(created["id"]).status == "cancelled"
+
+
+def open_persistent_store(directory):
+    journal = OrderJournal(directory, fsync_interval=0.001)
+    store = ShardedOrderStore(shard_count=4)
+    store.attach_journal(journal)
+    return store, journal
+
+
+def cancel(order):
+    order.status = OrderStatus.CANCELLED
+
+
+def test_persistent_store_recovers_orders_from_log(tmp_path):
+    store, journal = open_persistent_store(tmp_path)
+    first = create_order([OrderItem(product_id="prod-1", name="Widget", price=1.0, quantity=1)])
+    second = create_order([OrderItem(product_id="prod-2", name="Gadget", price=2.0, quantity=3)])
+    store.add(first)
+    store.add(second)
+    store.modify(first.id, cancel)
+    journal.close()
+
+    recovered, recovered_journal = open_persistent_store(tmp_path)
+    recovered_journal.close()
+
+    assert recovered.get(first.id).status == OrderStatus.CANCELLED
+    assert recovered.get(second.id).to_dict() == second.to_dict()
+    assert [order.id for order in recovered.page()[0]] == [first.id, second.id]
+
+
+def test_persistent_store_compacts_log_into_snapshot(tmp_path):
+    store, journal = open_persistent_store(tmp_path)
+    orders = [create_order([OrderItem(product_id="prod-1", name="Widget", price=1.0, quantity=1)])
+              for _ in range(5)]
+    for order in orders:
+        store.add(order)
+    journal.snapshot()
+    store.modify(orders[0].id, cancel)
+    journal.close()
+
+    assert len(list(tmp_path.glob("snapshot-*.ndjson"))) == 1
+    assert len(list(tmp_path.glob("log-*.ndjson"))) == 1
+
+    recovered, recovered_journal = open_persistent_store(tmp_path)
+    recovered_journal.close()
+
+    assert len(recovered.page()[0]) == 5
+    assert recovered.get(orders[0].id).status == OrderStatus.CANCELLED
+
+
+def test_persistent_store_ignores_incomplete_event_at_end_of_log(tmp_path):
+    store, journal = open_persistent_store(tmp_path)
+    order = create_order([OrderItem(product_id="prod-1", name="Widget", price=1.0, quantity=1)])
+    store.add(order)
+    journal.close()
+    with open(next(tmp_path.glob("log-*.ndjson")), "a") as log:
+        log.write('{"seq": 2, "event": "upd')
+
+    recovered, recovered_journal = open_persistent_store(tmp_path)
+    recovered.modify(order.id, cancel)
+    recovered_journal.close()
+
+    recovered_again, journal_again = open_persistent_store(tmp_path)
+    journal_again.close()
+    assert recovered_again.get(order.id).status == OrderStatus.CANCELLED
+
+
+def add_when_journal_accepts(store, order):
+    # The journal rejects changes until the store has been restored after a failed group commit
+    for _ in range(100):
+        try:
+            return store.add(order)
+        except JournalWriteError:
+            time.sleep(0.01)
+    raise AssertionError("The journal did not accept changes again")
+
+
+def failing_fsync(monkeypatch):
+    disk_full = threading.Event()
+    disk_full.set()
+    real_fsync = os.fsync
+
+    def fsync(descriptor):
+        if disk_full.is_set():
+            raise OSError(errno.ENOSPC, "No space left on device")
+        real_fsync(descriptor)
+
+    monkeypatch.setattr(os, "fsync", fsync)
+    return disk_full
+
+
+def test_persistent_store_drops_changes_the_journal_cannot_write(tmp_path, monkeypatch):
+    store, journal = open_persistent_store(tmp_path)
+    # Created before fsync fails, as create_order also writes to the service's own journal with ORDERS_DATA_DIR set
+    first = create_order([OrderItem(product_id="prod-1", name="Widget", price=1.0, quantity=1)])
+    second = create_order([OrderItem(product_id="prod-2", name="Gadget", price=2.0, quantity=1)])
+    disk_full = failing_fsync(monkeypatch)
+    with pytest.raises(JournalWriteError):
+        store.add(first)
+
+    disk_full.clear()
+    add_when_journal_accepts(store, second)
+    journal.close()
+
+    assert store.get(first.id) is None
+    recovered, recovered_journal = open_persistent_store(tmp_path)
+    recovered_journal.close()
+    assert recovered.get(first.id) is None
+    assert recovered.get(second.id).to_dict() == second.to_dict()
+    # The failed batch was cut off the segment and never written again
+    assert sum(len(log.read_text().splitlines()) for log in tmp_path.glob("log-*.ndjson")) == 1
+
+
+def test_persistent_store_rolls_back_modification_the_journal_cannot_write(tmp_path, monkeypatch):
+    store, journal = open_persistent_store(tmp_path)
+    order = create_order([OrderItem(product_id="prod-1", name="Widget", price=1.0, quantity=1)])
+    other = create_order([OrderItem(product_id="prod-2", name="Gadget", price=2.0, quantity=1)])
+    store.add(order)
+    disk_full = failing_fsync(monkeypatch)
+
+    with pytest.raises(JournalWriteError):
+        store.modify(order.id, cancel)
+    disk_full.clear()
+    add_when_journal_accepts(store, other)
+    journal.close()
+
+    assert store.get(order.id).to_dict() == order.to_dict()
+    recovered, recovered_journal = open_persistent_store(tmp_path)
+    recovered_journal.close()
+    assert recovered.get(order.id).status == OrderStatus.CONFIRMED
+
+
+def test_journal_data_directory_is_used_by_one_journal_at_a_time(tmp_path):
+    store, journal = open_persistent_store(tmp_path)
+
+    with pytest.raises(JournalInUseError):
+        OrderJournal(tmp_path)
+
+    journal.close()
+    OrderJournal(tmp_path).close()
+
+
+def test_sqlite_store_shares_orders_between_store_instances(tmp_path):
+    database = str(tmp_path / "orders.db")
+    writer = SqliteOrderStore(database)
+    reader = SqliteOrderStore(database)
+    orders = [create_order([OrderItem(product_id="prod-1", name="Widget", price=1.0, quantity=quantity)])
+              for quantity in range(1, 4)]
+    for order in orders:
+        writer.add(order)
+    writer.modify(orders[1].id, cancel)
+
+    page, has_more = reader.page(limit=2)
+    cancelled, _ = reader.page(OrderStatus.CANCELLED)
+
+    assert [order.id for order in page] == [orders[0].id, orders[1].id]
+    assert has_more is True
+    assert [order.id for order in cancelled] == [orders[1].id]
+    assert reader.get(orders[2].id).to_dict() == orders[2].to_dict()
+
+
+def test_sqlite_store_shares_idempotency_keys_between_store_instances(tmp_path):
+    database = str(tmp_path / "orders.db")
+    first_worker = SqliteOrderStore(database)
+    second_worker = SqliteOrderStore(database)
+    first = create_order([OrderItem(product_id="prod-1", name="Widget", price=1.0, quantity=1)])
+    retry = create_order([OrderItem(product_id="prod-1", name="Widget", price=1.0, quantity=1)])
+
+    assert first_worker.add_once(first, "checkout-1", fingerprint(b"body"), ttl=60.0) is None
+    assert second_worker.replay("checkout-1", fingerprint(b"body")) == first.to_json()
+    assert second_worker.add_once(retry, "checkout-1", fingerprint(b"body"), ttl=60.0) == first.to_json()
+    with pytest.raises(IdempotencyKeyReused):
+        second_worker.add_once(retry, "checkout-1", fingerprint(b"other body"), ttl=60.0)
+
+    orders, _ = second_worker.page()
+    assert [order.id for order in orders] == [first.id]
+
+
+def test_sqlite_store_forgets_expired_idempotency_keys(tmp_path):
+    store = SqliteOrderStore(str(tmp_path / "orders.db"))
+    first = create_order([OrderItem(product_id="prod-1", name="Widget", price=1.0, quantity=1)])
+    second = create_order([OrderItem(product_id="prod-1", name="Widget", price=1.0, quantity=1)])
+
+    store.add_once(first, "checkout-1", fingerprint(b"body"), ttl=0.0)
+
+    assert store.replay("checkout-1", fingerprint(b"other body")) is None
+    assert store.add_once(second, "checkout-1", fingerprint(b"other body"), ttl=60.0) is None
+    assert store.replay("checkout-1", fingerprint(b"other body")) == second.to_json()
+
+
+def test_sqlite_store_rolls_back_rejected_modification(tmp_path):
+    store = SqliteOrderStore(str(tmp_path / "orders.db"))
+    order = create_order([OrderItem(product_id="prod-1", name="Widget", price=1.0, quantity=1)])
+    store.add(order)
+
+    def reject(current):
+        current.status = OrderStatus.CANCELLED
+        raise InvalidOrderUpdate("rejected")
+
+    with pytest.raises(InvalidOrderUpdate):
+        store.modify(order.id, reject)
+
+    assert store.get(order.id).status == OrderStatus.CONFIRMED
+    assert store.modify("non-existent-id", cancel) is None
+
+
+def test_sqlite_store_keeps_stats_in_step_with_changes(tmp_path):
+    store = SqliteOrderStore(str(tmp_path / "orders.db"))
+    orders = [create_order([OrderItem(product_id="prod-1", name="Widget", price=2.5, quantity=2)])
+              for _ in range(3)]
+    store.add_many(orders)
+    store.modify(orders[0].id, cancel)
+
+    stats = store.stats().to_dict()
+
+    assert stats["by_status"] == {"cancelled": {"orders": 1, "revenue": 5.0},
+                                  "confirmed": {"orders": 2, "revenue": 10.0}}
+    assert stats["by_product"] == {"prod-1": {"orders": 2, "quantity": 4, "revenue": 10.0}}
@@ -0,0 +1,71 @@
+"""Compares catalog lookup cost of a linear scan against the indexed CatalogStore.
+
+Run from the service directory:
+
+    python -m benchmarks.benchmark_catalog_store
+"""
+import random
+import timeit
+
+from products.models import Product
+from products.query import ProductQuery
+from products.repository import CatalogStore
+
+CATALOG_SIZES = [1_000, 10_000, 100_000, 300_000]
+CATEGORIES = ["Mice", "Keyboards", "Monitors", "Headsets", "Cameras", "Accessories", "Laptops", "Audio"]
+LOOKUPS = 1_000
+
+
+def build_catalog(size: int) -> list[Product]:
+    return [
+        Product(id=i, name=f"Product {i}", price=round(random.uniform(5, 2000), 2),
+                category=random.choice(CATEGORIES + [f"Category {i % 500}"]), stock=random.randint(0, 500))
+        for i in range(1, size + 1)
+    ]
+
+
+def linear_get(products: list[Product], product_id: int) -> Product | None:
+    for product in products:
+        if product.id == product_id:
+            return product
+    return None
+
+
+def linear_by_category(products: list[Product], category: str) -> list[Product]:
+    return [p for p in products if p.category.lower() == category.lower()]
+
+
+def scan_cheapest_in_range(products: list[Product], category: str, min_price: float, max_price: float) -> list[Product]:
+    matching = [p for p in products if p.category.lower() == category.lower() and min_price <= p.price <= max_price]
+    return sorted(matching, key=lambda p: p.price)[:20]
+
+
+def per_call_us(statement, number: int) -> float:
+    return min(timeit.repeat(statement, number=number, repeat=3)) / number * 1_000_000
+
+
+def main():
+    random.seed(42)
+    print(f"{'size':>8} | {'scan get':>12} | {'store get':>12} | {'scan category':>14} | {'store category':>15} | "
+          f"{'scan price range':>16} | {'store price range':>17}")
+    price_query = ProductQuery(category="Mice", sort="price", min_price=100, max_price=300, limit=20)
+    for size in CATALOG_SIZES:
+        products = build_catalog(size)
+        store = CatalogStore(products)
+        ids = [random.randint(1, size) for _ in range(LOOKUPS)]
+        scan_number = max(1, LOOKUPS * 1_000 // size)
+
+        scan_get = per_call_us(lambda: [linear_get(products, i) for i in ids[:scan_number]], 1) / scan_number
+        store_get = per_call_us(lambda: [store.get(i) for i in ids], 1) / LOOKUPS
+        scan_category = per_call_us(lambda: linear_by_category(products, "category 7"), 3)
+        store_category = per_call_us(lambda: store.by_category("category 7"), 3)
+        scan_price = per_call_us(lambda: scan_cheapest_in_range(products, "Mice", 100, 300), 3)
+        store_price = per_call_us(lambda: store.query(price_query), 3)
+
+        print(f"{size:>8} | {scan_get:>9.2f} us | {store_get:>9.2f} us | "
+              f"{scan_category:>11.2f} us | {store_category:>12.2f} us | "
+              f"{scan_price:>13.2f} us | {store_price:>14.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Compares startup time and resident memory of the in-memory and columnar catalog backends.
+
+Each backend is loaded in a fresh process. Resident memory is read from /proc, so
+the benchmark needs Linux. Run from the service directory:
+
+    python -m benchmarks.benchmark_columnar_catalog [catalog size]
+"""
+import json
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from products.columnar import ColumnarCatalog, write_catalog_file
+from products.models import Product
+from products.repository import CatalogStore
+
+DEFAULT_CATALOG_SIZE = 300_000
+CATEGORIES = ["Mice", "Keyboards", "Monitors", "Headsets", "Cameras", "Accessories", "Laptops", "Audio"]
+LOOKUPS = 10_000
+
+
+def build_catalog(size: int) -> list[Product]:
+    rng = random.Random(42)
+    return [
+        Product(id=i, name=f"Product {i} {rng.choice(CATEGORIES)} edition", price=round(rng.uniform(5, 2000), 2),
+                category=rng.choice(CATEGORIES), stock=rng.randint(0, 500))
+        for i in range(1, size + 1)
+    ]
+
+
+def resident_memory_mb() -> dict[str, float]:
+    """Returns private (anonymous) and file-backed resident memory; file pages are shared between workers."""
+    fields = dict(line.split(":", 1) for line in Path("/proc/self/status").read_text().splitlines() if ":" in line)
+    return {
+        "private": int(fields["RssAnon"].split()[0]) / 1024,
+        "shared": int(fields["RssFile"].split()[0]) / 1024,
+    }
+
+
+def memory_delta(baseline: dict[str, float]) -> dict[str, float]:
+    current = resident_memory_mb()
+    return {kind: current[kind] - baseline[kind] for kind in baseline}
+
+
+def measure(backend: str, catalog_file: str, size: int) -> dict:
+    # Generating the source products is not part of the in-memory backend's cost, only holding them is
+    products = build_catalog(size) if backend == "memory" else None
+    baseline = resident_memory_mb()
+    started = time.perf_counter()
+    store = CatalogStore(products) if backend == "memory" else ColumnarCatalog(catalog_file)
+    del products
+    startup = time.perf_counter() - started
+    loaded = memory_delta(baseline)
+
+    rng = random.Random(7)
+    started = time.perf_counter()
+    for _ in range(LOOKUPS):
+        store.get(rng.randint(1, size))
+    lookup = (time.perf_counter() - started) / LOOKUPS
+    return {
+        "startup_ms": startup * 1_000,
+        "loaded": loaded,
+        "after_lookups": memory_delta(baseline),
+        "lookup_us": lookup * 1_000_000,
+    }
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_CATALOG_SIZE
+    with tempfile.TemporaryDirectory() as directory:
+        catalog_file = str(Path(directory) / "catalog.bin")
+        write_catalog_file(catalog_file, build_catalog(size))
+        print(f"catalog: {size} products, file size {Path(catalog_file).stat().st_size / 1024 / 1024:.1f} MB")
+        print(f"{'backend':>8} | {'startup':>11} | {'private RSS loaded':>18} | "
+              f"{'private / shared RSS after lookups':>34} | {'get':>8}")
+        for backend in ("memory", "columnar"):
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.benchmark_columnar_catalog", "--measure", backend, catalog_file,
+                 str(size)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            result = json.loads(output)
+            loaded, after_lookups = result["loaded"], result["after_lookups"]
+            print(f"{backend:>8} | {result['startup_ms']:>8.1f} ms | {loaded['private']:>15.1f} MB | "
+                  f"{after_lookups['private']:>15.1f} MB / {after_lookups['shared']:>10.1f} MB | "
+                  f"{result['lookup_us']:>5.2f} us")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 5 and sys.argv[1] == "--measure":
+        print(json.dumps(measure(sys.argv[2], sys.argv[3], int(sys.argv[4]))))
+    else:
+        main()
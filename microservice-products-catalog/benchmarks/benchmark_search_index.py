@@ -0,0 +1,41 @@
+"""Measures full-text search latency of CatalogStore as the catalog grows.
+
+Run from the service directory:
+
+    python -m benchmarks.benchmark_search_index
+"""
+import random
+import timeit
+
+from products.models import Product
+from products.repository import CatalogStore
+
+CATALOG_SIZES = [1_000, 10_000, 100_000, 300_000]
+BRANDS = [f"brand{i}" for i in range(200)]
+NOUNS = ["mouse", "keyboard", "monitor", "headset", "webcam", "laptop", "dock", "hub", "microphone", "speaker"]
+ADJECTIVES = ["wireless", "gaming", "ergonomic", "portable", "compact", "mechanical", "ultrawide", "bluetooth"]
+QUERIES = ["wireless mouse", "brand17 gaming laptop", "portable monitor", "bluetooth speaker brand3"]
+
+
+def build_catalog(size: int) -> list[Product]:
+    return [
+        Product(id=i, name=f"{random.choice(BRANDS)} {random.choice(ADJECTIVES)} {random.choice(NOUNS)} {i}",
+                price=round(random.uniform(5, 2000), 2), category=random.choice(NOUNS), stock=random.randint(0, 500))
+        for i in range(1, size + 1)
+    ]
+
+
+def main():
+    random.seed(42)
+    print(f"{'size':>8} | " + " | ".join(f"{query:>24}" for query in QUERIES))
+    for size in CATALOG_SIZES:
+        store = CatalogStore(build_catalog(size))
+        timings = []
+        for query in QUERIES:
+            seconds = min(timeit.repeat(lambda: store.search(query, 10), number=20, repeat=3)) / 20
+            timings.append(f"{seconds * 1_000:>21.3f} ms")
+        print(f"{size:>8} | " + " | ".join(timings))
+
+
+if __name__ == "__main__":
+    main()
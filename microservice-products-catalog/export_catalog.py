@@ -0,0 +1,11 @@
+import sys
+
+from products.columnar import write_catalog_file
+from products.repository import get_all_products
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python export_catalog.py <catalog-file>")
+    catalog = get_all_products()
+    write_catalog_file(sys.argv[1], catalog)
+    print(f"Wrote {len(catalog)} products to {sys.argv[1]}")
@@ -1,13 +1,21 @@
 from flask import Flask
 
+from products.batch_get_products import register as register_batch_get_products
+from products.export_products import register as register_export_products
 from products.get_product import register as register_get_product
 from products.health_check import register as register_health_check
 from products.list_products import register as register_list_products
+from products.reload_catalog import register as register_reload_catalog
+from products.search_products import register as register_search_products
 
 
 def create_app() -> Flask:
     app = Flask(__name__)
     register_health_check(app)
     register_list_products(app)
+    register_search_products(app)
     register_get_product(app)
+    register_batch_get_products(app)
+    register_export_products(app)
+    register_reload_catalog(app)
     return app
@@ -0,0 +1,32 @@
+from flask import Flask, jsonify, request
+
+from products.repository import get_catalog
+
+MAX_BATCH_SIZE = 100
+
+
+def register(app: Flask) -> None:
+    @app.route("/api/v1/products:batchGet", methods=["POST"])
+    def batch_get_products():
+        data = request.get_json(silent=True)
+
+        if not data or not isinstance(data.get("ids"), list) or not data["ids"]:
+            return jsonify({"error": "Request must contain a non-empty 'ids' list"}), 400
+
+        product_ids = data["ids"]
+        if len(product_ids) > MAX_BATCH_SIZE:
+            return jsonify({"error": f"At most {MAX_BATCH_SIZE} ids can be requested at once"}), 400
+        if not all(isinstance(product_id, int) and not isinstance(product_id, bool) for product_id in product_ids):
+            return jsonify({"error": "Product ids must be integers"}), 400
+
+        catalog = get_catalog()
+        products = []
+        not_found = []
+        for product_id in dict.fromkeys(product_ids):
+            product = catalog.get(product_id)
+            if product:
+                products.append(product.to_dict())
+            else:
+                not_found.append(product_id)
+
+        return jsonify({"products": products, "count": len(products), "not_found": not_found})
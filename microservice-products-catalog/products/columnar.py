@@ -0,0 +1,230 @@
+"""Read-only, memory-mapped columnar catalog backend.
+
+The catalog file stores every product attribute as a separate fixed-width column
+(strings as offsets into a shared blob), with rows sorted by product id. Secondary
+row indexes order the rows by price and by stock, for the whole catalog and
+grouped by category. Opening the file only maps it and reads
+the small category table; Product objects are materialized row by row on demand,
+and every worker process mapping the same file shares one page-cached copy.
+
+Build a catalog file from the currently configured catalog with:
+
+    python export_catalog.py catalog.bin
+"""
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+from products.models import Product
+from products.query import SORT_KEYS, ProductQuery, run_query
+from products.search_index import SearchIndex
+
+MAGIC = b"PCAT"
+FORMAT_VERSION = 2
+
+# magic, format version, row count, category count, then the byte offset of every section
+_HEADER = struct.Struct("<4sIQQ13Q")
+_SECTIONS = ("ids", "prices", "stocks", "category_codes", "name_offsets", "names",
+             "category_offsets", "category_names", "category_rows", "price_rows", "stock_rows",
+             "category_price_rows", "category_stock_rows")
+
+
+class ReadOnlyCatalogError(TypeError):
+    """Raised when a columnar catalog is asked to change."""
+
+
+class ColumnarCatalog:
+    """Catalog backend reading products straight from a memory-mapped columnar file.
+
+    Exposes the same read methods as CatalogStore; the catalog is immutable and
+    is replaced by writing a new file.
+    """
+
+    def __init__(self, path: str | Path, version: int = 0):
+        self.version = version
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, format_version, rows, categories, *offsets = _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a columnar catalog file (format {FORMAT_VERSION})")
+        sections = dict(zip(_SECTIONS, offsets))
+
+        view = memoryview(self._mmap)
+
+        def column(section: str, length: int, typecode: str) -> memoryview:
+            start = sections[section]
+            return view[start:start + length * array(typecode).itemsize].cast(typecode)
+
+        self._rows = rows
+        self._ids = column("ids", rows, "q")
+        self._prices = column("prices", rows, "d")
+        self._stocks = column("stocks", rows, "q")
+        self._category_codes = column("category_codes", rows, "I")
+        self._name_offsets = column("name_offsets", rows + 1, "Q")
+        self._names = view[sections["names"]:]
+        # sort -> (rows of the whole catalog in sort order, rows grouped by category in sort order)
+        self._row_indexes = {
+            "id": (range(rows), column("category_rows", rows, "I")),
+            "price": (column("price_rows", rows, "I"), column("category_price_rows", rows, "I")),
+            "stock": (column("stock_rows", rows, "I"), column("category_stock_rows", rows, "I")),
+        }
+        # Same keys as products.query.SORT_KEYS, read straight from the columns
+        self._row_sort_keys = {
+            "id": lambda row: (self._ids[row],),
+            "price": lambda row: (self._prices[row], self._ids[row]),
+            "stock": lambda row: (self._stocks[row], self._ids[row]),
+        }
+
+        category_offsets = column("category_offsets", (categories + 1) * 2, "Q")
+        category_names = view[sections["category_names"]:]
+        self._categories: list[str] = []
+        self._category_ranges: dict[str, tuple[int, int]] = {}
+        for code in range(categories):
+            name_start, name_end = category_offsets[code * 2], category_offsets[code * 2 + 2]
+            name = bytes(category_names[name_start:name_end]).decode()
+            self._categories.append(name)
+            self._category_ranges[name.casefold()] = (category_offsets[code * 2 + 1],
+                                                      category_offsets[code * 2 + 3])
+        self._search_index: SearchIndex | None = None
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def get(self, product_id: int) -> Product | None:
+        row = bisect_left(self._ids, product_id)
+        if row < self._rows and self._ids[row] == product_id:
+            return self._product(row)
+        return None
+
+    def all(self) -> list[Product]:
+        return [self._product(row) for row in range(self._rows)]
+
+    def by_category(self, category: str) -> list[Product]:
+        start, end = self._category_ranges.get(category.casefold(), (0, 0))
+        category_rows = self._row_indexes["id"][1]
+        return [self._product(category_rows[position]) for position in range(start, end)]
+
+    def iter_products(self, category: str | None = None) -> Iterator[Product]:
+        """Yields products in id order, optionally of one category, materializing one row at a time."""
+        if category:
+            start, end = self._category_ranges.get(category.casefold(), (0, 0))
+            category_rows = self._row_indexes["id"][1]
+            rows = (category_rows[position] for position in range(start, end))
+        else:
+            rows = range(self._rows)
+        for row in rows:
+            yield self._product(row)
+
+    def query(self, query: ProductQuery) -> tuple[list[Product], bool]:
+        catalog_rows, category_rows = self._row_indexes[query.sort]
+        if query.category:
+            start, end = self._category_ranges.get(query.category.casefold(), (0, 0))
+            rows = category_rows[start:end]
+        else:
+            rows = catalog_rows
+        return run_query(query, rows, self._row_sort_keys[query.sort], self._product)
+
+    def search(self, query: str, limit: int) -> list[Product]:
+        # The search index is built on first use, so only deployments that search pay for it
+        if self._search_index is None:
+            search_index = SearchIndex()
+            for row in range(self._rows):
+                search_index.add(self._ids[row], self._name(row), self._categories[self._category_codes[row]])
+            self._search_index = search_index
+        return [self.get(product_id) for product_id in self._search_index.search(query, limit)]
+
+    def copy(self) -> "ColumnarCatalog":
+        raise ReadOnlyCatalogError("The columnar catalog is read-only, write a new catalog file instead")
+
+    def add_product(self, product: Product) -> None:
+        raise ReadOnlyCatalogError("The columnar catalog is read-only, write a new catalog file instead")
+
+    def remove_product(self, product_id: int) -> Product | None:
+        raise ReadOnlyCatalogError("The columnar catalog is read-only, write a new catalog file instead")
+
+    def _name(self, row: int) -> str:
+        return bytes(self._names[self._name_offsets[row]:self._name_offsets[row + 1]]).decode()
+
+    def _product(self, row: int) -> Product:
+        return Product(
+            id=self._ids[row],
+            name=self._name(row),
+            price=self._prices[row],
+            category=self._categories[self._category_codes[row]],
+            stock=self._stocks[row],
+        )
+
+
+def write_catalog_file(path: str | Path, products: Iterable[Product]) -> None:
+    """Writes products into a columnar catalog file readable by ColumnarCatalog."""
+    if sys.byteorder != "little":
+        raise RuntimeError("Columnar catalog files are only supported on little-endian platforms")
+
+    products = sorted(products, key=lambda p: p.id)
+    category_codes: dict[str, int] = {}
+    categories: list[str] = []
+    for product in products:
+        if product.category.casefold() not in category_codes:
+            category_codes[product.category.casefold()] = len(categories)
+            categories.append(product.category)
+
+    names = bytearray()
+    name_offsets = array("Q", [0])
+    for product in products:
+        names += product.name.encode()
+        name_offsets.append(len(names))
+
+    codes = array("I", (category_codes[p.category.casefold()] for p in products))
+    row_indexes = {}
+    for sort, sort_key in SORT_KEYS.items():
+        row_indexes[sort] = array("I", sorted(range(len(products)), key=lambda row: sort_key(products[row])))
+        row_indexes[f"category_{sort}"] = array(
+            "I", sorted(range(len(products)), key=lambda row: (codes[row], *sort_key(products[row])))
+        )
+    category_rows = row_indexes["category_id"]
+
+    # Per category: start of its name in the names blob and start of its rows in category_rows
+    category_names = bytearray()
+    category_offsets = array("Q")
+    row_start = 0
+    for code, category in enumerate(categories):
+        category_offsets.extend((len(category_names), row_start))
+        category_names += category.encode()
+        while row_start < len(category_rows) and codes[category_rows[row_start]] == code:
+            row_start += 1
+    category_offsets.extend((len(category_names), row_start))
+
+    sections = {
+        "ids": array("q", (p.id for p in products)).tobytes(),
+        "prices": array("d", (p.price for p in products)).tobytes(),
+        "stocks": array("q", (p.stock for p in products)).tobytes(),
+        "category_codes": codes.tobytes(),
+        "name_offsets": name_offsets.tobytes(),
+        "names": bytes(names),
+        "category_offsets": category_offsets.tobytes(),
+        "category_names": bytes(category_names),
+        "category_rows": category_rows.tobytes(),
+        "price_rows": row_indexes["price"].tobytes(),
+        "stock_rows": row_indexes["stock"].tobytes(),
+        "category_price_rows": row_indexes["category_price"].tobytes(),
+        "category_stock_rows": row_indexes["category_stock"].tobytes(),
+    }
+
+    offsets = []
+    position = _HEADER.size
+    for name in _SECTIONS:
+        position += -position % 8
+        offsets.append(position)
+        position += len(sections[name])
+
+    with open(path, "wb") as file:
+        file.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(products), len(categories), *offsets))
+        for offset, name in zip(offsets, _SECTIONS):
+            file.write(b"\0" * (offset - file.tell()))
+            file.write(sections[name])
+
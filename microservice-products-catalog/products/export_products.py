@@ -0,0 +1,31 @@
+import json
+
+from flask import Flask, Response, request
+
+from products.repository import get_catalog
+
+# Encoded lines are sent in chunks of about this many bytes instead of one write per product
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+
+def register(app: Flask) -> None:
+    @app.route("/api/v1/products:export", methods=["GET"])
+    def export_products():
+        category_filter = request.args.get("category")
+        catalog = get_catalog()
+
+        def generate():
+            chunk = []
+            chunk_size = 0
+            for product in catalog.iter_products(category_filter):
+                line = json.dumps(product.to_dict(), separators=(",", ":")) + "\n"
+                chunk.append(line)
+                chunk_size += len(line)
+                if chunk_size >= EXPORT_CHUNK_SIZE:
+                    yield "".join(chunk)
+                    chunk = []
+                    chunk_size = 0
+            if chunk:
+                yield "".join(chunk)
+
+        return Response(generate(), mimetype="application/x-ndjson")
@@ -1,12 +1,14 @@
 from flask import Flask, jsonify
 
-from products.repository import get_product
+from products.repository import get_catalog
+from products.response_cache import cached_json_response
 
 
 def register(app: Flask) -> None:
     @app.route("/api/v1/products/<int:product_id>", methods=["GET"])
     def get_product_by_id(product_id: int):
-        product = get_product(product_id)
+        catalog = get_catalog()
+        product = catalog.get(product_id)
         if not product:
             return jsonify({"error": "Product not found"}), 404
-        return jsonify(product.to_dict())
+        return cached_json_response(catalog.version, ("get_product", product_id), product.to_dict)
@@ -1,11 +1,115 @@
 from flask import Flask, jsonify, request
 
-from products.repository import get_all_products
+from products.models import PRODUCT_FIELDS
+from products.pagination import decode_cursor, encode_cursor
+from products.query import SORT_KEYS, ProductQuery
+from products.repository import get_catalog
+from products.response_cache import cached_json_response
+
+MAX_PAGE_SIZE = 1000
 
 
 def register(app: Flask) -> None:
     @app.route("/api/v1/products", methods=["GET"])
     def list_products():
         category_filter = request.args.get("category")
-        products = get_all_products(category_filter)
-        return jsonify({"products": [p.to_dict() for p in products], "count": len(products)})
+
+        try:
+            limit = parse_limit(request.args.get("limit"))
+            projection = parse_fields(request.args.get("fields"))
+            min_price = parse_price("min_price", request.args.get("min_price"))
+            max_price = parse_price("max_price", request.args.get("max_price"))
+            price_filtered = min_price is not None or max_price is not None
+            sort, descending = parse_sort(request.args.get("sort"), price_filtered)
+            in_stock = parse_bool("in_stock", request.args.get("in_stock"))
+            after = parse_cursor(request.args.get("cursor"), sort)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        query = ProductQuery(
+            category=category_filter.casefold() if category_filter else None,
+            sort=sort,
+            descending=descending,
+            min_price=min_price,
+            max_price=max_price,
+            in_stock=in_stock,
+            after=after,
+            limit=limit,
+        )
+
+        catalog = get_catalog()
+
+        def build_payload() -> dict:
+            products, has_more = catalog.query(query)
+            payload = {"products": [p.to_dict(projection) for p in products], "count": len(products)}
+            if limit is not None or after is not None:
+                payload["next_cursor"] = encode_cursor(*query.sort_key(products[-1])) if has_more else None
+            return payload
+
+        cache_key = ("list_products", query, tuple(projection) if projection else None)
+        return cached_json_response(catalog.version, cache_key, build_payload)
+
+
+def parse_limit(value: str | None) -> int | None:
+    if value is None:
+        return None
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError(f"Invalid limit: {value}") from None
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"Limit must be between 1 and {MAX_PAGE_SIZE}")
+    return limit
+
+
+def parse_price(name: str, value: str | None) -> float | None:
+    if value is None:
+        return None
+    try:
+        price = float(value)
+    except ValueError:
+        raise ValueError(f"Invalid {name}: {value}") from None
+    if not 0 <= price < float("inf"):
+        raise ValueError(f"Invalid {name}: {value}")
+    return price
+
+
+def parse_sort(value: str | None, price_filtered: bool) -> tuple[str, bool]:
+    """Returns the sort order and whether it is descending; price filters default to sorting by price."""
+    if value is None:
+        return ("price" if price_filtered else "id"), False
+    descending = value.startswith("-")
+    sort = value.removeprefix("-")
+    if sort not in SORT_KEYS:
+        raise ValueError(f"Invalid sort: {value}. Allowed sorts: {', '.join(SORT_KEYS)}, prefixed with '-' for "
+                         f"descending order")
+    return sort, descending
+
+
+def parse_bool(name: str, value: str | None) -> bool:
+    if value is None or value.lower() in ("false", "0"):
+        return False
+    if value.lower() in ("true", "1"):
+        return True
+    raise ValueError(f"Invalid {name}: {value}")
+
+
+def parse_cursor(value: str | None, sort: str) -> tuple | None:
+    if value is None:
+        return None
+    key = decode_cursor(value)
+    key_length = 1 if sort == "id" else 2
+    if (len(key) != key_length or not isinstance(key[-1], int)
+            or not all(isinstance(part, (int, float)) and not isinstance(part, bool) for part in key)):
+        raise ValueError(f"Invalid cursor: {value}")
+    return tuple(key)
+
+
+def parse_fields(value: str | None) -> list[str] | None:
+    if value is None:
+        return None
+    projection = [field.strip() for field in value.split(",") if field.strip()]
+    unknown = [field for field in projection if field not in PRODUCT_FIELDS]
+    if not projection or unknown:
+        raise ValueError(f"Invalid fields: {value}. Allowed fields: {', '.join(PRODUCT_FIELDS)}")
+    return projection
@@ -1,4 +1,5 @@
-from dataclasses import dataclass
+from collections.abc import Sequence
+from dataclasses import dataclass, fields
 
 
 @dataclass
@@ -9,7 +10,9 @@ class Product:
     category: str
     stock: int
 
-    def to_dict(self) -> dict:
+    def to_dict(self, projection: Sequence[str] | None = None) -> dict:
+        if projection is not None:
+            return {field: getattr(self, field) for field in projection}
         return {
             "id": self.id,
             "name": self.name,
@@ -17,3 +20,6 @@ class Product:
             "category": self.category,
             "stock": self.stock,
         }
+
+
+PRODUCT_FIELDS = tuple(field.name for field in fields(Product))
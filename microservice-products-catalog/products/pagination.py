@@ -0,0 +1,19 @@
+import base64
+import json
+
+
+def encode_cursor(*key) -> str:
+    """Encodes the sort key of the last returned product into an opaque cursor."""
+    raw = json.dumps(list(key), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(key, list):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return key
@@ -0,0 +1,67 @@
+import math
+from bisect import bisect_left, bisect_right
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+
+from products.models import Product
+
+# Sort key of a product for every supported sort order; the id makes each key unique
+SORT_KEYS: dict[str, Callable[[Product], tuple]] = {
+    "id": lambda product: (product.id,),
+    "price": lambda product: (product.price, product.id),
+    "stock": lambda product: (product.stock, product.id),
+}
+
+
+@dataclass(frozen=True)
+class ProductQuery:
+    category: str | None = None
+    sort: str = "id"
+    descending: bool = False
+    min_price: float | None = None
+    max_price: float | None = None
+    in_stock: bool = False
+    after: tuple | None = None
+    limit: int | None = None
+
+    def sort_key(self, product: Product) -> tuple:
+        return SORT_KEYS[self.sort](product)
+
+    def matches(self, product: Product) -> bool:
+        return ((self.min_price is None or product.price >= self.min_price)
+                and (self.max_price is None or product.price <= self.max_price)
+                and (not self.in_stock or product.stock > 0))
+
+
+def run_query(query: ProductQuery, index: Sequence, key: Callable[[object], tuple],
+              product: Callable[[object], Product]) -> tuple[list[Product], bool]:
+    """Runs the query over an index sorted by the query's sort key.
+
+    Range conditions on the sort column and the cursor are resolved with bisect,
+    so only entries inside the requested range are visited. Returns the page of
+    products and whether more matching products follow it.
+    """
+    lo, hi = 0, len(index)
+    if query.sort == "price":
+        if query.min_price is not None:
+            lo = bisect_left(index, (query.min_price,), key=key)
+        if query.max_price is not None:
+            hi = bisect_right(index, (query.max_price, math.inf), key=key)
+    elif query.sort == "stock" and query.in_stock:
+        lo = bisect_left(index, (1,), key=key)
+
+    if query.after is not None:
+        if query.descending:
+            hi = min(hi, bisect_left(index, query.after, lo, hi, key=key))
+        else:
+            lo = max(lo, bisect_right(index, query.after, lo, hi, key=key))
+
+    products = []
+    for position in (range(hi - 1, lo - 1, -1) if query.descending else range(lo, hi)):
+        candidate = product(index[position])
+        if not query.matches(candidate):
+            continue
+        if len(products) == query.limit:
+            return products, True
+        products.append(candidate)
+    return products, False
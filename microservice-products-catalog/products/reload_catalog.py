@@ -0,0 +1,140 @@
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable
+from functools import partial
+
+from flask import Flask, jsonify, request
+
+from products.columnar import ColumnarCatalog
+from products.models import Product
+from products.repository import PRODUCTS_CATALOG_FILE, CatalogStore, get_catalog, publish_catalog
+
+logger = logging.getLogger(__name__)
+
+# Poll PRODUCTS_CATALOG_FILE every given number of seconds and reload it when it is replaced; 0 disables watching
+PRODUCTS_CATALOG_WATCH_INTERVAL = float(os.environ.get("PRODUCTS_CATALOG_WATCH_INTERVAL", "0"))
+
+
+class CatalogReloader:
+    """Builds a new catalog snapshot on a background thread and publishes it once fully built.
+
+    Requests keep being served from the current snapshot while a reload runs;
+    at most one reload runs at a time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reloading = False
+        self.last_error: str | None = None
+
+    @property
+    def reloading(self) -> bool:
+        return self._reloading
+
+    def start(self, build: Callable[[], CatalogStore | ColumnarCatalog]) -> bool:
+        """Starts building and publishing a snapshot; returns False if a reload is already running."""
+        with self._lock:
+            if self._reloading:
+                return False
+            self._reloading = True
+        threading.Thread(target=self._reload, args=(build,), name="catalog-reload", daemon=True).start()
+        return True
+
+    def _reload(self, build: Callable[[], CatalogStore | ColumnarCatalog]) -> None:
+        try:
+            publish_catalog(build())
+            self.last_error = None
+        except Exception as e:
+            logger.exception("Catalog reload failed")
+            self.last_error = str(e)
+        finally:
+            with self._lock:
+                self._reloading = False
+
+
+_reloader = CatalogReloader()
+_watcher_started = False
+
+
+def register(app: Flask) -> None:
+    start_catalog_file_watcher()
+
+    @app.route("/api/v1/admin/catalog", methods=["GET"])
+    def catalog_status():
+        catalog = get_catalog()
+        return jsonify({
+            "version": catalog.version,
+            "count": len(catalog),
+            "reloading": _reloader.reloading,
+            "last_reload_error": _reloader.last_error,
+        })
+
+    @app.route("/api/v1/admin/catalog:reload", methods=["POST"])
+    def reload_catalog():
+        data = request.get_json(silent=True)
+
+        if data and "products" in data:
+            # Only this worker's snapshot is replaced; with several workers, reload from the catalog file instead
+            try:
+                products = parse_products(data["products"])
+            except (KeyError, TypeError, ValueError) as e:
+                return jsonify({"error": f"Invalid product data: {str(e)}"}), 400
+            build = partial(CatalogStore, products)
+        elif PRODUCTS_CATALOG_FILE:
+            build = partial(ColumnarCatalog, PRODUCTS_CATALOG_FILE)
+        else:
+            return jsonify({"error": "Request must contain 'products' when no catalog file is configured"}), 400
+
+        if not _reloader.start(build):
+            return jsonify({"error": "Catalog reload already in progress"}), 409
+        return jsonify({"status": "reloading", "version": get_catalog().version}), 202
+
+
+def parse_products(products_data: list[dict]) -> list[Product]:
+    if not isinstance(products_data, list):
+        raise TypeError("'products' must be a list")
+    products = []
+    for product in products_data:
+        products.append(
+            Product(
+                id=int(product["id"]),
+                name=str(product["name"]),
+                price=float(product["price"]),
+                category=str(product["category"]),
+                stock=int(product["stock"]),
+            )
+        )
+    return products
+
+
+def start_catalog_file_watcher() -> None:
+    """Reloads the columnar catalog file whenever it is replaced, if watching is configured.
+
+    Replace the file atomically (write a new file, then rename it over the old one):
+    snapshots still being read keep the previous file mapped.
+    """
+    global _watcher_started
+    if _watcher_started or not PRODUCTS_CATALOG_FILE or PRODUCTS_CATALOG_WATCH_INTERVAL <= 0:
+        return
+    _watcher_started = True
+
+    def watch() -> None:
+        last_signature = _file_signature(PRODUCTS_CATALOG_FILE)
+        while True:
+            time.sleep(PRODUCTS_CATALOG_WATCH_INTERVAL)
+            signature = _file_signature(PRODUCTS_CATALOG_FILE)
+            if signature and signature != last_signature and _reloader.start(
+                    partial(ColumnarCatalog, PRODUCTS_CATALOG_FILE)):
+                last_signature = signature
+
+    threading.Thread(target=watch, name="catalog-file-watcher", daemon=True).start()
+
+
+def _file_signature(path: str) -> tuple[int, int, int] | None:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
@@ -1,6 +1,14 @@
+import os
+import threading
+from bisect import bisect_left, insort
+from collections.abc import Callable, Iterable, Iterator
+
+from products.columnar import ColumnarCatalog
 from products.models import Product
+from products.query import SORT_KEYS, ProductQuery, run_query
+from products.search_index import SearchIndex
 
-# In-memory product catalog
+# Seed data for the in-memory product catalog
 _products: list[Product] = [
     Product(id=1, name="Wireless Gaming Mouse", price=59.99, category="Mice", stock=150),
     Product(id=2, name="Mechanical Gaming Keyboard", price=129.99, category="Keyboards", stock=80),
@@ -35,14 +43,168 @@ _products: list[Product] = [
 ]
 
 
+class CatalogStore:
+    """In-memory catalog indexed by product id, by normalized category and for full-text search.
+
+    All indexes are built once when the store is loaded and kept current by
+    add_product / remove_product, so lookups never scan the whole catalog.
+    For every sort order the store keeps product ids sorted by that order, for
+    the whole catalog and per category, so queries are answered with bisect.
+    The version is bumped on every change so derived data can be invalidated.
+
+    A store published by the repository is never modified again; changes are
+    applied to a copy which is then published in its place. Copies share their
+    index lists and search postings with the store they were copied from, and
+    a change copies only the lists it touches.
+    """
+
+    def __init__(self, products: Iterable[Product] = (), version: int = 0):
+        self.version = version
+        self._by_id: dict[int, Product] = {product.id: product for product in products}
+        # sort -> category (None for the whole catalog) -> product ids ordered by the sort key
+        self._indexes: dict[str, dict[str | None, list[int]]] = {}
+        for sort, sort_key in SORT_KEYS.items():
+            scopes: dict[str | None, list[int]] = {None: []}
+            for product in sorted(self._by_id.values(), key=sort_key):
+                scopes[None].append(product.id)
+                scopes.setdefault(_normalize_category(product.category), []).append(product.id)
+            self._indexes[sort] = scopes
+        # (sort, scope) of the index lists that belong to this store alone and can be changed in place
+        self._owned_lists: set[tuple[str, str | None]] = {
+            (sort, scope) for sort, scopes in self._indexes.items() for scope in scopes
+        }
+        self._search_index = SearchIndex((p.id, p.name, p.category) for p in self._by_id.values())
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def get(self, product_id: int) -> Product | None:
+        return self._by_id.get(product_id)
+
+    def all(self) -> list[Product]:
+        return [self._by_id[product_id] for product_id in self._indexes["id"][None]]
+
+    def by_category(self, category: str) -> list[Product]:
+        ids = self._indexes["id"].get(_normalize_category(category), [])
+        return [self._by_id[product_id] for product_id in ids]
+
+    def iter_products(self, category: str | None = None) -> Iterator[Product]:
+        """Yields products in id order, optionally of one category, without building a list."""
+        scope = _normalize_category(category) if category else None
+        for product_id in self._indexes["id"].get(scope, []):
+            yield self._by_id[product_id]
+
+    def query(self, query: ProductQuery) -> tuple[list[Product], bool]:
+        scope = _normalize_category(query.category) if query.category else None
+        return run_query(query, self._indexes[query.sort].get(scope, []), self._id_sort_key(query.sort),
+                         self._by_id.__getitem__)
+
+    def search(self, query: str, limit: int) -> list[Product]:
+        return [self._by_id[product_id] for product_id in self._search_index.search(query, limit)]
+
+    def add_product(self, product: Product) -> None:
+        self.remove_product(product.id)
+        self.version += 1
+        self._by_id[product.id] = product
+        for sort, scopes in self._indexes.items():
+            for scope in (None, _normalize_category(product.category)):
+                insort(self._own_list(sort, scope), product.id, key=self._id_sort_key(sort))
+        self._search_index.add(product.id, product.name, product.category)
+
+    def remove_product(self, product_id: int) -> Product | None:
+        product = self._by_id.get(product_id)
+        if product:
+            self.version += 1
+            for sort, scopes in self._indexes.items():
+                for scope in (None, _normalize_category(product.category)):
+                    ids = self._own_list(sort, scope)
+                    del ids[bisect_left(ids, SORT_KEYS[sort](product), key=self._id_sort_key(sort))]
+                    if scope and not ids:
+                        del scopes[scope]
+                        self._owned_lists.discard((sort, scope))
+            self._search_index.remove(product_id)
+            del self._by_id[product_id]
+        return product
+
+    def copy(self) -> "CatalogStore":
+        """Returns a copy of the store that shares all index lists with it instead of copying or rebuilding them."""
+        clone = CatalogStore.__new__(CatalogStore)
+        clone.version = self.version
+        clone._by_id = dict(self._by_id)
+        clone._indexes = {sort: dict(scopes) for sort, scopes in self._indexes.items()}
+        clone._owned_lists = set()
+        clone._search_index = self._search_index.copy()
+        self._owned_lists = set()
+        return clone
+
+    def _own_list(self, sort: str, scope: str | None) -> list[int]:
+        """Returns an index list for changing it, copying it first if it is shared with another store."""
+        scopes = self._indexes[sort]
+        if (sort, scope) not in self._owned_lists:
+            scopes[scope] = list(scopes.get(scope, []))
+            self._owned_lists.add((sort, scope))
+        return scopes[scope]
+
+    def _id_sort_key(self, sort: str) -> Callable[[int], tuple]:
+        sort_key = SORT_KEYS[sort]
+        return lambda product_id: sort_key(self._by_id[product_id])
+
+
+def _normalize_category(category: str) -> str:
+    return category.casefold()
+
+
+# Set PRODUCTS_CATALOG_FILE to serve a columnar catalog file (see products/columnar.py) instead of the sample data
+PRODUCTS_CATALOG_FILE = os.environ.get("PRODUCTS_CATALOG_FILE")
+
+# The published catalog snapshot. Readers take the reference once per request and never lock;
+# writers build a new snapshot and publish it with a single reference assignment.
+_store: CatalogStore | ColumnarCatalog = (
+    ColumnarCatalog(PRODUCTS_CATALOG_FILE) if PRODUCTS_CATALOG_FILE else CatalogStore(_products)
+)
+_publish_lock = threading.Lock()
+
+
+def get_catalog() -> CatalogStore | ColumnarCatalog:
+    """Returns the current catalog snapshot; it stays consistent for as long as the caller holds it."""
+    return _store
+
+
+def publish_catalog(catalog: CatalogStore | ColumnarCatalog) -> None:
+    """Atomically replaces the current snapshot with a fully built catalog."""
+    global _store
+    with _publish_lock:
+        catalog.version = _store.version + 1
+        _store = catalog
+
+
 def get_all_products(category_filter: str | None = None) -> list[Product]:
     if category_filter:
-        return [p for p in _products if p.category.lower() == category_filter.lower()]
-    return _products
+        return _store.by_category(category_filter)
+    return _store.all()
 
 
 def get_product(product_id: int) -> Product | None:
-    for product in _products:
-        if product.id == product_id:
-            return product
-    return None
+    return _store.get(product_id)
+
+
+def add_product(product: Product) -> None:
+    _modify_catalog(lambda catalog: catalog.add_product(product))
+
+
+def remove_product(product_id: int) -> Product | None:
+    return _modify_catalog(lambda catalog: catalog.remove_product(product_id))
+
+
+def _modify_catalog(change: Callable[[CatalogStore], Product | None]) -> Product | None:
+    """Applies a change to a copy of the published catalog and publishes the copy.
+
+    Raises ReadOnlyCatalogError while a columnar catalog file is published.
+    """
+    global _store
+    with _publish_lock:
+        catalog = _store.copy()
+        result = change(catalog)
+        catalog.version = _store.version + 1
+        _store = catalog
+    return result
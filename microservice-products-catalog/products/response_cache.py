@@ -0,0 +1,68 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+
+from flask import Response, current_app, request
+
+MAX_CACHED_RESPONSES = 4096
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+
+
+class ResponseCache:
+    """LRU cache of encoded JSON response bodies for a single catalog version.
+
+    Entries are keyed by (endpoint, filter) and the whole cache is dropped as soon
+    as it is accessed with a newer catalog version. A request still holding an
+    older version gets a freshly built response that is not cached, so it cannot
+    throw away the entries of the current version.
+    """
+
+    def __init__(self, max_entries: int = MAX_CACHED_RESPONSES):
+        self._max_entries = max_entries
+        self._version: int | None = None
+        self._entries: OrderedDict[Hashable, CachedResponse] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, version: int, key: Hashable, build: Callable[[], bytes]) -> CachedResponse:
+        with self._lock:
+            if self._version is None or version > self._version:
+                self._entries.clear()
+                self._version = version
+            cached = self._entries.get(key) if version == self._version else None
+            if cached:
+                self._entries.move_to_end(key)
+                return cached
+
+        body = build()
+        cached = CachedResponse(body=body, etag=hashlib.blake2b(body, digest_size=16).hexdigest())
+
+        with self._lock:
+            if version == self._version:
+                self._entries[key] = cached
+                if len(self._entries) > self._max_entries:
+                    self._entries.popitem(last=False)
+        return cached
+
+
+_response_cache = ResponseCache()
+
+
+def cached_json_response(catalog_version: int, key: Hashable, build_payload: Callable[[], dict]) -> Response:
+    """Serves the JSON payload from the response cache of the catalog version, honouring If-None-Match."""
+    cached = _response_cache.get_or_build(
+        catalog_version, key, lambda: current_app.json.dumps(build_payload()).encode() + b"\n"
+    )
+
+    if request.if_none_match.contains_weak(cached.etag):
+        response = Response(status=304)
+    else:
+        response = Response(cached.body, mimetype="application/json")
+    response.set_etag(cached.etag)
+    return response
@@ -0,0 +1,133 @@
+import heapq
+import math
+import re
+from bisect import bisect_left, insort
+from collections.abc import Iterable
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_STOP_WORDS = frozenset({"a", "an", "and", "for", "in", "of", "the", "to", "with"})
+
+NAME_WEIGHT = 2
+CATEGORY_WEIGHT = 1
+
+
+def tokenize(text: str) -> list[str]:
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(text.casefold()):
+        if token in _STOP_WORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class SearchIndex:
+    """Inverted index over product name and category tokens.
+
+    Each token keeps its postings twice: a dict of product id to weighted term
+    frequency for random access, and a list of (-weight, id) kept sorted with
+    bisect so queries can walk postings best-first and stop early once the
+    top-k can no longer change.
+
+    Copies share the postings of every token with the index they were copied
+    from; a token's postings are copied by the first change that touches them.
+    """
+
+    def __init__(self, documents: Iterable[tuple[int, str, str]] = ()):
+        """Bulk-loads (product id, name, category) documents, sorting every posting list once."""
+        self._postings: dict[str, dict[int, int]] = {}
+        self._ranked_postings: dict[str, list[tuple[int, int]]] = {}
+        self._tokens_by_id: dict[int, set[str]] = {}
+        # Tokens whose postings belong to this index alone and can be changed in place
+        self._owned_tokens: set[str] = set()
+        for product_id, (name, category) in {document[0]: document[1:] for document in documents}.items():
+            for token, weight in self._index_document(product_id, name, category):
+                self._ranked_postings[token].append((-weight, product_id))
+        for ranked in self._ranked_postings.values():
+            ranked.sort()
+
+    def add(self, product_id: int, name: str, category: str) -> None:
+        self.remove(product_id)
+        for token, weight in self._index_document(product_id, name, category):
+            insort(self._ranked_postings[token], (-weight, product_id))
+
+    def copy(self) -> "SearchIndex":
+        """Returns a copy sharing all postings with this index, without copying any of them."""
+        clone = SearchIndex()
+        clone._postings = dict(self._postings)
+        clone._ranked_postings = dict(self._ranked_postings)
+        clone._tokens_by_id = dict(self._tokens_by_id)
+        self._owned_tokens = set()
+        return clone
+
+    def _own(self, token: str) -> tuple[dict[int, int], list[tuple[int, int]]]:
+        """Returns the postings of a token for changing them, copying them first if they are shared."""
+        if token not in self._owned_tokens:
+            self._postings[token] = dict(self._postings.get(token, {}))
+            self._ranked_postings[token] = list(self._ranked_postings.get(token, []))
+            self._owned_tokens.add(token)
+        return self._postings[token], self._ranked_postings[token]
+
+    def _index_document(self, product_id: int, name: str, category: str) -> Iterable[tuple[str, int]]:
+        weights: dict[str, int] = {}
+        for token in tokenize(name):
+            weights[token] = weights.get(token, 0) + NAME_WEIGHT
+        for token in tokenize(category):
+            weights[token] = weights.get(token, 0) + CATEGORY_WEIGHT
+        for token, weight in weights.items():
+            self._own(token)[0][product_id] = weight
+        self._tokens_by_id[product_id] = set(weights)
+        return weights.items()
+
+    def remove(self, product_id: int) -> None:
+        for token in self._tokens_by_id.pop(product_id, ()):
+            postings, ranked = self._own(token)
+            del ranked[bisect_left(ranked, (-postings.pop(product_id), product_id))]
+            if not postings:
+                del self._postings[token]
+                del self._ranked_postings[token]
+                self._owned_tokens.discard(token)
+
+    def search(self, query: str, limit: int) -> list[int]:
+        """Returns ids of the best matching products, ranked by TF-IDF score.
+
+        Postings are read best-first, always advancing the term that contributes
+        most to the score bound of products not scored yet, and the walk stops
+        as soon as that bound can no longer beat the current top-k.
+        """
+        document_count = len(self._tokens_by_id)
+        terms = [
+            (math.log(1 + document_count / len(self._postings[token])), self._postings[token],
+             self._ranked_postings[token])
+            for token in set(tokenize(query)) if token in self._postings
+        ]
+        positions = [0] * len(terms)
+        frontier = [-ranked[0][0] * idf for idf, _, ranked in terms]
+
+        best: list[tuple[float, int]] = []
+        scored: set[int] = set()
+        while terms:
+            bound = sum(frontier)
+            if bound == 0.0 or (len(best) == limit and best[0][0] >= bound):
+                break
+            index = frontier.index(max(frontier))
+            idf, _, ranked = terms[index]
+            # The bound only changes once the current weight tier of this term is exhausted
+            while positions[index] < len(ranked) and frontier[index] == -ranked[positions[index]][0] * idf:
+                product_id = ranked[positions[index]][1]
+                positions[index] += 1
+                if product_id in scored:
+                    continue
+                scored.add(product_id)
+                candidate = (sum(postings.get(product_id, 0) * term_idf for term_idf, postings, _ in terms),
+                             -product_id)
+                if len(best) < limit:
+                    heapq.heappush(best, candidate)
+                elif candidate > best[0]:
+                    heapq.heapreplace(best, candidate)
+                if len(best) == limit and best[0][0] >= bound:
+                    break
+            frontier[index] = -ranked[positions[index]][0] * idf if positions[index] < len(ranked) else 0.0
+
+        return [-negative_id for _, negative_id in sorted(best, reverse=True)]
@@ -0,0 +1,33 @@
+from flask import Flask, jsonify, request
+
+from products.repository import get_catalog
+from products.response_cache import cached_json_response
+from products.search_index import tokenize
+
+DEFAULT_SEARCH_LIMIT = 10
+MAX_SEARCH_LIMIT = 100
+
+
+def register(app: Flask) -> None:
+    @app.route("/api/v1/products/search", methods=["GET"])
+    def search_products_route():
+        query = request.args.get("q", "")
+        if not tokenize(query):
+            return jsonify({"error": "Query parameter 'q' must contain at least one search term"}), 400
+
+        limit = request.args.get("limit", DEFAULT_SEARCH_LIMIT)
+        try:
+            limit = int(limit)
+        except ValueError:
+            return jsonify({"error": f"Invalid limit: {limit}"}), 400
+        if not 1 <= limit <= MAX_SEARCH_LIMIT:
+            return jsonify({"error": f"Limit must be between 1 and {MAX_SEARCH_LIMIT}"}), 400
+
+        catalog = get_catalog()
+
+        def build_payload() -> dict:
+            products = catalog.search(query, limit)
+            return {"products": [p.to_dict() for p in products], "count": len(products)}
+
+        cache_key = ("search_products", tuple(sorted(set(tokenize(query)))), limit)
+        return cached_json_response(catalog.version, cache_key, build_payload)
@@ -1,6 +1,15 @@
+import json
+import time
+
 import pytest
 
 from products import create_app
+from products.columnar import ColumnarCatalog, ReadOnlyCatalogError, write_catalog_file
+from products.models import Product
+from products.query import ProductQuery
+from products.repository import (CatalogStore, add_product, get_all_products, get_catalog, get_product, publish_catalog,
+                                 remove_product)
+from products.response_cache import ResponseCache
 
 
 @pytest.fixture
@@ -10,6 +19,22 @@ def client():
         yield client
 
 
+@pytest.fixture
+def restore_catalog():
+    catalog = get_catalog()
+    yield
+    publish_catalog(catalog.copy())
+
+
+def wait_for_reload(client) -> dict:
+    for _ in range(100):
+        status = client.get("/api/v1/admin/catalog").get_json()
+        if not status["reloading"]:
+            return status
+        time.sleep(0.01)
+    raise AssertionError("Catalog reload did not finish")
+
+
 def test_health_check_returns_healthy_status(client):
     response = client.get("/")
 
@@ -55,6 +80,121 @@ def test_list_products_returns_empty_for_nonexistent_category(client):
     assert data["products"] == []
 
 
+def test_list_products_paginates_by_limit_and_cursor(client):
+    first_page = client.get("/api/v1/products?limit=12").get_json()
+
+    assert first_page["count"] == 12
+    assert [p["id"] for p in first_page["products"]] == list(range(1, 13))
+    assert first_page["next_cursor"] is not None
+
+    second_page = client.get(f"/api/v1/products?limit=12&cursor={first_page['next_cursor']}").get_json()
+    assert [p["id"] for p in second_page["products"]] == list(range(13, 25))
+
+    last_page = client.get(f"/api/v1/products?limit=12&cursor={second_page['next_cursor']}").get_json()
+    assert [p["id"] for p in last_page["products"]] == list(range(25, 31))
+    assert last_page["next_cursor"] is None
+
+
+def test_list_products_paginates_within_category(client):
+    first_page = client.get("/api/v1/products?category=laptops&limit=6").get_json()
+    second_page = client.get(f"/api/v1/products?category=laptops&limit=6&cursor={first_page['next_cursor']}").get_json()
+
+    assert [p["id"] for p in first_page["products"]] == [21, 22, 23, 24, 25, 26]
+    assert [p["id"] for p in second_page["products"]] == [27, 28, 29, 30]
+    assert second_page["next_cursor"] is None
+
+
+def test_list_products_filters_by_price_range_sorted_by_price(client):
+    response = client.get("/api/v1/products?category=Monitors&max_price=300")
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [(p["id"], p["price"]) for p in data["products"]] == [(12, 199.99)]
+
+
+def test_list_products_sorts_by_price_descending_across_pages(client):
+    first_page = client.get("/api/v1/products?category=Laptops&sort=-price&limit=3").get_json()
+    second_page = client.get(
+        f"/api/v1/products?category=Laptops&sort=-price&limit=3&cursor={first_page['next_cursor']}"
+    ).get_json()
+
+    assert [p["id"] for p in first_page["products"]] == [30, 23, 21]
+    assert [p["id"] for p in second_page["products"]] == [24, 22, 29]
+
+
+def test_list_products_returns_cheapest_in_stock_products_first(client):
+    add_product(Product(id=31, name="Budget Mouse", price=9.99, category="Mice", stock=0))
+    try:
+        response = client.get("/api/v1/products?category=Mice&sort=price&in_stock=true&limit=2")
+    finally:
+        remove_product(31)
+
+    assert [p["id"] for p in response.get_json()["products"]] == [5, 10]
+
+
+def test_list_products_sorts_by_stock(client):
+    response = client.get("/api/v1/products?sort=stock&min_price=1000&limit=2")
+
+    assert [p["stock"] for p in response.get_json()["products"]] == [20, 22]
+
+
+def test_list_products_projects_requested_fields(client):
+    response = client.get("/api/v1/products?fields=id,price&limit=2")
+
+    assert response.status_code == 200
+    assert response.get_json()["products"] == [{"id": 1, "price": 59.99}, {"id": 2, "price": 129.99}]
+
+
+@pytest.mark.parametrize("query", ["limit=0", "limit=abc", "cursor=not-a-cursor", "fields=id,secret", "min_price=x",
+                                   "max_price=-1", "sort=name", "in_stock=maybe", "sort=price&cursor=WzFd"])
+def test_list_products_rejects_invalid_query_parameters(client, query):
+    response = client.get(f"/api/v1/products?{query}")
+
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_search_products_ranks_best_matches_first(client):
+    response = client.get("/api/v1/products/search?q=wireless mouse")
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["products"][0]["name"] == "Wireless Gaming Mouse"
+    assert {p["id"] for p in data["products"]} >= {1, 5, 6, 10, 17}
+
+
+def test_search_products_matches_category_and_plural_terms(client):
+    response = client.get("/api/v1/products/search?q=laptops&limit=3")
+
+    data = response.get_json()
+    assert data["count"] == 3
+    for product in data["products"]:
+        assert product["category"] == "Laptops"
+
+
+def test_search_products_returns_empty_list_when_nothing_matches(client):
+    response = client.get("/api/v1/products/search?q=refrigerator")
+
+    assert response.status_code == 200
+    assert response.get_json() == {"products": [], "count": 0}
+
+
+@pytest.mark.parametrize("query", ["", "q=", "q=the", "q=mouse&limit=0", "q=mouse&limit=x"])
+def test_search_products_rejects_invalid_query_parameters(client, query):
+    response = client.get(f"/api/v1/products/search?{query}")
+
+    assert response.status_code == 400
+
+
+def test_search_index_is_updated_when_products_change():
+    store = CatalogStore([Product(id=1, name="Wireless Mouse", price=10.0, category="Mice", stock=1)])
+
+    store.add_product(Product(id=1, name="Wired Mouse", price=10.0, category="Mice", stock=1))
+
+    assert store.search("wireless", 10) == []
+    assert [p.id for p in store.search("wired", 10)] == [1]
+
+
 def test_get_product_returns_product_when_exists(client):
     response = client.get("/api/v1/products/1")
 
@@ -75,6 +215,87 @@ def test_get_product_returns_404_when_not_found(client):
     assert data["error"] == "Product not found"
 
 
+def test_batch_get_products_returns_found_products_in_request_order(client):
+    response = client.post("/api/v1/products:batchGet", json={"ids": [21, 1, 999, 21]})
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [p["id"] for p in data["products"]] == [21, 1]
+    assert data["count"] == 2
+    assert data["not_found"] == [999]
+
+
+@pytest.mark.parametrize("body", [None, {}, {"ids": []}, {"ids": "1,2"}, {"ids": [1, "2"]}, {"ids": list(range(101))}])
+def test_batch_get_products_rejects_invalid_requests(client, body):
+    response = client.post("/api/v1/products:batchGet", json=body)
+
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_get_product_returns_etag_and_304_for_matching_if_none_match(client):
+    response = client.get("/api/v1/products/1")
+    etag = response.headers["ETag"]
+
+    conditional_response = client.get("/api/v1/products/1", headers={"If-None-Match": etag})
+
+    assert conditional_response.status_code == 304
+    assert conditional_response.data == b""
+    assert conditional_response.headers["ETag"] == etag
+
+
+def test_list_products_returns_304_for_matching_if_none_match(client):
+    etag = client.get("/api/v1/products?category=Mice").headers["ETag"]
+
+    response = client.get("/api/v1/products?category=Mice", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+
+
+def test_list_products_etag_changes_when_catalog_changes(client):
+    etag = client.get("/api/v1/products?category=Audio").headers["ETag"]
+    original = get_product(14)
+
+    add_product(Product(id=31, name="Studio Speakers", price=199.99, category="Audio", stock=10))
+    try:
+        response = client.get("/api/v1/products?category=Audio", headers={"If-None-Match": etag})
+    finally:
+        remove_product(31)
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert [p["id"] for p in response.get_json()["products"]] == [original.id, 31]
+
+
+def test_response_cache_keeps_entries_of_newest_version_for_requests_of_older_versions():
+    cache = ResponseCache()
+    current = cache.get_or_build(2, "products", lambda: b"version 2")
+
+    stale = cache.get_or_build(1, "products", lambda: b"version 1")
+
+    assert stale.body == b"version 1"
+    assert cache.get_or_build(2, "products", lambda: b"rebuilt") is current
+    assert cache.get_or_build(1, "products", lambda: b"version 1 again").body == b"version 1 again"
+    assert cache.get_or_build(3, "products", lambda: b"version 3").body == b"version 3"
+
+
+def test_export_products_streams_one_json_object_per_line(client):
+    response = client.get("/api/v1/products:export")
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    lines = response.get_data(as_text=True).splitlines()
+    assert len(lines) == 30
+    assert json.loads(lines[0]) == client.get("/api/v1/products/1").get_json()
+
+
+def test_export_products_filters_by_category(client):
+    response = client.get("/api/v1/products:export?category=cameras")
+
+    products = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [p["id"] for p in products] == [13, 19]
+
+
 def test_product_has_all_required_fields(client):
     response = client.get("/api/v1/products")
 
@@ -86,3 +307,130 @@ def test_product_has_all_required_fields(client):
     assert "price" in product
     assert "category" in product
     assert "stock" in product
+
+
+def test_catalog_store_indexes_products_added_after_load():
+    store = CatalogStore([Product(id=1, name="Mouse", price=10.0, category="Mice", stock=1)])
+
+    store.add_product(Product(id=2, name="Trackball", price=20.0, category="mice", stock=2))
+
+    assert store.get(2).name == "Trackball"
+    assert [p.id for p in store.by_category("MICE")] == [1, 2]
+
+
+def test_catalog_store_reindexes_category_when_product_is_replaced():
+    store = CatalogStore([Product(id=1, name="Mouse", price=10.0, category="Mice", stock=1)])
+
+    store.add_product(Product(id=1, name="Mouse", price=10.0, category="Accessories", stock=1))
+
+    assert store.by_category("Mice") == []
+    assert [p.id for p in store.by_category("Accessories")] == [1]
+    assert len(store) == 1
+
+
+def test_catalog_store_remove_product_drops_it_from_all_indexes():
+    store = CatalogStore([Product(id=1, name="Mouse", price=10.0, category="Mice", stock=1)])
+
+    removed = store.remove_product(1)
+
+    assert removed.id == 1
+    assert store.get(1) is None
+    assert store.by_category("Mice") == []
+
+
+def test_catalog_store_copy_leaves_the_original_unchanged():
+    store = CatalogStore([Product(id=1, name="Wireless Mouse", price=10.0, category="Mice", stock=1),
+                          Product(id=2, name="Keyboard", price=20.0, category="Keyboards", stock=2)])
+
+    copy = store.copy()
+    copy.add_product(Product(id=3, name="Wireless Trackball", price=5.0, category="Mice", stock=3))
+    copy.remove_product(2)
+
+    assert [p.id for p in store.all()] == [1, 2]
+    assert [p.id for p in store.by_category("Mice")] == [1]
+    assert [p.id for p in store.search("wireless", 10)] == [1]
+    assert store.query(ProductQuery(sort="price", limit=10))[0] == [store.get(1), store.get(2)]
+    assert [p.id for p in copy.all()] == [1, 3]
+    assert sorted(p.id for p in copy.search("wireless", 10)) == [1, 3]
+    assert copy.by_category("Keyboards") == []
+
+
+def test_columnar_catalog_cannot_be_changed(tmp_path, restore_catalog):
+    catalog_file = tmp_path / "catalog.bin"
+    write_catalog_file(catalog_file, get_all_products())
+    columnar = ColumnarCatalog(catalog_file)
+    publish_catalog(columnar)
+
+    with pytest.raises(ReadOnlyCatalogError):
+        add_product(Product(id=31, name="Studio Speakers", price=199.99, category="Audio", stock=10))
+
+    assert get_catalog() is columnar
+    assert len(get_all_products()) == 30
+
+
+def test_columnar_catalog_serves_the_same_products_as_the_in_memory_store(tmp_path):
+    catalog_file = tmp_path / "catalog.bin"
+    write_catalog_file(catalog_file, get_all_products())
+    store = CatalogStore(get_all_products())
+
+    columnar = ColumnarCatalog(catalog_file)
+
+    assert len(columnar) == 30
+    assert columnar.get(7) == store.get(7)
+    assert columnar.get(999) is None
+    assert columnar.all() == store.all()
+    assert columnar.by_category("laptops") == store.by_category("Laptops")
+    for query in [
+        ProductQuery(category="mice", after=(1,), limit=1),
+        ProductQuery(after=(28,)),
+        ProductQuery(category="Laptops", sort="price", min_price=700, max_price=1500, limit=3),
+        ProductQuery(sort="price", descending=True, after=(599.99, 7), limit=5),
+        ProductQuery(sort="stock", in_stock=True, max_price=50, limit=4),
+    ]:
+        assert columnar.query(query) == store.query(query)
+    assert list(columnar.iter_products("Headsets")) == list(store.iter_products("Headsets"))
+    assert columnar.search("wireless mouse", 3) == store.search("wireless mouse", 3)
+
+
+def test_reload_catalog_publishes_new_snapshot_in_background(client, restore_catalog):
+    version = client.get("/api/v1/admin/catalog").get_json()["version"]
+    etag = client.get("/api/v1/products/1").headers["ETag"]
+
+    response = client.post("/api/v1/admin/catalog:reload", json={"products": [
+        {"id": 1, "name": "Wireless Gaming Mouse", "price": 49.99, "category": "Mice", "stock": 140},
+        {"id": 2, "name": "Silent Office Mouse", "price": 19.99, "category": "Mice", "stock": 300},
+    ]})
+
+    assert response.status_code == 202
+    status = wait_for_reload(client)
+    assert status["version"] > version
+    assert status["count"] == 2
+    assert status["last_reload_error"] is None
+
+    product_response = client.get("/api/v1/products/1", headers={"If-None-Match": etag})
+    assert product_response.status_code == 200
+    assert product_response.get_json()["price"] == 49.99
+    assert [p["id"] for p in client.get("/api/v1/products/search?q=mouse").get_json()["products"]] == [1, 2]
+    assert client.get("/api/v1/products/3").status_code == 404
+
+
+def test_reload_catalog_keeps_held_snapshot_unchanged(client, restore_catalog):
+    snapshot = get_catalog()
+
+    client.post("/api/v1/admin/catalog:reload", json={"products": []})
+    wait_for_reload(client)
+
+    assert get_catalog() is not snapshot
+    assert len(get_catalog()) == 0
+    assert len(snapshot) == 30
+    assert snapshot.get(1).name == "Wireless Gaming Mouse"
+
+
+@pytest.mark.parametrize("body", [None, {"products": "all"}, {"products": [{"id": 1, "name": "Mouse"}]},
+                                  {"products": [{"id": "x", "name": "Mouse", "price": 1, "category": "Mice",
+                                                 "stock": 1}]}])
+def test_reload_catalog_rejects_invalid_requests(client, body):
+    response = client.post("/api/v1/admin/catalog:reload", json=body)
+
+    assert response.status_code == 400
+    assert "error" in response.get_json()